@@ -4,52 +4,52 @@ from __future__ import annotations
 
 import logging
 
-from homeassistant.components.bluetooth import BluetoothScanningMode, BluetoothServiceInfoBleak
-from homeassistant.components.bluetooth.passive_update_processor import (
-    PassiveBluetoothProcessorCoordinator,
-)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .ble_parser import ManufacturerData, parse_manufacturer_data
-from .const import DOMAIN, MANUFACTURER_ID
+from .api import async_setup_api
+from .const import DOMAIN
+from .coordinator import BroodMinderCoordinator, async_get_runtime
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
-def _update_method(service_info: BluetoothServiceInfoBleak) -> ManufacturerData | None:
-    """Parse incoming advertisements into our high-level ManufacturerData."""
-    if MANUFACTURER_ID not in service_info.manufacturer_data:
-        return None
 
-    return parse_manufacturer_data(service_info.address, service_info.manufacturer_data)
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the history websocket commands and services."""
+    async_setup_api(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up BroodMinder BLE from a config entry."""
     address = entry.unique_id  # Bluetooth device address
 
-    coordinator = PassiveBluetoothProcessorCoordinator(
-        hass,
-        _LOGGER,
-        address=address,
-        mode=BluetoothScanningMode.ACTIVE,
-        update_method=_update_method,
-    )
+    coordinator = BroodMinderCoordinator(hass, entry)
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Start after platforms subscribe
+    # Restore the saved per-hive state, then start after platforms subscribe
+    await async_get_runtime(hass).async_load_snapshot()
     entry.async_on_unload(coordinator.async_start())
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     _LOGGER.info("Initialized BroodMinder %s", address)
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a BroodMinder config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
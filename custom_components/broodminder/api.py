@@ -0,0 +1,103 @@
+"""Websocket commands and services for the in-memory history (history.py)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from homeassistant.components import websocket_api
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
+
+from .const import DATA_RUNTIME, DOMAIN, SERVICE_GET_HISTORY
+from .history import COLUMNS
+
+ATTR_ADDRESS = "address"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_COLUMNS = "columns"
+
+_QUERY_SCHEMA = {
+    vol.Required(ATTR_ADDRESS): cv.string,
+    vol.Optional(ATTR_START): cv.datetime,
+    vol.Optional(ATTR_END): cv.datetime,
+    vol.Optional(ATTR_COLUMNS, default=list(COLUMNS)): vol.All(cv.ensure_list, [vol.In(COLUMNS)]),
+}
+
+
+def _timestamp(value: datetime | None) -> float | None:
+    # Naive datetimes are in Home Assistant's time zone
+    return None if value is None else dt_util.as_utc(value).timestamp()
+
+
+def _query(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any] | None:
+    """Columnar history of one device, None when it has none."""
+    runtime = hass.data.get(DATA_RUNTIME)
+    if runtime is None:
+        return None
+    address = data[ATTR_ADDRESS].upper()
+    result = runtime.history.query(
+        address,
+        _timestamp(data.get(ATTR_START)),
+        _timestamp(data.get(ATTR_END)),
+        tuple(data[ATTR_COLUMNS]),
+    )
+    if result is None:
+        return None
+    return {ATTR_ADDRESS: address, **result}
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/history", **_QUERY_SCHEMA})
+@callback
+def ws_history(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the columnar history of one device."""
+    if (result := _query(hass, msg)) is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "No history")
+        return
+    connection.send_result(msg["id"], result)
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/history/info"})
+@callback
+def ws_history_info(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the number of rows and the memory used by the history."""
+    runtime = hass.data.get(DATA_RUNTIME)
+    connection.send_result(msg["id"], runtime.history.info() if runtime else None)
+
+
+@callback
+def async_setup_api(hass: HomeAssistant) -> None:
+    """Register the websocket commands and services."""
+    websocket_api.async_register_command(hass, ws_history)
+    websocket_api.async_register_command(hass, ws_history_info)
+
+    @callback
+    def _async_get_history(call: ServiceCall) -> ServiceResponse:
+        if (result := _query(hass, call.data)) is None:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="no_history",
+                translation_placeholders={"address": call.data[ATTR_ADDRESS]},
+            )
+        return result
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        _async_get_history,
+        schema=vol.Schema(_QUERY_SCHEMA),
+        supports_response=SupportsResponse.ONLY,
+    )
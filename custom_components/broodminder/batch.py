@@ -0,0 +1,212 @@
+"""Vectorized decoding of many payloads at once, for bulk replay.
+
+``pack_payloads`` copies the payloads into one contiguous ``(n, PAYLOAD_LENGTH)``
+``uint8`` matrix (zero padded) plus their lengths. ``decode_batch`` then decodes every
+field of every frame with NumPy vector operations instead of one branchy Python call
+per frame:
+
+* length masks - a field is only decoded where the frame is long enough for it, and
+  frames shorter than ``MIN_PAYLOAD_LENGTH`` are invalid altogether (``valid``)
+* per-model dispatch - the layouts of ``layout.py`` are grouped by field, codec and
+  offsets, and each group is applied to the rows of the models carrying it
+* sentinel masks - the values the codecs reject (0xFFFF temperatures and counters,
+  0x7FFF/0x8005/0xFFFF weights, humidity above 100 %, swarm times of unsynced clocks)
+  become NaN
+
+Columns are ``float64`` named after the ``ManufacturerData`` fields, in the same
+fixed-point units (centi-°C, decagrams), with NaN where a frame does not carry a field
+or the value is invalid. The swarm time is returned as ``swarm_time_unix`` seconds.
+
+This module needs NumPy, which Home Assistant installs; ``BATCH_AVAILABLE`` in
+``reprocess.py`` tells whether it could be imported.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+import numpy as np
+
+from .const import (
+    IDX_MODEL,
+    IDX_VER_MAJOR,
+    IDX_VER_MINOR,
+    INVALID_U16,
+    INVALID_WEIGHTS,
+    SENSOR_PERCENTAGE_MAXIMUM,
+    SWARM_TIME_SYNCED_AFTER,
+    TEMPERATURE_OFFSET_CENTI_C,
+    WEIGHT_OFFSET_DAG,
+)
+from .layout import (
+    DEFAULT_LAYOUT,
+    MODEL_LAYOUTS,
+    SHT_CENTI_C,
+    battery_percent,
+    counter,
+    humidity_percent,
+    swarm_time_since_boot,
+    swarm_time_utc,
+    temperature_centi_c,
+    temperature_sht,
+    u8,
+    u16,
+    weight_dag,
+)
+
+PAYLOAD_LENGTH = 21
+MIN_PAYLOAD_LENGTH = 5  # as parse_manufacturer_data
+
+_SHT_CENTI_C = np.frombuffer(SHT_CENTI_C, dtype=np.int16).astype(np.float64)
+
+Matrix = Any  # np.ndarray of uint8, shape (n, PAYLOAD_LENGTH)
+Column = Any  # np.ndarray of float64, shape (n,)
+Mask = Any  # np.ndarray of bool, shape (n,)
+
+
+def _u16(matrix: Matrix, lo: int, hi: int) -> Any:
+    return matrix[:, lo].astype(np.int64) | (matrix[:, hi].astype(np.int64) << 8)
+
+
+def _u8_codec(matrix: Matrix, idx: int) -> tuple[Column, Mask]:
+    raw = matrix[:, idx].astype(np.float64)
+    return raw, np.ones(len(raw), dtype=bool)
+
+
+def _u16_codec(matrix: Matrix, lo: int, hi: int) -> tuple[Column, Mask]:
+    raw = _u16(matrix, lo, hi)
+    return raw.astype(np.float64), np.ones(len(raw), dtype=bool)
+
+
+def _counter_codec(matrix: Matrix, lo: int, hi: int) -> tuple[Column, Mask]:
+    raw = _u16(matrix, lo, hi)
+    return raw.astype(np.float64), raw != INVALID_U16
+
+
+def _battery_codec(matrix: Matrix, idx: int) -> tuple[Column, Mask]:
+    raw = np.minimum(matrix[:, idx], SENSOR_PERCENTAGE_MAXIMUM).astype(np.float64)
+    return raw, np.ones(len(raw), dtype=bool)
+
+
+def _humidity_codec(matrix: Matrix, idx: int) -> tuple[Column, Mask]:
+    raw = matrix[:, idx]
+    return raw.astype(np.float64), raw <= SENSOR_PERCENTAGE_MAXIMUM
+
+
+def _temperature_codec(matrix: Matrix, lo: int, hi: int) -> tuple[Column, Mask]:
+    raw = _u16(matrix, lo, hi)
+    return (raw - TEMPERATURE_OFFSET_CENTI_C).astype(np.float64), raw != INVALID_U16
+
+
+def _temperature_sht_codec(matrix: Matrix, lo: int, hi: int) -> tuple[Column, Mask]:
+    raw = _u16(matrix, lo, hi)
+    return _SHT_CENTI_C[raw], raw != INVALID_U16
+
+
+def _weight_codec(matrix: Matrix, lo: int, hi: int) -> tuple[Column, Mask]:
+    raw = _u16(matrix, lo, hi)
+    valid = ~np.isin(raw, INVALID_WEIGHTS)
+    return (raw - WEIGHT_OFFSET_DAG).astype(np.float64), valid
+
+
+def _swarm_time_codec(matrix: Matrix, b0: int, b1: int, b2: int, b3: int) -> tuple[Column, Mask]:
+    raw = _u16(matrix, b0, b1) | (_u16(matrix, b2, b3) << 16)
+    return raw.astype(np.float64), raw >= SWARM_TIME_SYNCED_AFTER
+
+
+def _swarm_since_boot_codec(
+    matrix: Matrix, b0: int, b1: int, b2: int, b3: int
+) -> tuple[Column, Mask]:
+    raw = _u16(matrix, b0, b1) | (_u16(matrix, b2, b3) << 16)
+    return raw.astype(np.float64), (raw > 0) & (raw < SWARM_TIME_SYNCED_AFTER)
+
+
+# Scalar codec of layout.py -> vectorized codec returning (values, valid)
+VECTOR_CODECS: dict[Callable[..., Any], Callable[..., tuple[Column, Mask]]] = {
+    u8: _u8_codec,
+    u16: _u16_codec,
+    counter: _counter_codec,
+    battery_percent: _battery_codec,
+    humidity_percent: _humidity_codec,
+    temperature_centi_c: _temperature_codec,
+    temperature_sht: _temperature_sht_codec,
+    weight_dag: _weight_codec,
+    swarm_time_utc: _swarm_time_codec,
+    swarm_time_since_boot: _swarm_since_boot_codec,
+}
+
+# Output column of a ManufacturerData field, where the value is not a number
+COLUMN_NAMES = {"swarm_time_utc": "swarm_time_unix"}
+
+
+def _build_plan() -> dict[str, list[tuple[Any, tuple[int, ...], frozenset[int] | None]]]:
+    """Field -> [(codec, offsets, models)], ``None`` models meaning unknown models."""
+    groups: dict[tuple[str, Any, tuple[int, ...]], set[int]] = {}
+    for model, specs in MODEL_LAYOUTS.items():
+        for spec in specs:
+            groups.setdefault((spec.name, spec.codec, spec.offsets), set()).add(model)
+
+    plan: dict[str, list[tuple[Any, tuple[int, ...], frozenset[int] | None]]] = {}
+    for (name, codec, offsets), models in groups.items():
+        plan.setdefault(name, []).append((codec, offsets, frozenset(models)))
+    for spec in DEFAULT_LAYOUT:
+        plan.setdefault(spec.name, []).append((spec.codec, spec.offsets, None))
+    return plan
+
+
+PLAN = _build_plan()
+KNOWN_MODELS = np.array(sorted(MODEL_LAYOUTS), dtype=np.uint8)
+
+
+def pack_payloads(payloads: Sequence[bytes | memoryview]) -> tuple[Matrix, Any]:
+    """Copy the payloads into a zero-padded matrix, returns it and the lengths.
+
+    The payloads are joined into one buffer; when they all have ``PAYLOAD_LENGTH``
+    bytes that buffer is the matrix, otherwise it fills the leading cells of each row
+    of a preallocated matrix in one masked assignment.
+    """
+    count = len(payloads)
+    lengths = np.fromiter(map(len, payloads), dtype=np.int64, count=count)
+    flat = np.frombuffer(b"".join(payloads), dtype=np.uint8)
+    if (lengths == PAYLOAD_LENGTH).all():
+        return flat.reshape(count, PAYLOAD_LENGTH), lengths
+
+    if (lengths > PAYLOAD_LENGTH).any():
+        # Drop the bytes beyond PAYLOAD_LENGTH: their column within the payload
+        columns = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        flat = flat[columns < PAYLOAD_LENGTH]
+    matrix = np.zeros((count, PAYLOAD_LENGTH), dtype=np.uint8)
+    matrix[np.arange(PAYLOAD_LENGTH) < lengths[:, None]] = flat
+    return matrix, lengths
+
+
+def decode_batch(
+    matrix: Matrix, lengths: Any, fields: Iterable[str] | None = None
+) -> dict[str, Column | Mask]:
+    """Decode all rows of a packed matrix.
+
+    Returns ``valid``, ``model``, ``firmware_major`` and ``firmware_minor`` (0 where not
+    valid) and one column per field in ``fields`` (default all known fields).
+    """
+    valid = lengths >= MIN_PAYLOAD_LENGTH
+    model = matrix[:, IDX_MODEL]
+    result: dict[str, Column | Mask] = {
+        "valid": valid,
+        "model": np.where(valid, model, 0),
+        "firmware_major": np.where(lengths > IDX_VER_MAJOR, matrix[:, IDX_VER_MAJOR], 0),
+        "firmware_minor": np.where(lengths > IDX_VER_MINOR, matrix[:, IDX_VER_MINOR], 0),
+    }
+    unknown_model = ~np.isin(model, KNOWN_MODELS)
+
+    for name in PLAN if fields is None else fields:
+        column = np.full(len(lengths), np.nan)
+        for codec, offsets, models in PLAN[name]:
+            carried = unknown_model if models is None else np.isin(model, list(models))
+            rows = valid & carried & (lengths > max(offsets))
+            if not rows.any():
+                continue
+            values, ok = VECTOR_CODECS[codec](matrix[rows], *offsets)
+            column[np.flatnonzero(rows)[ok]] = values[ok]
+        result[COLUMN_NAMES.get(name, name)] = column
+    return result
@@ -1,55 +1,46 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable, Mapping
 from dataclasses import dataclass
-from datetime import UTC, datetime
+from datetime import datetime
+import sys
 from typing import Any
 
 from .const import (
     ID_TO_MODEL,
-    IDX_BATTERY,
-    IDX_ELAPSED_H,
-    IDX_ELAPSED_L,
-    IDX_HUMIDITY,
     IDX_MODEL,
-    IDX_RT_TEMP1_L,
-    IDX_RT_TEMP2_L,
-    IDX_RT_TOTAL_H,
-    IDX_RT_TOTAL_L_OR_SWARM_STATE,
-    IDX_TEMP_H,
-    IDX_TEMP_L,
     IDX_VER_MAJOR,
     IDX_VER_MINOR,
-    IDX_WEIGHT_L_H,
-    IDX_WEIGHT_L_L,
-    IDX_WEIGHT_R_H,
-    IDX_WEIGHT_R_L,
-    IDX_WL2_SM0,
-    IDX_WL2_SM1,
-    IDX_WR2_SM2,
-    IDX_WR2_SM3,
     MANUFACTURER,
     MANUFACTURER_ID,
-    MODEL_T,
-    MODEL_TH,
-    MODEL_W,
-    MODEL_W3_W4,
-    NO_HUMIDITY_MODELS,
+    METADATA_CACHE_SIZE,
     SENSOR_BATT,
+    SENSOR_BEE_COUNT_IN,
+    SENSOR_BEE_COUNT_OUT,
+    SENSOR_BEE_TRAFFIC,
     SENSOR_HUM,
-    SENSOR_PERCENTAGE_MAXIMUM,
-    SENSOR_PERCENTAGE_MINIMUM,
     SENSOR_SAMPLE_COUNT,
     SENSOR_SWARM_STATE,
     SENSOR_SWARM_TIME,
+    SENSOR_SWARM_TIME_SINCE_BOOT,
     SENSOR_TEMP,
+    SENSOR_TEMP_F,
     SENSOR_TEMP_RT,
+    SENSOR_TEMP_RT_F,
     SENSOR_WEIGHT_L,
     SENSOR_WEIGHT_L2,
+    SENSOR_WEIGHT_L2_LB,
+    SENSOR_WEIGHT_L_LB,
     SENSOR_WEIGHT_R,
     SENSOR_WEIGHT_R2,
+    SENSOR_WEIGHT_R2_LB,
+    SENSOR_WEIGHT_R_LB,
     SENSOR_WEIGHT_REALTIME,
-    SPECIAL_TEMP_MODELS_F,
+    SENSOR_WEIGHT_REALTIME_LB,
+    UNITS_IMPERIAL,
+    UNITS_METRIC,
 )
+from .layout import get_decoder, model_fields
 
 
 @dataclass(frozen=True)
@@ -59,87 +50,159 @@ class ManufacturerData:
     address: str
     model: int
     firmware: str | None
-    temperature_c: float | None
-    humidity_percent: int | None
-    battery_percent: int | None
     device_name: str
     device_id: str  # address or BroodMinder ID string
 
-    # Extra parsed fields from PRIMARY (optional)
+    # Parsed fields, present depending on model (see layout.py).
+    # Temperatures and weights are kept as fixed-point integers (centi-°C and
+    # decagrams); the float properties below convert them when read.
+    temperature_centi_c: int | None = None
+    humidity_percent: int | None = None
+    battery_percent: int | None = None
     elapsed_s: int | None = None
-    temperature_rt_c: float | None = None
-    weight_l_kg: float | None = None
-    weight_r_kg: float | None = None
-    weight_l2_kg: float | None = None
-    weight_r2_kg: float | None = None
-    weight_realtime_total_kg: float | None = None
+    temperature_rt_centi_c: int | None = None
+    weight_l_dag: int | None = None
+    weight_r_dag: int | None = None
+    weight_l2_dag: int | None = None
+    weight_r2_dag: int | None = None
+    weight_realtime_total_dag: int | None = None
     swarm_state_numeric: int | None = None
     swarm_time_utc: datetime | None = None
+    swarm_time_since_boot_s: int | None = None  # instead of swarm_time_utc when not synced
+    bee_count_in: int | None = None
+    bee_count_out: int | None = None
+    bee_traffic: int | None = None
+
+    @property
+    def temperature_c(self) -> float | None:
+        """Temperature in °C."""
+        return None if self.temperature_centi_c is None else self.temperature_centi_c / 100
+
+    @property
+    def temperature_rt_c(self) -> float | None:
+        """Realtime temperature in °C."""
+        raw = self.temperature_rt_centi_c
+        return None if raw is None else raw / 100
+
+    @property
+    def weight_l_kg(self) -> float | None:
+        """Weight left in kg."""
+        return None if self.weight_l_dag is None else self.weight_l_dag / 100
+
+    @property
+    def weight_r_kg(self) -> float | None:
+        """Weight right in kg."""
+        return None if self.weight_r_dag is None else self.weight_r_dag / 100
+
+    @property
+    def weight_l2_kg(self) -> float | None:
+        """Weight left 2 in kg."""
+        return None if self.weight_l2_dag is None else self.weight_l2_dag / 100
+
+    @property
+    def weight_r2_kg(self) -> float | None:
+        """Weight right 2 in kg."""
+        return None if self.weight_r2_dag is None else self.weight_r2_dag / 100
+
+    @property
+    def weight_realtime_total_kg(self) -> float | None:
+        """Realtime total weight in kg."""
+        raw = self.weight_realtime_total_dag
+        return None if raw is None else raw / 100
+
+
+# Public values of ManufacturerData in export order (floats for fixed-point fields)
+VALUE_FIELDS = (
+    "temperature_c",
+    "temperature_rt_c",
+    "humidity_percent",
+    "battery_percent",
+    "elapsed_s",
+    "weight_l_kg",
+    "weight_r_kg",
+    "weight_l2_kg",
+    "weight_r2_kg",
+    "weight_realtime_total_kg",
+    "swarm_state_numeric",
+    "swarm_time_utc",
+    "swarm_time_since_boot_s",
+    "bee_count_in",
+    "bee_count_out",
+    "bee_traffic",
+)
 
 
-def _parse_temperature_c(model: int, lo: int, hi: int) -> float | None:
-    raw = lo | (hi << 8)
-    if raw in (0xFFFF,):  # invalid
-        return None
-
-    if model in SPECIAL_TEMP_MODELS_F:
-        # raw is 16-bit → °C via SHT-like formula in docs (converted via °F path)
-        t_f = ((raw / (2**16)) * 165 - 40) * 9 / 5 + 32
-        return (t_f - 32) * 5 / 9
-
-    # Others: centiC with +5000 offset
-    return (raw - 5000) / 100.0
-
+# Entity key -> ManufacturerData field it is built from
+ENTITY_FIELDS: dict[str, str] = {
+    SENSOR_TEMP: "temperature_centi_c",
+    SENSOR_TEMP_RT: "temperature_rt_centi_c",
+    SENSOR_HUM: "humidity_percent",
+    SENSOR_BATT: "battery_percent",
+    SENSOR_SAMPLE_COUNT: "elapsed_s",
+    SENSOR_WEIGHT_L: "weight_l_dag",
+    SENSOR_WEIGHT_R: "weight_r_dag",
+    SENSOR_WEIGHT_L2: "weight_l2_dag",
+    SENSOR_WEIGHT_R2: "weight_r2_dag",
+    SENSOR_WEIGHT_REALTIME: "weight_realtime_total_dag",
+    SENSOR_SWARM_STATE: "swarm_state_numeric",
+    SENSOR_SWARM_TIME: "swarm_time_utc",
+    SENSOR_SWARM_TIME_SINCE_BOOT: "swarm_time_since_boot_s",
+    SENSOR_BEE_COUNT_IN: "bee_count_in",
+    SENSOR_BEE_COUNT_OUT: "bee_count_out",
+    SENSOR_BEE_TRAFFIC: "bee_traffic",
+}
 
-def _parse_battery(raw: int) -> int | None:
-    # Clamp to HA's 0..100 expectation; some frames can exceed 100.
-    if raw < 0:
-        return None
 
-    return min(SENSOR_PERCENTAGE_MAXIMUM, max(SENSOR_PERCENTAGE_MINIMUM, raw))
+DAG_PER_LB = 45.359237
 
 
-def _parse_humidity(model: int, raw: int) -> int | None:
-    if model in NO_HUMIDITY_MODELS:
-        return None
+def centi_c_to_f(raw: int) -> float:
+    """Centi-°C to °F, rounded to the sensor resolution."""
+    return round(raw * 9 / 500 + 32, 2)
 
-    if not (SENSOR_PERCENTAGE_MINIMUM <= raw <= SENSOR_PERCENTAGE_MAXIMUM):
-        return None
 
-    return raw
+def dag_to_lb(raw: int) -> float:
+    """Decagrams to pounds, rounded to the sensor resolution."""
+    return round(raw / DAG_PER_LB, 2)
 
 
-def _parse_weight_kg(model: int, lo: int, hi: int) -> float | None:
-    weight = None
+# Metric entity key -> (imperial twin key, conversion of the raw ManufacturerData integer)
+IMPERIAL_ENTITIES: dict[str, tuple[str, Callable[[int], float]]] = {
+    SENSOR_TEMP: (SENSOR_TEMP_F, centi_c_to_f),
+    SENSOR_TEMP_RT: (SENSOR_TEMP_RT_F, centi_c_to_f),
+    SENSOR_WEIGHT_L: (SENSOR_WEIGHT_L_LB, dag_to_lb),
+    SENSOR_WEIGHT_R: (SENSOR_WEIGHT_R_LB, dag_to_lb),
+    SENSOR_WEIGHT_L2: (SENSOR_WEIGHT_L2_LB, dag_to_lb),
+    SENSOR_WEIGHT_R2: (SENSOR_WEIGHT_R2_LB, dag_to_lb),
+    SENSOR_WEIGHT_REALTIME: (SENSOR_WEIGHT_REALTIME_LB, dag_to_lb),
+}
+IMPERIAL_TO_METRIC = {imperial: key for key, (imperial, _) in IMPERIAL_ENTITIES.items()}
 
-    if model in MODEL_W or model in MODEL_W3_W4:
-        raw = lo | (hi << 8)
 
-        # Known sentinel "no weight" values (docs/examples):
-        if raw not in (0x7FFF, 0x8005, 0xFFFF):
-            # Signed with -32767 offset; then scale 1/100 (kg)
-            weight = (raw - 32767) / 100.0
+def model_entity_keys(model: int | None) -> list[str]:
+    """Entity keys ``model`` can provide, in entity order."""
+    fields = set(model_fields(model))
+    return [key for key, field in ENTITY_FIELDS.items() if field in fields]
 
-    return weight
 
+def entity_fields(keys: Iterable[str]) -> frozenset[str]:
+    """ManufacturerData fields needed for the entity ``keys``."""
+    return frozenset(ENTITY_FIELDS[key] for key in keys if key in ENTITY_FIELDS)
 
-def _parse_swarm_time(model: int, t1: int, t2: int, t3: int, t4: int) -> datetime | None:
-    """Convert four bytes to a UTC datetime for T/TH models (per docs)."""
-    if model in MODEL_T or model in MODEL_TH:
-        swarm_time_unix = t1 | (t2 << 8) | (t3 << 16) | (t4 << 24)
-        try:
-            return datetime.fromtimestamp(swarm_time_unix, tz=UTC)
-        except (OverflowError, OSError, ValueError):
-            return None
 
-    return None
+@dataclass(frozen=True, slots=True)
+class DeviceMetadata:
+    """Strings derived from address, model and firmware bytes, built once per device."""
 
+    model: int
+    ver_major: int
+    ver_minor: int
+    firmware: str
+    device_name: str
 
-def _parse_swarm_state(model: int, ss: int) -> int | None:
-    if model in MODEL_T or model in MODEL_TH:
-        return ss
 
-    return None
+# address -> metadata; rebuilt only when the model or firmware bytes change
+_METADATA_CACHE: dict[str, DeviceMetadata] = {}
 
 
 def _get_device_id_from_mac_address(mac_address: str) -> str:
@@ -151,8 +214,44 @@ def _get_model_name_from_model_id(model_id: int) -> str:
     return ID_TO_MODEL.get(model_id, "Unknown")
 
 
-def parse_manufacturer_data(address: str, mfg_data: dict[int, bytes]) -> ManufacturerData | None:
-    """Parses the manufacturer data of the advertisement."""
+def _get_device_metadata(
+    address: str, model: int, ver_major: int, ver_minor: int
+) -> DeviceMetadata:
+    metadata = _METADATA_CACHE.get(address)
+    if (
+        metadata is not None
+        and metadata.model == model
+        and metadata.ver_major == ver_major
+        and metadata.ver_minor == ver_minor
+    ):
+        return metadata
+
+    model_name = _get_model_name_from_model_id(model)
+    device_id = _get_device_id_from_mac_address(address)
+    metadata = DeviceMetadata(
+        model=model,
+        ver_major=ver_major,
+        ver_minor=ver_minor,
+        firmware=sys.intern(f"{ver_major}.{ver_minor}"),
+        device_name=sys.intern(f"{MANUFACTURER}-{model_name} {device_id}"),
+    )
+    if address not in _METADATA_CACHE and len(_METADATA_CACHE) >= METADATA_CACHE_SIZE:
+        # Bounded: forget the device that was added first
+        del _METADATA_CACHE[next(iter(_METADATA_CACHE))]
+    _METADATA_CACHE[address] = metadata
+    return metadata
+
+
+def parse_manufacturer_data(
+    address: str,
+    mfg_data: Mapping[int, bytes | memoryview],
+    fields: frozenset[str] | None = None,
+) -> ManufacturerData | None:
+    """Parses the manufacturer data of the advertisement.
+
+    When ``fields`` is given only those ManufacturerData fields are decoded, the others
+    stay None (see ``entity_fields``).
+    """
 
     payload = mfg_data.get(MANUFACTURER_ID)
     # We need up to index 20 (inclusive) if present → len >= 21
@@ -162,123 +261,86 @@ def parse_manufacturer_data(address: str, mfg_data: dict[int, bytes]) -> Manufac
     model = payload[IDX_MODEL]
     ver_minor = payload[IDX_VER_MINOR] if len(payload) > IDX_VER_MINOR else 0
     ver_major = payload[IDX_VER_MAJOR] if len(payload) > IDX_VER_MAJOR else 0
-    fw = f"{ver_major}.{ver_minor}"
-
-    # Battery
-    battery = None
-    if len(payload) > IDX_BATTERY:
-        battery = _parse_battery(payload[IDX_BATTERY])
-
-    # Main temperature
-    temp_c = None
-    if len(payload) > IDX_TEMP_H:
-        temp_c = _parse_temperature_c(model, payload[IDX_TEMP_L], payload[IDX_TEMP_H])
-
-    # Humidity
-    humidity = None
-    if len(payload) > IDX_HUMIDITY:
-        humidity = _parse_humidity(model, payload[IDX_HUMIDITY])
-
-    # Elapsed seconds
-    elapsed_s = None
-    if len(payload) > IDX_ELAPSED_H:
-        elapsed_s = payload[IDX_ELAPSED_L] | (payload[IDX_ELAPSED_H] << 8)
-
-    # Realtime temperature
-    temperature_rt_c = None
-    if len(payload) > IDX_RT_TEMP1_L and len(payload) > IDX_RT_TEMP2_L:
-        temperature_rt_c = _parse_temperature_c(
-            model, payload[IDX_RT_TEMP1_L], payload[IDX_RT_TEMP2_L]
-        )
-
-    # Weights
-    weight_l_kg = None
-    weight_r_kg = None
-    if len(payload) > IDX_WEIGHT_R_H:
-        weight_l_kg = _parse_weight_kg(model, payload[IDX_WEIGHT_L_L], payload[IDX_WEIGHT_L_H])
-        weight_r_kg = _parse_weight_kg(model, payload[IDX_WEIGHT_R_L], payload[IDX_WEIGHT_R_H])
-
-    # Extra channels or SM time
-    weight_l2_kg = None
-    weight_r2_kg = None
-    swarm_time_dt = None
-
-    if len(payload) > IDX_WR2_SM3:
-        # Expose as swarm time for models where these are swarm time
-        swarm_time_dt = _parse_swarm_time(
-            model,
-            payload[IDX_WL2_SM0],
-            payload[IDX_WL2_SM1],
-            payload[IDX_WR2_SM2],
-            payload[IDX_WR2_SM3],
-        )
-
-        # Expose as weights for models where these are extra weight channels
-        weight_l2_kg = _parse_weight_kg(model, payload[IDX_WL2_SM0], payload[IDX_WL2_SM1])
-        weight_r2_kg = _parse_weight_kg(model, payload[IDX_WR2_SM2], payload[IDX_WR2_SM3])
 
-    # Realtime total or swarm state
-    weight_realtime_total_kg = None
-    swarm_state = None
-
-    if len(payload) > IDX_RT_TOTAL_H:
-        swarm_state = _parse_swarm_state(model, payload[IDX_RT_TOTAL_L_OR_SWARM_STATE])
-        weight_realtime_total_kg = _parse_weight_kg(
-            model, payload[IDX_RT_TOTAL_L_OR_SWARM_STATE], payload[IDX_RT_TOTAL_H]
-        )
+    # Model specific fields, see layout.py
+    values = get_decoder(model, fields)(payload)
 
-    # Device label
-    model_name = _get_model_name_from_model_id(model)
-    device_id = _get_device_id_from_mac_address(address)
-    device_name = f"{MANUFACTURER}-{model_name} {device_id}"
+    # Device label and firmware, cached per address
+    metadata = _get_device_metadata(address, model, ver_major, ver_minor)
 
     return ManufacturerData(
         address=address,
         model=model,
-        firmware=fw,
-        temperature_c=temp_c,
-        humidity_percent=humidity,
-        battery_percent=battery,
-        device_name=device_name,
+        firmware=metadata.firmware,
+        device_name=metadata.device_name,
         device_id=address,
-        elapsed_s=elapsed_s,
-        temperature_rt_c=temperature_rt_c,
-        weight_l_kg=weight_l_kg,
-        weight_r_kg=weight_r_kg,
-        weight_l2_kg=weight_l2_kg,
-        weight_r2_kg=weight_r2_kg,
-        weight_realtime_total_kg=weight_realtime_total_kg,
-        swarm_state_numeric=swarm_state,
-        swarm_time_utc=swarm_time_dt,
+        **values,
     )
 
 
-def extract_entities(parsed: ManufacturerData) -> dict[str, Any]:
-    """Return a key->value map for entities."""
+def extract_entities(
+    parsed: ManufacturerData, fixed_point: bool = False, units: str = UNITS_METRIC
+) -> dict[str, Any]:
+    """Return a key->value map for entities.
+
+    With ``fixed_point`` temperatures (centi-°C) and weights (decagrams) are returned as
+    the raw integers, e.g. for batch replay or change detection. Otherwise ``units``
+    selects metric keys, their imperial twins (°F, lb, see ``IMPERIAL_ENTITIES``) or
+    both; the imperial values are converted from the raw integers.
+    """
 
     data: dict[str, Any] = {}
-    if parsed.temperature_c is not None:
-        data[SENSOR_TEMP] = parsed.temperature_c
-    if parsed.temperature_rt_c is not None:
-        data[SENSOR_TEMP_RT] = parsed.temperature_rt_c
+    if parsed.temperature_centi_c is not None:
+        data[SENSOR_TEMP] = (
+            parsed.temperature_centi_c if fixed_point else parsed.temperature_centi_c / 100
+        )
+    if parsed.temperature_rt_centi_c is not None:
+        data[SENSOR_TEMP_RT] = (
+            parsed.temperature_rt_centi_c if fixed_point else parsed.temperature_rt_centi_c / 100
+        )
     if parsed.humidity_percent is not None:
         data[SENSOR_HUM] = parsed.humidity_percent
     if parsed.battery_percent is not None:
         data[SENSOR_BATT] = parsed.battery_percent
     if parsed.elapsed_s is not None:
         data[SENSOR_SAMPLE_COUNT] = parsed.elapsed_s
-    if parsed.weight_l_kg is not None:
-        data[SENSOR_WEIGHT_L] = parsed.weight_l_kg
-    if parsed.weight_r_kg is not None:
-        data[SENSOR_WEIGHT_R] = parsed.weight_r_kg
-    if parsed.weight_l2_kg is not None:
-        data[SENSOR_WEIGHT_L2] = parsed.weight_l2_kg
-    if parsed.weight_r2_kg is not None:
-        data[SENSOR_WEIGHT_R2] = parsed.weight_r2_kg
-    if parsed.weight_realtime_total_kg is not None:
-        data[SENSOR_WEIGHT_REALTIME] = parsed.weight_realtime_total_kg
+    if parsed.weight_l_dag is not None:
+        data[SENSOR_WEIGHT_L] = parsed.weight_l_dag if fixed_point else parsed.weight_l_dag / 100
+    if parsed.weight_r_dag is not None:
+        data[SENSOR_WEIGHT_R] = parsed.weight_r_dag if fixed_point else parsed.weight_r_dag / 100
+    if parsed.weight_l2_dag is not None:
+        data[SENSOR_WEIGHT_L2] = (
+            parsed.weight_l2_dag if fixed_point else parsed.weight_l2_dag / 100
+        )
+    if parsed.weight_r2_dag is not None:
+        data[SENSOR_WEIGHT_R2] = (
+            parsed.weight_r2_dag if fixed_point else parsed.weight_r2_dag / 100
+        )
+    if parsed.weight_realtime_total_dag is not None:
+        data[SENSOR_WEIGHT_REALTIME] = (
+            parsed.weight_realtime_total_dag
+            if fixed_point
+            else parsed.weight_realtime_total_dag / 100
+        )
     if parsed.swarm_state_numeric is not None:
         data[SENSOR_SWARM_STATE] = parsed.swarm_state_numeric
     if parsed.swarm_time_utc is not None:
         data[SENSOR_SWARM_TIME] = parsed.swarm_time_utc
+    if parsed.swarm_time_since_boot_s is not None:
+        data[SENSOR_SWARM_TIME_SINCE_BOOT] = parsed.swarm_time_since_boot_s
+    if parsed.bee_count_in is not None:
+        data[SENSOR_BEE_COUNT_IN] = parsed.bee_count_in
+    if parsed.bee_count_out is not None:
+        data[SENSOR_BEE_COUNT_OUT] = parsed.bee_count_out
+    if parsed.bee_traffic is not None:
+        data[SENSOR_BEE_TRAFFIC] = parsed.bee_traffic
+
+    if units != UNITS_METRIC and not fixed_point:
+        for key, (imperial_key, convert) in IMPERIAL_ENTITIES.items():
+            raw = getattr(parsed, ENTITY_FIELDS[key])
+            if raw is None:
+                continue
+            data[imperial_key] = convert(raw)
+            if units == UNITS_IMPERIAL:
+                del data[key]
     return data
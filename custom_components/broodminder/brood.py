@@ -0,0 +1,218 @@
+"""Brood temperature stability, computed online per hive.
+
+A colony with brood holds the brood nest close to 35 °C, while without brood the
+temperature follows the ambient temperature. ``BroodStability`` keeps, per hour of the
+last ``BROOD_WINDOW_HOURS`` hours, a Welford accumulator of the temperature (count, mean
+and sum of squared deviations) and the seconds spent in and out of the brood zone. The
+hourly accumulators are merged (Chan et al.) into a rolling standard deviation, so each
+hive needs a fixed amount of memory whatever its advertisement rate, and nothing has to
+be queried from the recorder.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+
+from .ble_parser import ManufacturerData
+from .const import (
+    BROOD_MAX_GAP,
+    BROOD_MIN_COVERAGE,
+    BROOD_STD_LIMIT_C,
+    BROOD_WINDOW_HOURS,
+    BROOD_ZONE_MAX_CENTI_C,
+    BROOD_ZONE_MIN_CENTI_C,
+    SENSOR_BROOD_CONFIDENCE,
+    SENSOR_BROOD_ZONE_TIME,
+    SENSOR_TEMP_STD,
+)
+from .pipeline import DerivedValues, Stage
+
+_STATE = struct.Struct("<qdBH")  # current hour, last time (NaN: none), in zone, hours
+_HOUR = struct.Struct("<qIdddd")
+
+
+class _Hour:
+    """Welford accumulator and brood zone time of one hour."""
+
+    __slots__ = ("count", "hour", "m2", "mean", "seconds", "zone_seconds")
+
+    def __init__(self, hour: int = -1) -> None:
+        self.reset(hour)
+
+    def reset(self, hour: int) -> None:
+        self.hour = hour
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.seconds = 0.0
+        self.zone_seconds = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: _Hour) -> None:
+        """Combine ``other`` into this accumulator."""
+        self.seconds += other.seconds
+        self.zone_seconds += other.zone_seconds
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+
+class BroodStability:
+    """Rolling temperature statistics of one hive, O(1) per reading."""
+
+    __slots__ = ("_closed", "_current", "_hours", "_last_in_zone", "_last_time")
+
+    def __init__(self, hours: int = BROOD_WINDOW_HOURS) -> None:
+        """Initialize without readings."""
+        self._hours = [_Hour() for _ in range(hours)]
+        self._current = -1  # latest hour with a reading
+        self._closed: _Hour | None = None  # merged hours before the current one (cache)
+        self._last_time: float | None = None
+        self._last_in_zone = False
+
+    def update(self, temperature_centi_c: int, timestamp: float) -> None:
+        """Add a reading taken at ``timestamp`` (seconds)."""
+        hour = int(timestamp // 3600)
+        bucket = self._hours[hour % len(self._hours)]
+        if bucket.hour != hour:
+            if hour < bucket.hour:
+                return  # older than the window
+            bucket.reset(hour)
+        if hour != self._current:
+            self._current = max(self._current, hour)
+            self._closed = None
+
+        # The time since the previous reading counts with that reading's zone
+        if self._last_time is not None:
+            elapsed = min(max(0.0, timestamp - self._last_time), BROOD_MAX_GAP)
+            bucket.seconds += elapsed
+            if self._last_in_zone:
+                bucket.zone_seconds += elapsed
+        self._last_time = timestamp
+        self._last_in_zone = (
+            BROOD_ZONE_MIN_CENTI_C <= temperature_centi_c <= BROOD_ZONE_MAX_CENTI_C
+        )
+        bucket.add(temperature_centi_c / 100)
+
+    def to_bytes(self) -> bytes:
+        """Snapshot payload of the window."""
+        last_time = math.nan if self._last_time is None else self._last_time
+        return b"".join(
+            (
+                _STATE.pack(self._current, last_time, self._last_in_zone, len(self._hours)),
+                *(
+                    _HOUR.pack(h.hour, h.count, h.mean, h.m2, h.seconds, h.zone_seconds)
+                    for h in self._hours
+                ),
+            )
+        )
+
+    def restore(self, data: bytes) -> None:
+        """Replace the window by a ``to_bytes`` payload, hours outside it are dropped."""
+        current, last_time, in_zone, count = _STATE.unpack_from(data)
+        if len(data) != _STATE.size + count * _HOUR.size:
+            raise ValueError("brood stability payload size mismatch")
+        first = current - len(self._hours)
+        for bucket in self._hours:
+            bucket.reset(-1)
+        for index in range(count):
+            hour, n, mean, m2, seconds, zone_seconds = _HOUR.unpack_from(
+                data, _STATE.size + index * _HOUR.size
+            )
+            if not first < hour <= current:
+                continue
+            bucket = self._hours[hour % len(self._hours)]
+            bucket.reset(hour)
+            bucket.count, bucket.mean, bucket.m2 = n, mean, m2
+            bucket.seconds, bucket.zone_seconds = seconds, zone_seconds
+        self._current = current
+        self._closed = None
+        self._last_time = None if math.isnan(last_time) else last_time
+        self._last_in_zone = bool(in_zone)
+
+    def _merged(self) -> _Hour:
+        """All hours of the window, the current hour merged into the cached rest."""
+        latest = self._current
+        if self._closed is None:
+            closed = self._closed = _Hour()
+            first = latest - len(self._hours)
+            for bucket in self._hours:
+                if first < bucket.hour < latest:
+                    closed.merge(bucket)
+        total = _Hour()
+        total.merge(self._closed)
+        total.merge(self._hours[latest % len(self._hours)])
+        return total
+
+    def values(self) -> tuple[float | None, float | None, float | None]:
+        """Standard deviation (°C), brood zone time (%) and brood confidence (%)."""
+        total = self._merged()
+        std = math.sqrt(total.m2 / (total.count - 1)) if total.count > 1 else None
+        if not total.seconds:
+            return std, None, None
+        zone = total.zone_seconds / total.seconds
+        if std is None:
+            return std, 100 * zone, None
+        # Stable and in the zone for long enough; low while the window is still filling
+        stability = max(0.0, 1 - std / BROOD_STD_LIMIT_C)
+        coverage = min(1.0, total.seconds / BROOD_MIN_COVERAGE)
+        return std, 100 * zone, 100 * zone * stability * coverage
+
+
+class BroodStabilityStage(Stage):
+    """Adds brood stability values for every device reporting a temperature.
+
+    Offloaded to the worker pool: the values change slowly, so they can go out with the
+    next entity update, and re-merging the window every hour stays off the event loop.
+    """
+
+    name = "brood_stability"
+    offload = True
+
+    def __init__(self) -> None:
+        """Initialize the stage without hives."""
+        self._hives: dict[str, BroodStability] = {}
+
+    def forget(self, address: str) -> None:
+        """Drop the statistics of ``address``."""
+        self._hives.pop(address, None)
+
+    def snapshot(self, address: str) -> bytes | None:
+        """Snapshot payload of the statistics of ``address``."""
+        if (hive := self._hives.get(address)) is None:
+            return None
+        return hive.to_bytes()
+
+    def restore(self, address: str, data: bytes) -> None:
+        """Restore the statistics of ``address`` from a snapshot payload."""
+        hive = BroodStability()
+        hive.restore(data)
+        self._hives[address] = hive
+
+    def process(self, parsed: ManufacturerData, timestamp: float) -> DerivedValues | None:
+        """Update the hive's statistics with the temperature measured at ``timestamp``."""
+        temperature = parsed.temperature_centi_c
+        if temperature is None:
+            return None
+        if (hive := self._hives.get(parsed.address)) is None:
+            hive = self._hives[parsed.address] = BroodStability()
+        hive.update(temperature, timestamp)
+
+        std, zone_time, confidence = hive.values()
+        return {
+            SENSOR_TEMP_STD: None if std is None else round(std, 3),
+            SENSOR_BROOD_ZONE_TIME: None if zone_time is None else round(zone_time, 1),
+            SENSOR_BROOD_CONFIDENCE: None if confidence is None else round(confidence),
+        }
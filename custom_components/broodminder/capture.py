@@ -0,0 +1,469 @@
+"""Offline decoding of BroodMinder advertisement captures.
+
+Nothing in this module depends on Home Assistant, so captures can be validated on any
+machine with a plain Python interpreter (see ``scripts/broodminder_cli.py``).
+
+Captures are processed as a generator pipeline::
+
+    iter_frames(path) -> decode_frames(frames) -> summarise(decoded) / write_jsonl / write_csv
+
+Every stage consumes one frame at a time, so memory use does not depend on file size.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+from pathlib import Path
+import re
+from typing import IO, Any
+
+from .ble_parser import VALUE_FIELDS, ManufacturerData, parse_manufacturer_data
+from .const import ID_TO_MODEL, MANUFACTURER_ID
+
+FORMAT_AUTO = "auto"
+FORMAT_HEX = "hex"
+FORMAT_JSONL = "jsonl"
+FORMAT_BTMON = "btmon"
+FORMATS = (FORMAT_AUTO, FORMAT_HEX, FORMAT_JSONL, FORMAT_BTMON)
+
+UNKNOWN_ADDRESS = "00:00:00:00:00:00"
+
+# Some capture tools keep the company ID in front of the payload (little-endian).
+_COMPANY_PREFIX = MANUFACTURER_ID.to_bytes(2, "little")
+
+_MAC_RE = re.compile(r"^[0-9A-Fa-f]{2}(:[0-9A-Fa-f]{2}){5}$")
+_HEX_RE = re.compile(r"^(0x)?[0-9A-Fa-f]+$")
+
+# btmon text output, e.g.
+#   > HCI Event: LE Meta Event (0x3e) plen 43            #12 [hci0] 12.345678
+#           Address: 06:09:16:12:34:56 (OUI 06-09-16)
+#           Company: IF, LLC (653)
+#             Data: 2a0201...
+#           RSSI: -70 dBm (0xba)
+_BTMON_EVENT_RE = re.compile(r"^[<>@=] .*?(\d+\.\d+)\s*$")
+_BTMON_ADDRESS_RE = re.compile(r"^\s+(?:LE )?Address: ([0-9A-Fa-f:]{17})")
+_BTMON_COMPANY_RE = re.compile(r"^\s+Company: .*\((\d+)\)\s*$")
+_BTMON_DATA_RE = re.compile(r"^\s+Data: ([0-9A-Fa-f]+)\s*$")
+_BTMON_RSSI_RE = re.compile(r"^\s+RSSI: (-?\d+) dBm")
+
+# Numeric ManufacturerData fields aggregated into per-device summaries.
+SUMMARY_FIELDS = (
+    "temperature_c",
+    "temperature_rt_c",
+    "humidity_percent",
+    "battery_percent",
+    "weight_l_kg",
+    "weight_r_kg",
+    "weight_l2_kg",
+    "weight_r2_kg",
+    "weight_realtime_total_kg",
+    "bee_count_in",
+    "bee_count_out",
+    "bee_traffic",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CaptureFrame:
+    """A single BroodMinder manufacturer payload read from a capture file."""
+
+    address: str
+    payload: bytes | memoryview  # company ID removed
+    timestamp: float | None = None
+    rssi: int | None = None
+
+
+@dataclass(slots=True)
+class FieldStats:
+    """Running count/min/max/last of one numeric field."""
+
+    count: int = 0
+    minimum: float | None = None
+    maximum: float | None = None
+    last: float | None = None
+
+    def add(self, value: float) -> None:
+        """Account for one value."""
+        self.count += 1
+        self.last = value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other: FieldStats) -> None:
+        """Fold the statistics of ``other`` into this one."""
+        if not other.count:
+            return
+        self.count += other.count
+        self.last = other.last
+        if self.minimum is None or (other.minimum is not None and other.minimum < self.minimum):
+            self.minimum = other.minimum
+        if self.maximum is None or (other.maximum is not None and other.maximum > self.maximum):
+            self.maximum = other.maximum
+
+
+@dataclass(slots=True)
+class DeviceSummary:
+    """Constant-size summary of all frames seen from one device."""
+
+    address: str
+    model: int | None = None
+    firmware: str | None = None
+    frames: int = 0
+    decoded: int = 0
+    first_seen: float | None = None
+    last_seen: float | None = None
+    swarm_state_last: int | None = None
+    rssi: FieldStats = field(default_factory=FieldStats)
+    stats: dict[str, FieldStats] = field(default_factory=dict)
+
+    @property
+    def model_name(self) -> str:
+        """Human readable model name."""
+        return ID_TO_MODEL.get(self.model, "Unknown") if self.model is not None else "Unknown"
+
+    def add(self, frame: CaptureFrame, parsed: ManufacturerData | None) -> None:
+        """Account for one frame and its decoded values (if any)."""
+        self.frames += 1
+        if frame.timestamp is not None:
+            if self.first_seen is None or frame.timestamp < self.first_seen:
+                self.first_seen = frame.timestamp
+            if self.last_seen is None or frame.timestamp > self.last_seen:
+                self.last_seen = frame.timestamp
+        if frame.rssi is not None:
+            self.rssi.add(frame.rssi)
+        if parsed is None:
+            return
+
+        self.decoded += 1
+        self.model = parsed.model
+        self.firmware = parsed.firmware
+        if parsed.swarm_state_numeric is not None:
+            self.swarm_state_last = parsed.swarm_state_numeric
+        for name in SUMMARY_FIELDS:
+            value = getattr(parsed, name)
+            if value is not None:
+                stats = self.stats.get(name)
+                if stats is None:
+                    stats = self.stats[name] = FieldStats()
+                stats.add(value)
+
+    def merge(self, other: DeviceSummary) -> None:
+        """Fold the summary of the same device from another file into this one."""
+        self.frames += other.frames
+        self.decoded += other.decoded
+        if other.model is not None:
+            self.model = other.model
+            self.firmware = other.firmware
+        if other.swarm_state_last is not None:
+            self.swarm_state_last = other.swarm_state_last
+        if other.first_seen is not None and (
+            self.first_seen is None or other.first_seen < self.first_seen
+        ):
+            self.first_seen = other.first_seen
+        if other.last_seen is not None and (
+            self.last_seen is None or other.last_seen > self.last_seen
+        ):
+            self.last_seen = other.last_seen
+        self.rssi.merge(other.rssi)
+        for name, stats in other.stats.items():
+            self.stats.setdefault(name, FieldStats()).merge(stats)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serialisable representation."""
+        return {
+            "address": self.address,
+            "model": self.model,
+            "model_name": self.model_name,
+            "firmware": self.firmware,
+            "frames": self.frames,
+            "decoded": self.decoded,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "swarm_state_last": self.swarm_state_last,
+            "rssi": _stats_dict(self.rssi),
+            **{name: _stats_dict(stats) for name, stats in self.stats.items()},
+        }
+
+
+def _stats_dict(stats: FieldStats) -> dict[str, Any]:
+    return {
+        "count": stats.count,
+        "min": stats.minimum,
+        "max": stats.maximum,
+        "last": stats.last,
+    }
+
+
+def _strip_company_id(payload: bytes) -> bytes | memoryview:
+    # No BroodMinder model uses 0x8D as model byte, so the prefix is unambiguous.
+    # The decoders index into the view, so the payload is never copied.
+    if payload.startswith(_COMPANY_PREFIX):
+        return memoryview(payload)[len(_COMPANY_PREFIX) :]
+    return payload
+
+
+def _parse_hex(text: str) -> bytes | None:
+    text = text.strip().replace(" ", "")
+    text = text.removeprefix("0x")
+    if not text or len(text) % 2:
+        return None
+    try:
+        return bytes.fromhex(text)
+    except ValueError:
+        return None
+
+
+def detect_format(path: Path) -> str:
+    """Guess the capture format from the file name and its first line."""
+    if path.suffix in (".jsonl", ".json", ".ndjson"):
+        return FORMAT_JSONL
+    with path.open(encoding="utf-8", errors="replace") as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped.startswith("{"):
+                return FORMAT_JSONL
+            if stripped.startswith(("Bluetooth monitor", "= ", "> HCI", "< HCI", "@ ")):
+                return FORMAT_BTMON
+            return FORMAT_HEX
+    return FORMAT_HEX
+
+
+def iter_hex_frames(lines: Iterable[str]) -> Iterator[CaptureFrame]:
+    """Yield frames from lines of ``[timestamp] [address] <hex payload>``."""
+    for line in lines:
+        tokens = line.split()
+        if not tokens or tokens[0].startswith("#"):
+            continue
+        address = UNKNOWN_ADDRESS
+        timestamp = None
+        for token in tokens[:-1]:
+            if _MAC_RE.match(token):
+                address = token.upper()
+            else:
+                try:
+                    timestamp = float(token)
+                except ValueError:
+                    continue
+        if not _HEX_RE.match(tokens[-1]):
+            continue
+        payload = _parse_hex(tokens[-1])
+        if payload:
+            yield CaptureFrame(address, _strip_company_id(payload), timestamp)
+
+
+def _jsonl_payload(record: dict[str, Any]) -> bytes | None:
+    mfg = record.get("manufacturer_data")
+    if isinstance(mfg, dict):
+        # Home Assistant diagnostics style: {"653": "<hex>"}
+        raw = mfg.get(str(MANUFACTURER_ID), mfg.get(MANUFACTURER_ID))
+        return _parse_hex(raw) if isinstance(raw, str) else None
+    raw = record.get("payload", record.get("data"))
+    if isinstance(raw, str):
+        payload = _parse_hex(raw)
+        return _strip_company_id(payload) if payload else None
+    return None
+
+
+def iter_jsonl_frames(lines: Iterable[str]) -> Iterator[CaptureFrame]:
+    """Yield frames from JSON lines with ``address``, ``payload``/``manufacturer_data``,
+    and optionally ``time``/``timestamp`` and ``rssi``.
+    """  # noqa: D205
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        try:
+            record = json.loads(stripped)
+        except ValueError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        payload = _jsonl_payload(record)
+        if not payload:
+            continue
+        timestamp = record.get("timestamp", record.get("time"))
+        rssi = record.get("rssi")
+        yield CaptureFrame(
+            str(record.get("address", UNKNOWN_ADDRESS)).upper(),
+            payload,
+            float(timestamp) if isinstance(timestamp, (int, float)) else None,
+            int(rssi) if isinstance(rssi, (int, float)) else None,
+        )
+
+
+def iter_btmon_frames(lines: Iterable[str]) -> Iterator[CaptureFrame]:
+    """Yield BroodMinder frames from ``btmon`` text output."""
+    timestamp: float | None = None
+    address: str | None = None
+    payload: bytes | None = None
+    ours = False
+
+    for line in lines:
+        if match := _BTMON_EVENT_RE.match(line):
+            if address and payload:
+                yield CaptureFrame(address, payload, timestamp)
+            timestamp = float(match.group(1))
+            address = payload = None
+            ours = False
+        elif match := _BTMON_ADDRESS_RE.match(line):
+            if address and payload:
+                # Next report within the same event
+                yield CaptureFrame(address, payload, timestamp)
+                payload = None
+            address = match.group(1).upper()
+            ours = False
+        elif match := _BTMON_COMPANY_RE.match(line):
+            ours = int(match.group(1)) == MANUFACTURER_ID
+        elif ours and (match := _BTMON_DATA_RE.match(line)):
+            payload = _parse_hex(match.group(1))
+            ours = False
+        elif address and payload and (match := _BTMON_RSSI_RE.match(line)):
+            yield CaptureFrame(address, payload, timestamp, int(match.group(1)))
+            payload = None
+
+    if address and payload:
+        yield CaptureFrame(address, payload, timestamp)
+
+
+READERS = {
+    FORMAT_HEX: iter_hex_frames,
+    FORMAT_JSONL: iter_jsonl_frames,
+    FORMAT_BTMON: iter_btmon_frames,
+}
+
+
+def iter_frames(path: Path, fmt: str = FORMAT_AUTO) -> Iterator[CaptureFrame]:
+    """Stream all BroodMinder frames from a capture file."""
+    if fmt == FORMAT_AUTO:
+        fmt = detect_format(path)
+    reader = READERS[fmt]
+    with path.open(encoding="utf-8", errors="replace") as f:
+        yield from reader(f)
+
+
+def decode_frames(
+    frames: Iterable[CaptureFrame],
+) -> Iterator[tuple[CaptureFrame, ManufacturerData | None]]:
+    """Decode every frame; frames the parser rejects are passed on with ``None``."""
+    for frame in frames:
+        yield frame, parse_manufacturer_data(frame.address, {MANUFACTURER_ID: frame.payload})
+
+
+def summarise(
+    decoded: Iterable[tuple[CaptureFrame, ManufacturerData | None]],
+) -> dict[str, DeviceSummary]:
+    """Aggregate decoded frames into one summary per device address."""
+    summaries: dict[str, DeviceSummary] = {}
+    for frame, parsed in decoded:
+        summary = summaries.get(frame.address)
+        if summary is None:
+            summary = summaries[frame.address] = DeviceSummary(frame.address)
+        summary.add(frame, parsed)
+    return summaries
+
+
+def summarise_file(path: Path, fmt: str = FORMAT_AUTO) -> dict[str, DeviceSummary]:
+    """Summarise a single capture file (process pool entry point)."""
+    return summarise(decode_frames(iter_frames(path, fmt)))
+
+
+def summarise_files(
+    paths: Iterable[Path], fmt: str = FORMAT_AUTO, jobs: int = 1
+) -> dict[str, DeviceSummary]:
+    """Summarise several capture files, optionally one process per file."""
+    paths = list(paths)
+    merged: dict[str, DeviceSummary] = {}
+
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+            results: Iterable[dict[str, DeviceSummary]] = list(
+                pool.map(summarise_file, paths, [fmt] * len(paths))
+            )
+    else:
+        results = (summarise_file(path, fmt) for path in paths)
+
+    for result in results:
+        for address, summary in result.items():
+            if address in merged:
+                merged[address].merge(summary)
+            else:
+                merged[address] = summary
+    return merged
+
+
+RECORD_FIELDS = (
+    "timestamp",
+    "rssi",
+    "address",
+    "model",
+    "firmware",
+    "device_name",
+    *VALUE_FIELDS,
+)
+
+# Fixed-point export: raw integers instead of converted floats
+_FIXED_POINT_NAMES = {
+    "temperature_c": "temperature_centi_c",
+    "temperature_rt_c": "temperature_rt_centi_c",
+    "weight_l_kg": "weight_l_dag",
+    "weight_r_kg": "weight_r_dag",
+    "weight_l2_kg": "weight_l2_dag",
+    "weight_r2_kg": "weight_r2_dag",
+    "weight_realtime_total_kg": "weight_realtime_total_dag",
+}
+FIXED_POINT_RECORD_FIELDS = tuple(_FIXED_POINT_NAMES.get(name, name) for name in RECORD_FIELDS)
+
+
+def record_to_dict(
+    frame: CaptureFrame, parsed: ManufacturerData, fixed_point: bool = False
+) -> dict[str, Any]:
+    """Flatten a decoded frame into JSON/CSV friendly values."""
+    record: dict[str, Any] = {"timestamp": frame.timestamp, "rssi": frame.rssi}
+    names = FIXED_POINT_RECORD_FIELDS if fixed_point else RECORD_FIELDS
+    for name in names[2:]:
+        value = getattr(parsed, name)
+        record[name] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+def write_jsonl(
+    decoded: Iterable[tuple[CaptureFrame, ManufacturerData | None]],
+    out: IO[str],
+    fixed_point: bool = False,
+) -> int:
+    """Write one JSON object per decoded frame, returns the number written."""
+    written = 0
+    for frame, parsed in decoded:
+        if parsed is None:
+            continue
+        out.write(json.dumps(record_to_dict(frame, parsed, fixed_point)))
+        out.write("\n")
+        written += 1
+    return written
+
+
+def write_csv(
+    decoded: Iterable[tuple[CaptureFrame, ManufacturerData | None]],
+    out: IO[str],
+    fixed_point: bool = False,
+) -> int:
+    """Write one CSV row per decoded frame, returns the number written."""
+    fieldnames = FIXED_POINT_RECORD_FIELDS if fixed_point else RECORD_FIELDS
+    writer = csv.DictWriter(out, fieldnames=fieldnames)
+    writer.writeheader()
+    written = 0
+    for frame, parsed in decoded:
+        if parsed is None:
+            continue
+        writer.writerow(record_to_dict(frame, parsed, fixed_point))
+        written += 1
+    return written
@@ -1,10 +1,51 @@
+"""Config and options flow for BroodMinder."""
+
 from __future__ import annotations
 
+from typing import Any
+
 from homeassistant import config_entries
 from homeassistant.components import bluetooth
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
 
-from .const import DOMAIN, MANUFACTURER_ID
+from .ble_parser import ENTITY_FIELDS, model_entity_keys
+from .const import (
+    CONF_APPLY_TO_MODEL,
+    CONF_FORWARD_URL,
+    CONF_PUBLISH_MAX_INTERVAL,
+    CONF_PUBLISH_MIN_INTERVAL,
+    CONF_RESAMPLE_INTERVAL,
+    CONF_RESAMPLE_METHOD,
+    CONF_SENSOR_GROUPS,
+    CONF_SENSORS,
+    CONF_SPIKE_FILTER,
+    CONF_STALE_AFTER,
+    CONF_UNITS,
+    DEFAULT_PUBLISH_MAX_INTERVAL,
+    DEFAULT_PUBLISH_MIN_INTERVAL,
+    DEFAULT_RESAMPLE_INTERVAL,
+    DEFAULT_RESAMPLE_METHOD,
+    DEFAULT_SENSOR_GROUPS,
+    DEFAULT_SPIKE_FILTER,
+    DEFAULT_STALE_AFTER,
+    DEFAULT_UNITS,
+    DOMAIN,
+    GROUP_BROOD,
+    GROUP_LATENCY,
+    GROUP_LOAD,
+    GROUP_RECEPTION,
+    MANUFACTURER_ID,
+    RESAMPLE_LAST,
+    RESAMPLE_MEAN,
+    UNITS_BOTH,
+    UNITS_IMPERIAL,
+    UNITS_METRIC,
+)
+from .coordinator import async_mqtt_connects_to
+from .forwarder import parse_target
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -26,3 +67,122 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             title=f"BroodMinder {discovery_info.address}",
             data={},  # address is unique_id
         )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        _config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlow:
+        """Return the options flow."""
+        return OptionsFlow()
+
+
+class OptionsFlow(config_entries.OptionsFlow):
+    """Per-device options."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the options."""
+        model = self._model()
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            if url := user_input.get(CONF_FORWARD_URL, "").strip():
+                try:
+                    target = parse_target(url)
+                except ValueError:
+                    errors[CONF_FORWARD_URL] = "invalid_forward_url"
+                else:
+                    if target.mqtt and not async_mqtt_connects_to(self.hass, target):
+                        errors[CONF_FORWARD_URL] = (
+                            "mqtt_other_broker" if target.host else "mqtt_not_set_up"
+                        )
+            if user_input.get(CONF_RESAMPLE_INTERVAL) and user_input.get(
+                CONF_PUBLISH_MAX_INTERVAL
+            ):
+                # The grid already sets the update rate
+                errors[CONF_RESAMPLE_INTERVAL] = "resample_with_publish_interval"
+            if not errors:
+                data = dict(user_input)
+                if data.pop(CONF_APPLY_TO_MODEL, False) and model is not None:
+                    self._apply_sensors_to_model(model, data[CONF_SENSORS])
+                return self.async_create_entry(data=data)
+
+        options = user_input or self.config_entry.options
+        # Only offer what this model can report; all keys until it has been heard
+        available = model_entity_keys(model) if model is not None else list(ENTITY_FIELDS)
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_STALE_AFTER,
+                    default=options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                vol.Required(
+                    CONF_SENSORS,
+                    default=[
+                        key for key in options.get(CONF_SENSORS, available) if key in available
+                    ],
+                ): cv.multi_select(
+                    {key: key.replace("_", " ").capitalize() for key in available}
+                ),
+                vol.Required(CONF_APPLY_TO_MODEL, default=False): bool,
+                vol.Required(
+                    CONF_SENSOR_GROUPS,
+                    default=options.get(CONF_SENSOR_GROUPS, DEFAULT_SENSOR_GROUPS),
+                ): cv.multi_select(
+                    {
+                        GROUP_RECEPTION: "Last seen, advertisement rate, signal strength",
+                        GROUP_LATENCY: "Latency P50, P95, P99",
+                        GROUP_LOAD: "Frames shed",
+                        GROUP_BROOD: "Temperature deviation, brood zone time, brood confidence",
+                    }
+                ),
+                vol.Required(CONF_UNITS, default=options.get(CONF_UNITS, DEFAULT_UNITS)): vol.In(
+                    {
+                        UNITS_METRIC: "°C, kg",
+                        UNITS_IMPERIAL: "°F, lb",
+                        UNITS_BOTH: "°C, kg and °F, lb",
+                    }
+                ),
+                vol.Required(
+                    CONF_SPIKE_FILTER,
+                    default=options.get(CONF_SPIKE_FILTER, DEFAULT_SPIKE_FILTER),
+                ): bool,
+                vol.Required(
+                    CONF_PUBLISH_MIN_INTERVAL,
+                    default=options.get(CONF_PUBLISH_MIN_INTERVAL, DEFAULT_PUBLISH_MIN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Required(
+                    CONF_PUBLISH_MAX_INTERVAL,
+                    default=options.get(CONF_PUBLISH_MAX_INTERVAL, DEFAULT_PUBLISH_MAX_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Required(
+                    CONF_RESAMPLE_INTERVAL,
+                    default=options.get(CONF_RESAMPLE_INTERVAL, DEFAULT_RESAMPLE_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=60)),
+                vol.Required(
+                    CONF_RESAMPLE_METHOD,
+                    default=options.get(CONF_RESAMPLE_METHOD, DEFAULT_RESAMPLE_METHOD),
+                ): vol.In({RESAMPLE_MEAN: "Time-weighted mean", RESAMPLE_LAST: "Last value"}),
+                vol.Optional(
+                    CONF_FORWARD_URL,
+                    description={"suggested_value": options.get(CONF_FORWARD_URL)},
+                ): str,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
+
+    def _model(self) -> int | None:
+        """Model of this device, known once it has been heard."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        return None if coordinator is None else coordinator.model
+
+    def _apply_sensors_to_model(self, model: int, sensors: list[str]) -> None:
+        """Copy the sensor selection to the other devices of the same model."""
+        coordinators = self.hass.data.get(DOMAIN, {})
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            if entry.entry_id == self.config_entry.entry_id:
+                continue
+            coordinator = coordinators.get(entry.entry_id)
+            if coordinator is not None and coordinator.model == model:
+                self.hass.config_entries.async_update_entry(
+                    entry, options={**entry.options, CONF_SENSORS: sensors}
+                )
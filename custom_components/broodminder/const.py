@@ -1,13 +1,12 @@
 """Constants for the BroodMinder integration."""
 
-from typing import Iterable
-
 DOMAIN = "broodminder"
 
 MANUFACTURER_ID = 0x028D  # IF, LLC (BroodMinder)
 
 # BroodMinder payload indices relative to manufacturer payload (company ID removed):
 # (Doc bytes 10..30 → indices 0..20 here)
+# Which model carries which field is declared in layout.py.
 IDX_MODEL = 0
 IDX_VER_MINOR = 1
 IDX_VER_MAJOR = 2
@@ -16,7 +15,7 @@ IDX_VER_MAJOR = 2
 IDX_RT_TEMP1_L = 3
 # Battery %
 IDX_BATTERY = 4  # byte 14 overall
-# Elapsed (little-endian)
+# Elapsed, little-endian
 IDX_ELAPSED_L = 5  # byte 15 overall
 IDX_ELAPSED_H = 6  # byte 16 overall
 # Primary temperature (centi°C + 5000 for most models; SHT-like for 41/42/43)
@@ -39,6 +38,21 @@ IDX_WR2_SM3 = 18  # byte 28 (MSB)
 # Realtime total weight (low) OR swarm-state (model-dependent), plus high byte
 IDX_RT_TOTAL_L_OR_SWARM_STATE = 19  # byte 29 overall
 IDX_RT_TOTAL_H = 20  # byte 30 overall
+# BeeDar (model 63) carries bee counters in the weight channel positions (16-bit each,
+# 0xFFFF = not available) and a traffic index in the realtime total position.
+# Older BeeDar frames stop after the humidity byte, so each counter is length-guarded.
+IDX_BEEDAR_IN_L = 10
+IDX_BEEDAR_IN_H = 11
+IDX_BEEDAR_OUT_L = 12
+IDX_BEEDAR_OUT_H = 13
+IDX_BEEDAR_TRAFFIC_L = 19
+IDX_BEEDAR_TRAFFIC_H = 20
+
+# Raw payload values meaning "not available", and the offsets of the raw values
+INVALID_U16 = 0xFFFF  # temperatures and counters
+INVALID_WEIGHTS = (0x7FFF, 0x8005, 0xFFFF)  # weight channels (docs/examples)
+TEMPERATURE_OFFSET_CENTI_C = 5000
+WEIGHT_OFFSET_DAG = 32767
 
 # Model descriptions
 MODEL_T = {41, 47}
@@ -83,9 +97,178 @@ SENSOR_WEIGHT_L2 = "weight_left_2"
 SENSOR_WEIGHT_R2 = "weight_right_2"
 SENSOR_WEIGHT_REALTIME = "weight_realtime_total"
 SENSOR_SWARM_STATE = "swarm_state"
-SENSOR_SWARM_TIME = "swarm_time"  # may be time since boot if not synced
+SENSOR_SWARM_TIME = "swarm_time"
+SENSOR_SWARM_TIME_SINCE_BOOT = "swarm_time_since_boot"  # clock not synced
+SENSOR_BEE_COUNT_IN = "bee_count_in"
+SENSOR_BEE_COUNT_OUT = "bee_count_out"
+SENSOR_BEE_TRAFFIC = "bee_traffic"
+
+# Imperial twins of the temperature and weight entity keys (see CONF_UNITS)
+SENSOR_TEMP_F = "temperature_f"
+SENSOR_TEMP_RT_F = "temperature_realtime_f"
+SENSOR_WEIGHT_L_LB = "weight_left_lb"
+SENSOR_WEIGHT_R_LB = "weight_right_lb"
+SENSOR_WEIGHT_L2_LB = "weight_left_2_lb"
+SENSOR_WEIGHT_R2_LB = "weight_right_2_lb"
+SENSOR_WEIGHT_REALTIME_LB = "weight_realtime_total_lb"
+
+# Reception health entity keys
+SENSOR_LAST_SEEN = "last_seen"
+SENSOR_ADV_RATE = "advertisement_rate"
+SENSOR_RSSI = "rssi"
+SENSOR_LATENCY_P50 = "latency_p50"
+SENSOR_LATENCY_P95 = "latency_p95"
+SENSOR_LATENCY_P99 = "latency_p99"
+SENSOR_FRAMES_SHED = "frames_shed"
+
+# Spike filter entity keys (filtered channels use "<key>_filtered")
+SENSOR_SPIKES_REJECTED = "spikes_rejected"
+
+# Brood stability entity keys
+SENSOR_TEMP_STD = "temperature_std"
+SENSOR_BROOD_ZONE_TIME = "brood_zone_time"
+SENSOR_BROOD_CONFIDENCE = "brood_confidence"
+
+# SwarmMinder states, see README.md
+SWARM_STATES: dict[int, str] = {
+    0: "Stopped",
+    1: "Stopped - initialization complete",
+    2: "Stopped - by stop request",
+    20: "Started - checking for swarm event",
+    21: "Started - buffering temperature data",
+    22: "Started - temperature < hive base temperature",
+    25: "Started - buffered hive temperature < hive base temperature",
+    29: "Swarm event detected",
+    40: "Swarm event detected - start logging",
+    41: "Swarm event detected - still logging swarm data",
+    60: "Swarm event logging complete - start waiting - swarm detection",
+    61: "Swarm event logging complete - still waiting",
+}
+SWARM_DETECTED_STATES = {29, 40, 41}
 
 SENSOR_PERCENTAGE_MINIMUM = 0
 SENSOR_PERCENTAGE_MAXIMUM = 100
 
 MANUFACTURER = "BroodMinder"
+
+# Devices whose name/firmware strings are cached by the parser
+METADATA_CACHE_SIZE = 1024
+
+# Swarm times before this (2015-01-01 UTC) are seconds since boot, the device's clock
+# was never synced
+SWARM_TIME_SYNCED_AFTER = 1_420_070_400
+
+# Options
+CONF_STALE_AFTER = "stale_after"  # minutes without advertisement before unavailable
+DEFAULT_STALE_AFTER = 15
+CONF_UNITS = "units"  # temperature and weight entities in metric, imperial or both units
+UNITS_METRIC = "metric"
+UNITS_IMPERIAL = "imperial"
+UNITS_BOTH = "both"
+DEFAULT_UNITS = UNITS_METRIC
+CONF_SENSORS = "sensors"  # entity keys to create, default all the model provides
+CONF_APPLY_TO_MODEL = "apply_to_model"  # options flow only: copy sensors to same-model devices
+CONF_SENSOR_GROUPS = "sensor_groups"  # diagnostic and derived sensor groups to create
+GROUP_RECEPTION = "reception"
+GROUP_LATENCY = "latency"
+GROUP_LOAD = "load"
+GROUP_BROOD = "brood"
+# Group -> entity keys; the spike filter entities follow CONF_SPIKE_FILTER instead
+SENSOR_GROUPS: dict[str, tuple[str, ...]] = {
+    GROUP_RECEPTION: (SENSOR_LAST_SEEN, SENSOR_ADV_RATE, SENSOR_RSSI),
+    GROUP_LATENCY: (SENSOR_LATENCY_P50, SENSOR_LATENCY_P95, SENSOR_LATENCY_P99),
+    GROUP_LOAD: (SENSOR_FRAMES_SHED,),
+    GROUP_BROOD: (SENSOR_TEMP_STD, SENSOR_BROOD_ZONE_TIME, SENSOR_BROOD_CONFIDENCE),
+}
+DEFAULT_SENSOR_GROUPS = list(SENSOR_GROUPS)
+CONF_SPIKE_FILTER = "spike_filter"  # add filtered weight/temperature entities
+DEFAULT_SPIKE_FILTER = False
+CONF_PUBLISH_MIN_INTERVAL = "publish_min_interval"  # seconds, see scheduler.py
+DEFAULT_PUBLISH_MIN_INTERVAL = 0
+CONF_PUBLISH_MAX_INTERVAL = "publish_max_interval"  # seconds, 0 publishes every advertisement
+DEFAULT_PUBLISH_MAX_INTERVAL = 0
+CONF_FORWARD_URL = "forward_url"  # tcp:// or mqtt:// URL, see forwarder.py
+CONF_RESAMPLE_INTERVAL = "resample_interval"  # minutes, 0 processes every advertisement
+DEFAULT_RESAMPLE_INTERVAL = 0
+CONF_RESAMPLE_METHOD = "resample_method"  # see resample.py
+RESAMPLE_LAST = "last"
+RESAMPLE_MEAN = "mean"
+DEFAULT_RESAMPLE_METHOD = RESAMPLE_MEAN
+
+# Reception health
+RECEPTION_EWMA_ALPHA = 0.2  # smoothing of advertisement interval and RSSI
+STALENESS_TICK_SECONDS = 30  # one shared timer for all devices
+
+# Latency tracing (see tracing.py)
+TRACE_SIZE = 256  # traces kept per device
+TRACE_PERCENTILE_REFRESH = 16  # new traces before the latency percentiles are sorted again
+
+# Adaptive publish rate (see scheduler.py)
+PUBLISH_VELOCITY_ALPHA = 0.3  # smoothing of the rate of change per channel
+
+# Load shedding (see shedding.py)
+SHED_PROBE_INTERVAL = 1.0  # seconds between loop lag probes
+SHED_LOOP_LAG_LIMIT = 0.1  # seconds
+SHED_BACKLOG_LIMIT = 0.5  # seconds
+SHED_ALPHA = 0.3  # smoothing of the loop lag and backlog
+SHED_HOLD_SECONDS = 30  # calm time before shedding stops
+SHED_FLUSH_INTERVAL = 30  # seconds, the newest frame of each device is processed this often
+
+# Post-processing pipeline (see pipeline.py)
+PIPELINE_MAX_WORKERS = 2
+PIPELINE_MAX_PENDING = 256  # devices waiting for a worker; further devices are dropped
+
+# Spike filter (see filters.py)
+SPIKE_FILTER_WINDOW = 7  # samples per channel
+SPIKE_FILTER_SIGMAS = 3.0  # Hampel threshold in scaled MADs
+
+# Brood nest temperature zone, centi-°C
+BROOD_ZONE_MIN_CENTI_C = 3300
+BROOD_ZONE_MAX_CENTI_C = 3600
+
+# Brood stability (see brood.py)
+BROOD_WINDOW_HOURS = 24
+BROOD_MAX_GAP = 900  # seconds, longer silences only count this long
+BROOD_STD_LIMIT_C = 1.0  # standard deviation at which the confidence drops to zero
+BROOD_MIN_COVERAGE = 6 * 3600  # seconds observed before the confidence can be full
+
+# Events fired on the Home Assistant bus (see events.py)
+EVENT_SWARM = f"{DOMAIN}_swarm"  # entered a swarm-detected state
+EVENT_BATTERY_LOW = f"{DOMAIN}_battery_low"
+EVENT_WEIGHT_DROP = f"{DOMAIN}_weight_drop"
+BATTERY_LOW_PERCENT = 20
+BATTERY_LOW_HYSTERESIS = 10  # percent above the threshold before it can fire again
+WEIGHT_DROP_DAG = 100  # decagrams, i.e. 1 kg
+WEIGHT_DROP_WINDOW = 1800  # seconds
+
+# In-memory history (see history.py)
+HISTORY_HOURS = 24
+HISTORY_MIN_INTERVAL = 60  # seconds, at most one row per device per interval
+SERVICE_GET_HISTORY = "get_history"
+
+# Line protocol forwarder (see forwarder.py)
+FORWARD_BATCH_SIZE = 500  # lines per write
+FORWARD_FLUSH_INTERVAL = 10  # seconds
+FORWARD_BUFFER_SIZE = 10000  # lines kept while the target is unreachable
+FORWARD_MAX_BACKOFF = 300  # seconds between reconnect attempts
+MQTT_DOMAIN = "mqtt"  # publishes MQTT targets, an after dependency only
+
+# State snapshots (see snapshot.py)
+SNAPSHOT_FILE = f"{DOMAIN}.snapshot"  # in the .storage directory
+SNAPSHOT_INTERVAL = 900  # seconds
+SNAPSHOT_MAX_AGE = 7 * 86400  # seconds the state of a hive not set up again is kept
+
+# Proxy coverage (see coverage.py)
+COVERAGE_SLOT_SECONDS = 300  # a hive is covered in a slot with at least one advertisement
+COVERAGE_SLOTS = 288  # 24 hours
+COVERAGE_MIN_SLOTS = 12  # slots observed before coverage is judged
+COVERAGE_POOR_RATIO = 0.8  # covered share of the slots below which a repair issue is raised
+COVERAGE_RECOVERED_RATIO = 0.9  # and above which it is cleared again
+COVERAGE_RSSI_GOOD = -80  # dBm, sources at least this strong can be recommended
+COVERAGE_RSSI_POOR = -90  # dBm, a flagged hive stays flagged while weaker
+COVERAGE_SOURCE_TIMEOUT = 3600  # seconds, sources not heard since are not recommended
+COVERAGE_CHECK_INTERVAL = 300  # seconds between repair issue updates
+ISSUE_POOR_COVERAGE = "poor_coverage"
+
+DATA_RUNTIME = f"{DOMAIN}_runtime"  # hass.data key of the SharedRuntime
+DATA_SNAPSHOT = f"{DOMAIN}_snapshot"  # per-hive state kept between two runtimes
@@ -0,0 +1,676 @@
+"""Coordinator for BroodMinder advertisements."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from functools import partial
+import logging
+from pathlib import Path
+import struct
+import time
+from typing import Any
+
+from homeassistant.components.bluetooth import (
+    BluetoothChange,
+    BluetoothScanningMode,
+    BluetoothServiceInfoBleak,
+)
+from homeassistant.components.bluetooth.passive_update_processor import (
+    PassiveBluetoothProcessorCoordinator,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    CONF_PORT,
+    EVENT_HOMEASSISTANT_FINAL_WRITE,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .ble_parser import ManufacturerData, entity_fields, parse_manufacturer_data
+from .brood import BroodStabilityStage
+from .const import (
+    CONF_FORWARD_URL,
+    CONF_PUBLISH_MAX_INTERVAL,
+    CONF_PUBLISH_MIN_INTERVAL,
+    CONF_RESAMPLE_INTERVAL,
+    CONF_RESAMPLE_METHOD,
+    CONF_SENSOR_GROUPS,
+    CONF_SENSORS,
+    CONF_SPIKE_FILTER,
+    CONF_STALE_AFTER,
+    CONF_UNITS,
+    COVERAGE_CHECK_INTERVAL,
+    DATA_RUNTIME,
+    DATA_SNAPSHOT,
+    DEFAULT_PUBLISH_MAX_INTERVAL,
+    DEFAULT_PUBLISH_MIN_INTERVAL,
+    DEFAULT_RESAMPLE_INTERVAL,
+    DEFAULT_RESAMPLE_METHOD,
+    DEFAULT_SENSOR_GROUPS,
+    DEFAULT_SPIKE_FILTER,
+    DEFAULT_STALE_AFTER,
+    DEFAULT_UNITS,
+    DOMAIN,
+    ISSUE_POOR_COVERAGE,
+    MANUFACTURER_ID,
+    MQTT_DOMAIN,
+    PIPELINE_MAX_PENDING,
+    PIPELINE_MAX_WORKERS,
+    SHED_FLUSH_INTERVAL,
+    SHED_PROBE_INTERVAL,
+    SNAPSHOT_FILE,
+    SNAPSHOT_INTERVAL,
+    SNAPSHOT_MAX_AGE,
+    STALENESS_TICK_SECONDS,
+)
+from .coverage import CoverageTracker
+from .events import EVENT_FIELDS, HiveEventDetector
+from .filters import SpikeFilterStage
+from .forwarder import MQTT_DEFAULT_PORT, Forwarder, ForwardTarget, parse_target
+from .health import ReceptionStats, StalenessTracker
+from .history import HISTORY_FIELDS, HistoryStore
+from .pipeline import Pipeline, ResultBatch
+from .resample import Resampler
+from .scheduler import PublishScheduler
+from .shedding import LoadMonitor
+from .snapshot import Sections, SnapshotError, load_snapshot, save_snapshot
+from .tracing import LatencyTracker
+
+_LOGGER = logging.getLogger(__name__)
+
+# Snapshot section with the wall time a hive's state was collected
+SECTION_COLLECTED = "collected"
+_COLLECTED = struct.Struct("<d")
+
+
+def _collected_at(sections: Sections) -> float:
+    """Wall time the state in ``sections`` was collected, 0 when unknown."""
+    data = sections.get(SECTION_COLLECTED)
+    if data is None or len(data) != _COLLECTED.size:
+        return 0.0
+    return _COLLECTED.unpack(data)[0]
+
+
+class BroodMinderCoordinator(PassiveBluetoothProcessorCoordinator[ManufacturerData | None]):
+    """Coordinator for a single BroodMinder device."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            address=entry.unique_id,
+            mode=BluetoothScanningMode.ACTIVE,
+            update_method=self._update_method,
+        )
+        self.title = entry.title
+        self.stale_after = entry.options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER) * 60
+        self.spike_filter = entry.options.get(CONF_SPIKE_FILTER, DEFAULT_SPIKE_FILTER)
+        self.units = entry.options.get(CONF_UNITS, DEFAULT_UNITS)
+        self.sensor_groups = frozenset(
+            entry.options.get(CONF_SENSOR_GROUPS, DEFAULT_SENSOR_GROUPS)
+        )
+        # Selected entity keys. Besides their fields only those of the events and the
+        # history (which cover the brood and spike filter stages) are decoded, and all
+        # fields when forwarding
+        self.sensors: frozenset[str] | None = None
+        self._fields: frozenset[str] | None = None
+        if (sensors := entry.options.get(CONF_SENSORS)) is not None:
+            self.sensors = frozenset(sensors)
+            if not entry.options.get(CONF_FORWARD_URL):
+                self._fields = entity_fields(sensors).union(EVENT_FIELDS, HISTORY_FIELDS)
+        self.forward_target: ForwardTarget | None = None
+        if url := entry.options.get(CONF_FORWARD_URL):
+            try:
+                self.forward_target = parse_target(url)
+            except ValueError as err:
+                _LOGGER.warning("Not forwarding %s, invalid URL %s: %s", self.address, url, err)
+        # Fixed time grid, None processes every advertisement
+        self.resampler: Resampler | None = None
+        if interval := entry.options.get(CONF_RESAMPLE_INTERVAL, DEFAULT_RESAMPLE_INTERVAL):
+            self.resampler = Resampler(
+                interval * 60, entry.options.get(CONF_RESAMPLE_METHOD, DEFAULT_RESAMPLE_METHOD)
+            )
+        # Adaptive publish rate, None publishes every advertisement (or grid point)
+        self.scheduler: PublishScheduler | None = None
+        # The options flow rejects both together; resampling wins for older options
+        max_interval = entry.options.get(CONF_PUBLISH_MAX_INTERVAL, DEFAULT_PUBLISH_MAX_INTERVAL)
+        if max_interval and self.resampler is None:
+            self.scheduler = PublishScheduler(
+                entry.options.get(CONF_PUBLISH_MIN_INTERVAL, DEFAULT_PUBLISH_MIN_INTERVAL),
+                max_interval,
+            )
+        self.publish = True  # whether the current advertisement is written to the entities
+        self.reception = ReceptionStats()
+        self.latency = LatencyTracker()
+        self.derived: dict[str, Any] = {}  # values from post-processing stages
+        self._events = HiveEventDetector()
+        self._runtime: SharedRuntime | None = None
+        self._forwarder: Forwarder | None = None
+        self._last_service_info: BluetoothServiceInfoBleak | None = None
+        self._last_parsed: ManufacturerData | None = None
+        self._grid_point: ManufacturerData | None = None  # newest, with resampling
+        # Load shedding: newest frame not processed yet, with its time and receipt time
+        self._deferred: tuple[ManufacturerData, float, float] | None = None
+        self._swarm_state: int | None = None
+        self.shed = 0  # frames replaced by a newer one before they were processed
+
+    def _update_method(self, service_info: BluetoothServiceInfoBleak) -> ManufacturerData | None:
+        """Parse incoming advertisements into our high-level ManufacturerData."""
+        started = time.monotonic()
+        self.latency.start(service_info.time, started)
+        now = time.time()
+        self.reception.add(service_info.time, now, service_info.rssi)
+        self._last_service_info = service_info
+        runtime = self._runtime
+        if runtime is not None:
+            runtime.staleness.touch(self.address, service_info.time, self.stale_after)
+            runtime.load.add_backlog(started - service_info.time, started)
+            runtime.coverage.add(
+                self.address, service_info.source, service_info.rssi, service_info.time
+            )
+
+        if MANUFACTURER_ID not in service_info.manufacturer_data:
+            return None
+
+        parsed = parse_manufacturer_data(
+            service_info.address, service_info.manufacturer_data, self._fields
+        )
+        if parsed is None:
+            self.publish = True
+            return None
+        self.latency.mark_parsed(time.monotonic())
+
+        if (
+            runtime is not None
+            and runtime.load.shedding
+            and parsed.swarm_state_numeric in (None, self._swarm_state)
+        ):
+            # Keep only the newest frame, runtime.async_flush_deferred processes it later
+            if self._deferred is not None:
+                self.shed += 1
+                runtime.load.shed += 1
+            else:
+                runtime.async_defer(self)
+            self._deferred = (parsed, now, service_info.time)
+            self.publish = False
+            return parsed
+
+        if self._deferred is not None:
+            self.shed += 1  # superseded by this frame
+            if runtime is not None:
+                runtime.load.shed += 1
+            self._deferred = None
+        return self._process(parsed, now, service_info.time)
+
+    def _process(self, parsed: ManufacturerData, now: float, received: float) -> ManufacturerData:
+        """Run events, forwarding, history and post-processing for a frame.
+
+        Returns the values for the entities: the frame itself, or with resampling the
+        newest grid point (the frame until the first bin is closed).
+        """
+        self._last_parsed = parsed
+        if parsed.swarm_state_numeric is not None:
+            self._swarm_state = parsed.swarm_state_numeric
+        for event_type, event_data in self._events.update(parsed, now):
+            self.hass.bus.async_fire(event_type, event_data)
+        if self.resampler is None:
+            self._process_values(parsed, now)
+            self.publish = self.scheduler is None or self.scheduler.should_publish(
+                parsed, received
+            )
+            return parsed
+        point = self.resampler.add(parsed, now)
+        self.publish = point is not None
+        if point is not None:
+            self._grid_point = point[0]
+            self._process_values(*point)
+        return self._grid_point or parsed
+
+    def _process_values(self, values: ManufacturerData, timestamp: float) -> None:
+        """Forward, record and post-process a frame or grid point."""
+        if self._forwarder is not None:
+            self._forwarder.add(values, timestamp)
+        if (runtime := self._runtime) is not None:
+            runtime.history.add(values, timestamp)
+            if derived := runtime.pipeline.process(values, timestamp):
+                self.derived.update(derived)
+
+    @callback
+    def _async_handle_bluetooth_event(
+        self, service_info: BluetoothServiceInfoBleak, change: BluetoothChange
+    ) -> None:
+        """Handle an advertisement; the processors write the entity states before returning."""
+        super()._async_handle_bluetooth_event(service_info, change)
+        self.latency.finish(time.monotonic())
+
+    def snapshot(self) -> Sections:
+        """Snapshot payloads of the state kept by the coordinator itself."""
+        return {"events": self._events.to_bytes()}
+
+    def restore(self, sections: Sections) -> None:
+        """Restore the state kept by the coordinator itself."""
+        if (data := sections.get("events")) is not None:
+            self._events.restore(data)
+
+    @property
+    def model(self) -> int | None:
+        """Model id of the last decoded advertisement."""
+        return None if self._last_parsed is None else self._last_parsed.model
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start listening for advertisements and join the shared runtime."""
+        self._runtime = async_get_runtime(self.hass)
+        if self.spike_filter:
+            self._runtime.spike_filter.enable(self.address)
+        unsub_runtime = self._runtime.async_register(self)
+        unsub_forwarder = None
+        if (target := self.forward_target) is not None:
+            if target.mqtt and not async_mqtt_connects_to(self.hass, target):
+                _LOGGER.warning(
+                    "Not forwarding %s, the MQTT integration is not connected to %s",
+                    self.address,
+                    target.host or "a broker",
+                )
+            else:
+                self._forwarder, unsub_forwarder = self._runtime.async_acquire_forwarder(
+                    self, target
+                )
+        unsub_bluetooth = super().async_start()
+
+        @callback
+        def _async_stop() -> None:
+            unsub_bluetooth()
+            if unsub_forwarder is not None:
+                unsub_forwarder()
+            unsub_runtime()
+            self._runtime = None
+            self._forwarder = None
+
+        return _async_stop
+
+    @callback
+    def async_set_stale(self) -> None:
+        """Mark the device unavailable, it has not been heard within the threshold."""
+        if self._last_service_info is None or not self.available:
+            return
+        _LOGGER.debug("%s not heard for %s seconds", self.address, self.stale_after)
+        self._async_handle_unavailable(self._last_service_info)
+
+    @callback
+    def async_flush_deferred(self) -> None:
+        """Process the newest frame kept while shedding load and write the entities."""
+        if self._deferred is None:
+            return
+        parsed, now, received = self._deferred
+        self._deferred = None
+        values = self._process(parsed, now, received)
+        for processor in self._processors:
+            processor.async_handle_update(values, self.available)
+
+    @callback
+    def async_flush_grid(self, now: float) -> None:
+        """Publish the grid point of a bin that ended without a later advertisement."""
+        if self.resampler is None or (point := self.resampler.flush(now)) is None:
+            return
+        self._grid_point = point[0]
+        self._process_values(*point)
+        if not self.available:
+            return  # written with the next advertisement
+        self.publish = True
+        for processor in self._processors:
+            processor.async_handle_update(self._grid_point, was_available=True)
+
+    @callback
+    def async_push_derived(self, values: dict[str, Any]) -> None:
+        """Keep values of offloaded post-processing stages for the next entity update.
+
+        Writing the entities again for them would double the state writes per reading.
+        """
+        self.derived.update(values)
+
+
+@callback
+def async_mqtt_connects_to(hass: HomeAssistant, target: ForwardTarget) -> bool:
+    """Whether Home Assistant's MQTT integration is set up with the broker of ``target``.
+
+    A target without a broker accepts whichever broker the integration has.
+    """
+    if not (entries := hass.config_entries.async_loaded_entries(MQTT_DOMAIN)):
+        return False
+    if not target.host:
+        return True
+    # MQTT is only an after dependency, import it once it is known to be set up
+    from homeassistant.components.mqtt.const import CONF_BROKER  # noqa: PLC0415
+
+    return any(
+        entry.data.get(CONF_BROKER) == target.host
+        and entry.data.get(CONF_PORT, MQTT_DEFAULT_PORT) == target.port
+        for entry in entries
+    )
+
+
+async def _async_publish_mqtt(hass: HomeAssistant, topic: str, payload: bytes) -> None:
+    """Publish a forwarded batch through Home Assistant's MQTT integration."""
+    if MQTT_DOMAIN not in hass.config.components:
+        raise ConnectionError("MQTT integration not set up")
+    from homeassistant.components import mqtt  # noqa: PLC0415
+
+    if not mqtt.is_connected(hass):
+        raise ConnectionError("MQTT integration not connected")
+    try:
+        await mqtt.async_publish(hass, topic, payload)
+    except HomeAssistantError as err:
+        raise ConnectionError(str(err)) from err
+
+
+class SharedRuntime:
+    """State shared by all BroodMinder devices.
+
+    Holds the staleness tracker with its single interval timer (which also
+    closes the time grid bins of resampling devices), the
+    post-processing pipeline with its worker pool and built-in stages (spike
+    filter, brood stability), the in-memory history, one forwarder per
+    forwarding target, the load monitor with its loop lag probe, the
+    snapshots of the per-hive state and the proxy coverage of the hives.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the shared state and start the staleness timer."""
+        self._hass = hass
+        self.coordinators: dict[str, BroodMinderCoordinator] = {}
+        self.staleness = StalenessTracker()
+        self.pipeline = Pipeline(
+            PIPELINE_MAX_WORKERS,
+            PIPELINE_MAX_PENDING,
+            hass.loop.call_soon_threadsafe,
+            self._async_handle_results,
+        )
+        self.spike_filter = SpikeFilterStage()
+        self.pipeline.add_stage(self.spike_filter)
+        self.pipeline.add_stage(BroodStabilityStage())
+        self.history = HistoryStore()
+        self.forwarders: dict[ForwardTarget, Forwarder] = {}
+        self._forwarder_users: dict[ForwardTarget, set[str]] = {}
+        self._forwarder_tasks: dict[ForwardTarget, asyncio.Task[None]] = {}
+        self._unsub_timer = async_track_time_interval(
+            hass, self._async_tick, timedelta(seconds=STALENESS_TICK_SECONDS)
+        )
+        self.load = LoadMonitor()
+        self._deferred: set[str] = set()  # addresses with a frame kept while shedding
+        self._last_flush = time.monotonic()
+        self._probe_handle: asyncio.TimerHandle | None = None
+        self._schedule_probe()
+        self._snapshot_path = Path(hass.config.path(STORAGE_DIR, SNAPSHOT_FILE))
+        # Per-hive state not restored yet: loaded, or kept while an entry reloads
+        self._restored: dict[str, Sections] = {}
+        self._load_task: asyncio.Task[None] | None = None
+        self._unsub_snapshot = async_track_time_interval(
+            hass, self._async_snapshot_tick, timedelta(seconds=SNAPSHOT_INTERVAL)
+        )
+        # Final write: the last state of every device is in, the executor still runs
+        self._unsub_final_write: CALLBACK_TYPE | None = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_handle_final_write
+        )
+        self._unsub_stop: CALLBACK_TYPE | None = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_handle_stop
+        )
+        self.coverage = CoverageTracker()
+        self._unsub_coverage = async_track_time_interval(
+            hass, self._async_coverage_tick, timedelta(seconds=COVERAGE_CHECK_INTERVAL)
+        )
+
+    @callback
+    def async_register(self, coordinator: BroodMinderCoordinator) -> CALLBACK_TYPE:
+        """Track a coordinator until the returned callback is called."""
+        address = coordinator.address
+        self.coordinators[address] = coordinator
+        # Start the clock now, so devices that stay silent after setup are noticed too
+        self.staleness.touch(address, time.monotonic(), coordinator.stale_after)
+        if (sections := self._restored.pop(address, None)) is not None:
+            self._restore(coordinator, sections)
+
+        @callback
+        def _async_unregister() -> None:
+            # Kept for the next setup of the entry, e.g. after an options change
+            self._restored[address] = self._collect(coordinator)
+            self.coordinators.pop(address, None)
+            self.staleness.remove(address)
+            self.pipeline.forget(address)
+            self.history.forget(address)
+            self._deferred.discard(address)
+            self.coverage.forget(address)
+            ir.async_delete_issue(self._hass, DOMAIN, f"{ISSUE_POOR_COVERAGE}_{address}")
+            if not self.coordinators:
+                self._unsub_timer()
+                self._unsub_snapshot()
+                if self._unsub_final_write is not None:
+                    self._unsub_final_write()
+                    self._unsub_final_write = None
+                if self._unsub_stop is not None:
+                    self._unsub_stop()
+                    self._unsub_stop = None
+                self._unsub_coverage()
+                if self._probe_handle is not None:
+                    self._probe_handle.cancel()
+                    self._probe_handle = None
+                self.pipeline.shutdown()
+                self._hass.data.pop(DATA_RUNTIME, None)
+                self._hass.data[DATA_SNAPSHOT] = self._restored
+                self._async_save(self._restored)
+
+        return _async_unregister
+
+    async def async_load_snapshot(self) -> None:
+        """Load the saved per-hive state once, before the first coordinator starts."""
+        if self._load_task is None:
+            self._load_task = self._hass.async_create_task(
+                self._async_load(), f"{DOMAIN} load snapshot"
+            )
+        await self._load_task
+
+    async def _async_load(self) -> None:
+        # The previous runtime of this run is more recent than the file
+        if (hives := self._hass.data.pop(DATA_SNAPSHOT, None)) is None:
+            try:
+                loaded = await self._hass.async_add_executor_job(
+                    load_snapshot, self._snapshot_path
+                )
+            except (OSError, SnapshotError) as err:
+                _LOGGER.warning("Not restoring state from %s: %s", self._snapshot_path, err)
+                return
+            if loaded is None:
+                return
+            written_at, hives = loaded
+            _LOGGER.debug(
+                "Restoring the state of %s devices saved %.0f seconds ago",
+                len(hives),
+                time.time() - written_at,
+            )
+            for sections in hives.values():
+                # Written before the sections were stamped
+                sections.setdefault(SECTION_COLLECTED, _COLLECTED.pack(written_at))
+        for address, sections in hives.items():
+            self._restored.setdefault(address, sections)
+
+    def _collect(self, coordinator: BroodMinderCoordinator) -> Sections:
+        address = coordinator.address
+        sections = {
+            **coordinator.snapshot(),
+            **self.pipeline.snapshot(address),
+            SECTION_COLLECTED: _COLLECTED.pack(time.time()),
+        }
+        if (history := self.history.snapshot(address)) is not None:
+            sections["history"] = history
+        return sections
+
+    def _restore(self, coordinator: BroodMinderCoordinator, sections: Sections) -> None:
+        address = coordinator.address
+        try:
+            coordinator.restore(sections)
+            if (history := sections.get("history")) is not None:
+                self.history.restore(address, history)
+        except (ValueError, struct.error) as err:
+            _LOGGER.warning("Not restoring the state of %s: %s", address, err)
+            self.history.forget(address)
+        self.pipeline.restore(address, sections)
+
+    @callback
+    def _async_save(self, hives: dict[str, Sections]) -> None:
+        """Write a snapshot in the executor, the payloads are immutable bytes."""
+        self._hass.async_add_executor_job(
+            save_snapshot, self._snapshot_path, hives, time.time()
+        ).add_done_callback(self._log_save_error)
+
+    def _log_save_error(self, future: asyncio.Future[None]) -> None:
+        if not future.cancelled() and (err := future.exception()) is not None:
+            _LOGGER.warning("Could not save state to %s: %s", self._snapshot_path, err)
+
+    @callback
+    def _async_snapshot_tick(self, _now: datetime) -> None:
+        # Restored state waits for its hive to be set up again, e.g. an entry that failed
+        # to load or is disabled for a while, until it is older than SNAPSHOT_MAX_AGE
+        oldest = time.time() - SNAPSHOT_MAX_AGE
+        self._restored = {
+            address: sections
+            for address, sections in self._restored.items()
+            if _collected_at(sections) >= oldest
+        }
+        self._async_save({**self._restored, **self._collect_all()})
+
+    def _collect_all(self) -> dict[str, Sections]:
+        return {
+            address: self._collect(coordinator)
+            for address, coordinator in self.coordinators.items()
+        }
+
+    async def _async_handle_stop(self, _event: Event) -> None:
+        # No worker thread outlives Home Assistant, the final snapshot needs none
+        self._unsub_stop = None
+        self.pipeline.shutdown()
+        await self._hass.async_add_executor_job(self.pipeline.join)
+
+    async def _async_handle_final_write(self, _event: Event) -> None:
+        # The listener is gone once it fired
+        self._unsub_final_write = None
+        await self._hass.async_add_executor_job(
+            save_snapshot,
+            self._snapshot_path,
+            {**self._restored, **self._collect_all()},
+            time.time(),
+        )
+
+    @callback
+    def async_acquire_forwarder(
+        self, coordinator: BroodMinderCoordinator, target: ForwardTarget
+    ) -> tuple[Forwarder, CALLBACK_TYPE]:
+        """Return the forwarder of ``target``, started on first use."""
+        if (forwarder := self.forwarders.get(target)) is None:
+            forwarder = self.forwarders[target] = Forwarder(
+                target,
+                publish=partial(_async_publish_mqtt, self._hass) if target.mqtt else None,
+            )
+            task = self._hass.async_create_background_task(
+                forwarder.run(), f"{DOMAIN} forwarder {target.host}:{target.port}"
+            )
+            self._forwarder_tasks[target] = task
+        users = self._forwarder_users.setdefault(target, set())
+        users.add(coordinator.address)
+
+        @callback
+        def _async_release() -> None:
+            users.discard(coordinator.address)
+            if not users:
+                self.forwarders.pop(target, None)
+                self._forwarder_users.pop(target, None)
+                if task := self._forwarder_tasks.pop(target, None):
+                    task.cancel()
+
+        return forwarder, _async_release
+
+    @callback
+    def _async_tick(self, _now: datetime) -> None:
+        for address in self.staleness.expire(time.monotonic()):
+            if coordinator := self.coordinators.get(address):
+                coordinator.async_set_stale()
+        now = time.time()
+        for coordinator in self.coordinators.values():
+            if coordinator.resampler is not None:
+                coordinator.async_flush_grid(now)
+
+    @callback
+    def _async_coverage_tick(self, _now: datetime) -> None:
+        """Raise a repair issue for hives with poor coverage, remove recovered ones."""
+        now = time.monotonic()
+        raised, cleared = self.coverage.update_flags(now)
+        for address in cleared:
+            ir.async_delete_issue(self._hass, DOMAIN, f"{ISSUE_POOR_COVERAGE}_{address}")
+        for address in raised:
+            if (coordinator := self.coordinators.get(address)) is None:
+                continue
+            summary = self.coverage.hive_summary(address, now) or {}
+            ir.async_create_issue(
+                self._hass,
+                DOMAIN,
+                f"{ISSUE_POOR_COVERAGE}_{address}",
+                is_fixable=False,
+                severity=ir.IssueSeverity.WARNING,
+                translation_key=ISSUE_POOR_COVERAGE,
+                translation_placeholders={
+                    "name": coordinator.title,
+                    "address": address,
+                    "completeness": str(summary.get("completeness")),
+                    "source": str(summary.get("best_source") or "none"),
+                    "rssi": str(summary.get("best_rssi")),
+                },
+            )
+
+    def _schedule_probe(self) -> None:
+        loop = self._hass.loop
+        due = loop.time() + SHED_PROBE_INTERVAL
+        self._probe_handle = loop.call_at(due, self._async_probe, due)
+
+    @callback
+    def _async_probe(self, due: float) -> None:
+        """Measure how late the loop ran this callback, flush deferred frames when due."""
+        now = time.monotonic()
+        self.load.add_lag(self._hass.loop.time() - due, now)
+        if self._deferred and (
+            not self.load.shedding or now - self._last_flush >= SHED_FLUSH_INTERVAL
+        ):
+            self._last_flush = now
+            self._async_flush_deferred()
+        self._schedule_probe()
+
+    @callback
+    def _async_handle_results(self, batch: ResultBatch) -> None:
+        for address, values in batch:
+            if coordinator := self.coordinators.get(address):
+                coordinator.async_push_derived(values)
+
+    @callback
+    def async_defer(self, coordinator: BroodMinderCoordinator) -> None:
+        """Remember that ``coordinator`` keeps a frame until the next flush."""
+        self._deferred.add(coordinator.address)
+
+    @callback
+    def _async_flush_deferred(self) -> None:
+        # One callback per device, so other work on the loop can run in between
+        for address in self._deferred:
+            if coordinator := self.coordinators.get(address):
+                self._hass.loop.call_soon(coordinator.async_flush_deferred)
+        self._deferred.clear()
+
+
+@callback
+def async_get_runtime(hass: HomeAssistant) -> SharedRuntime:
+    """Return the shared runtime, creating it on first use."""
+    if (runtime := hass.data.get(DATA_RUNTIME)) is None:
+        runtime = hass.data[DATA_RUNTIME] = SharedRuntime(hass)
+    return runtime
@@ -0,0 +1,234 @@
+"""Proxy coverage of the hives and a recommended hive-to-proxy assignment.
+
+The coordinator feeds ``CoverageTracker`` with the source (local adapter or bluetooth
+proxy), RSSI and receipt time of every advertisement. Per hive it keeps
+
+* per source: the frames delivered, a smoothed RSSI and when it was last heard
+* a bitmap of ``COVERAGE_SLOTS`` slots of ``COVERAGE_SLOT_SECONDS``: the completeness is
+  the share of the completed slots with at least one advertisement
+
+all O(1) per advertisement. Home Assistant forwards an advertisement heard by several
+sources from one of them (the current one unless another is clearly stronger), so the
+share of frames per source shows which proxy carries a hive rather than which proxies
+could hear it.
+
+``report`` computes a recommended assignment: a small set of sources that keeps every
+hive at a good signal (greedy set cover), each hive assigned to its strongest source in
+that set. Sources outside the set only deliver duplicates and can be moved to where
+coverage is poor. ``update_flags`` reports hives whose coverage became poor or
+recovered, with hysteresis, for repair issues.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from .const import (
+    COVERAGE_MIN_SLOTS,
+    COVERAGE_POOR_RATIO,
+    COVERAGE_RECOVERED_RATIO,
+    COVERAGE_RSSI_GOOD,
+    COVERAGE_RSSI_POOR,
+    COVERAGE_SLOT_SECONDS,
+    COVERAGE_SLOTS,
+    COVERAGE_SOURCE_TIMEOUT,
+    RECEPTION_EWMA_ALPHA,
+)
+
+_SLOT_MASK = (1 << COVERAGE_SLOTS) - 1
+
+
+class SourceStats:
+    """Reception of one hive through one source."""
+
+    __slots__ = ("frames", "last_seen", "rssi")
+
+    def __init__(self) -> None:
+        """Initialize without frames."""
+        self.frames = 0
+        self.rssi: float | None = None  # smoothed dBm
+        self.last_seen = 0.0
+
+
+class HiveCoverage:
+    """Reception of one hive through all sources."""
+
+    __slots__ = ("_first_slot", "_last_slot", "_slots", "frames", "sources")
+
+    def __init__(self) -> None:
+        """Initialize without frames."""
+        self.frames = 0
+        self.sources: dict[str, SourceStats] = {}
+        self._slots = 0  # bit i: slot _last_slot - i had a frame
+        self._first_slot: int | None = None
+        self._last_slot = 0
+
+    def add(self, source: str, rssi: int | None, now: float) -> None:
+        """Account for one advertisement delivered through ``source``."""
+        self.frames += 1
+        if (stats := self.sources.get(source)) is None:
+            stats = self.sources[source] = SourceStats()
+        stats.frames += 1
+        stats.last_seen = now
+        if rssi is not None:
+            if stats.rssi is None:
+                stats.rssi = float(rssi)
+            else:
+                stats.rssi += RECEPTION_EWMA_ALPHA * (rssi - stats.rssi)
+
+        slot = int(now // COVERAGE_SLOT_SECONDS)
+        if self._first_slot is None:
+            self._first_slot = self._last_slot = slot
+        elif slot > self._last_slot:
+            self._slots = (self._slots << (slot - self._last_slot)) & _SLOT_MASK
+            self._last_slot = slot
+        self._slots |= 1
+
+    def completeness(self, now: float) -> tuple[float, int] | None:
+        """Share of the completed slots with a frame and their number."""
+        if self._first_slot is None:
+            return None
+        current = int(now // COVERAGE_SLOT_SECONDS)
+        span = min(current - self._first_slot, COVERAGE_SLOTS - 1)
+        if span <= 0:
+            return None
+        slots = ((self._slots << (current - self._last_slot)) >> 1) & ((1 << span) - 1)
+        return slots.bit_count() / span, span
+
+    def recent(self, now: float) -> dict[str, SourceStats]:
+        """Sources heard within ``COVERAGE_SOURCE_TIMEOUT`` that reported an RSSI."""
+        return {
+            source: stats
+            for source, stats in self.sources.items()
+            if stats.rssi is not None and now - stats.last_seen <= COVERAGE_SOURCE_TIMEOUT
+        }
+
+
+def _minimal_sources(candidates: dict[str, dict[str, float]]) -> list[str]:
+    """Greedy set cover: sources until every hive has one of its candidates."""
+    uncovered = {hive for hive, sources in candidates.items() if sources}
+    chosen: list[str] = []
+    while uncovered:
+        heard: dict[str, list[float]] = {}
+        for hive in uncovered:
+            for source, rssi in candidates[hive].items():
+                heard.setdefault(source, []).append(rssi)
+        # Most hives first, then the stronger mean signal
+        source = max(heard, key=lambda s: (len(heard[s]), sum(heard[s]) / len(heard[s]), s))
+        chosen.append(source)
+        uncovered = {hive for hive in uncovered if source not in candidates[hive]}
+    return chosen
+
+
+class CoverageTracker:
+    """Coverage of all hives."""
+
+    def __init__(self) -> None:
+        """Initialize without hives."""
+        self._hives: dict[str, HiveCoverage] = {}
+        self._flagged: set[str] = set()
+
+    def add(self, address: str, source: str, rssi: int | None, now: float) -> None:
+        """Account for an advertisement of ``address`` received through ``source``."""
+        if (hive := self._hives.get(address)) is None:
+            hive = self._hives[address] = HiveCoverage()
+        hive.add(source, rssi, now)
+
+    def forget(self, address: str) -> None:
+        """Drop the statistics of ``address``."""
+        self._hives.pop(address, None)
+        self._flagged.discard(address)
+
+    def _is_poor(self, hive: HiveCoverage, now: float, flagged: bool) -> bool:
+        ratio = hive.completeness(now)
+        if ratio is None or ratio[1] < COVERAGE_MIN_SLOTS:
+            return flagged  # not enough time observed to judge
+        best = max((s.rssi for s in hive.recent(now).values()), default=None)
+        if flagged:
+            return (
+                ratio[0] < COVERAGE_RECOVERED_RATIO or best is None or best < COVERAGE_RSSI_POOR
+            )
+        return ratio[0] < COVERAGE_POOR_RATIO
+
+    def update_flags(self, now: float) -> tuple[list[str], list[str]]:
+        """Hives whose coverage became poor and hives that recovered since the last call.
+
+        A hive is poor when fewer than ``COVERAGE_POOR_RATIO`` of the slots have an
+        advertisement and recovers above ``COVERAGE_RECOVERED_RATIO`` with a usable signal.
+        """
+        raised: list[str] = []
+        cleared: list[str] = []
+        for address, hive in self._hives.items():
+            flagged = address in self._flagged
+            poor = self._is_poor(hive, now, flagged)
+            if poor and not flagged:
+                self._flagged.add(address)
+                raised.append(address)
+            elif flagged and not poor:
+                self._flagged.discard(address)
+                cleared.append(address)
+        return raised, cleared
+
+    def hive_summary(self, address: str, now: float) -> dict[str, Any] | None:
+        """Completeness and best source of ``address``."""
+        if (hive := self._hives.get(address)) is None:
+            return None
+        ratio = hive.completeness(now)
+        recent = hive.recent(now)
+        best = max(recent, key=lambda source: recent[source].rssi or 0, default=None)
+        return {
+            "completeness": None if ratio is None else round(100 * ratio[0]),
+            "hours": None if ratio is None else round(ratio[1] * COVERAGE_SLOT_SECONDS / 3600, 1),
+            "best_source": best,
+            "best_rssi": None if best is None else round(recent[best].rssi or 0),
+        }
+
+    def report(self, now: float) -> dict[str, Any]:
+        """Coverage of every hive and the recommended assignment."""
+        candidates: dict[str, dict[str, float]] = {}
+        hives: dict[str, Any] = {}
+        for address, hive in self._hives.items():
+            recent = {source: stats.rssi or 0.0 for source, stats in hive.recent(now).items()}
+            good = {s: rssi for s, rssi in recent.items() if rssi >= COVERAGE_RSSI_GOOD}
+            # Hives without a good source are covered by their strongest one
+            strongest = max(recent, key=recent.__getitem__, default=None)
+            candidates[address] = good or (
+                {} if strongest is None else {strongest: recent[strongest]}
+            )
+            hives[address] = {
+                **(self.hive_summary(address, now) or {}),
+                "poor": address in self._flagged,
+                "frames": hive.frames,
+                "sources": {
+                    source: {
+                        "rssi": None if stats.rssi is None else round(stats.rssi, 1),
+                        "share": round(100 * stats.frames / hive.frames, 1),
+                        "seconds_since_seen": round(now - stats.last_seen),
+                    }
+                    for source, stats in hive.sources.items()
+                },
+            }
+
+        chosen = _minimal_sources(candidates)
+        assignment: dict[str, str | None] = {}
+        for address, sources in candidates.items():
+            in_set = {s: rssi for s, rssi in sources.items() if s in chosen}
+            assignment[address] = max(in_set, key=in_set.__getitem__, default=None)
+            hives[address]["assigned_source"] = assignment[address]
+
+        seen = {source for hive in self._hives.values() for source in hive.sources}
+        return {
+            "hives": hives,
+            "recommended_sources": chosen,
+            "redundant_sources": sorted(seen - set(chosen)),
+            "sources": {
+                source: {
+                    "assigned_hives": sorted(a for a, s in assignment.items() if s == source),
+                    "hives_heard": sum(source in hive.sources for hive in self._hives.values()),
+                }
+                for source in sorted(seen)
+            },
+            "uncovered_hives": sorted(a for a, sources in candidates.items() if not sources),
+        }
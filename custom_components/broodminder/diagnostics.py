@@ -0,0 +1,37 @@
+"""Diagnostics support for BroodMinder."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_FORWARD_URL, DATA_RUNTIME, DOMAIN
+from .coordinator import BroodMinderCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return reception statistics and latency traces of the device.
+
+    The proxy coverage report covers all hives, as the recommended assignment does.
+    """
+    coordinator: BroodMinderCoordinator = hass.data[DOMAIN][entry.entry_id]
+    runtime = hass.data.get(DATA_RUNTIME)
+    return {
+        "options": async_redact_data(entry.options, {CONF_FORWARD_URL}),
+        "model": coordinator.model,
+        "reception": asdict(coordinator.reception),
+        "latency": coordinator.latency.dump(),
+        "publishing": coordinator.scheduler.dump() if coordinator.scheduler else None,
+        "resampling": coordinator.resampler.dump() if coordinator.resampler else None,
+        "frames_shed": coordinator.shed,
+        "load": runtime.load.dump() if runtime else None,
+        "pipeline": runtime.pipeline.stats() if runtime else None,
+        "coverage": runtime.coverage.report(time.monotonic()) if runtime else None,
+    }
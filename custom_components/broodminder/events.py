@@ -0,0 +1,158 @@
+"""Detect hive events in the advertisement stream.
+
+``HiveEventDetector`` keeps a few values per device and reports an event only on a
+transition: a SwarmMinder state change into a swarm-detected state, the battery
+dropping below the low threshold, or a sudden drop of the total hive weight. The
+coordinator fires the reported events on the Home Assistant bus, so automations no
+longer need to evaluate every state change of every hive.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import struct
+from typing import Any
+
+from .ble_parser import ManufacturerData
+from .const import (
+    BATTERY_LOW_HYSTERESIS,
+    BATTERY_LOW_PERCENT,
+    EVENT_BATTERY_LOW,
+    EVENT_SWARM,
+    EVENT_WEIGHT_DROP,
+    SWARM_DETECTED_STATES,
+    SWARM_STATES,
+    WEIGHT_DROP_DAG,
+    WEIGHT_DROP_WINDOW,
+)
+
+Event = tuple[str, dict[str, Any]]
+
+# ManufacturerData fields read by the detector, decoded whatever sensors are selected
+EVENT_FIELDS = frozenset(
+    {
+        "swarm_state_numeric",
+        "swarm_time_utc",
+        "battery_percent",
+        "weight_l_dag",
+        "weight_r_dag",
+        "weight_l2_dag",
+        "weight_r2_dag",
+    }
+)
+
+_STATE = struct.Struct("<ibI")  # swarm state, battery low (-1: none), weight samples
+_WEIGHT = struct.Struct("<di")
+
+
+def total_weight_dag(parsed: ManufacturerData) -> int | None:
+    """Sum of the weight channels present, in decagrams."""
+    channels = (
+        parsed.weight_l_dag,
+        parsed.weight_r_dag,
+        parsed.weight_l2_dag,
+        parsed.weight_r2_dag,
+    )
+    present = [channel for channel in channels if channel is not None]
+    return sum(present) if present else None
+
+
+class HiveEventDetector:
+    """Turns the advertisements of one device into transition events."""
+
+    __slots__ = ("_battery_low", "_swarm_state", "_weights")
+
+    def __init__(self) -> None:
+        """Initialize, the first advertisement only sets the baseline."""
+        self._swarm_state: int | None = None
+        self._battery_low: bool | None = None
+        # (timestamp, weight) with decreasing weights: the front is the window maximum
+        self._weights: deque[tuple[float, int]] = deque()
+
+    def to_bytes(self) -> bytes:
+        """Snapshot payload of the baseline."""
+        swarm_state = -1 if self._swarm_state is None else self._swarm_state
+        battery_low = -1 if self._battery_low is None else self._battery_low
+        return _STATE.pack(swarm_state, battery_low, len(self._weights)) + b"".join(
+            _WEIGHT.pack(timestamp, weight) for timestamp, weight in self._weights
+        )
+
+    def restore(self, data: bytes) -> None:
+        """Replace the baseline by a ``to_bytes`` payload."""
+        swarm_state, battery_low, count = _STATE.unpack_from(data)
+        if len(data) != _STATE.size + count * _WEIGHT.size:
+            raise ValueError("event detector payload size mismatch")
+        self._swarm_state = None if swarm_state < 0 else swarm_state
+        self._battery_low = None if battery_low < 0 else bool(battery_low)
+        self._weights = deque(
+            _WEIGHT.unpack_from(data, _STATE.size + index * _WEIGHT.size)
+            for index in range(count)
+        )
+
+    def update(self, parsed: ManufacturerData, timestamp: float) -> list[Event]:
+        """Return the events caused by this advertisement."""
+        events: list[Event] = []
+        base = {"address": parsed.address, "name": parsed.device_name}
+
+        state = parsed.swarm_state_numeric
+        if state is not None:
+            previous, self._swarm_state = self._swarm_state, state
+            if (
+                previous is not None
+                and state in SWARM_DETECTED_STATES
+                and previous not in SWARM_DETECTED_STATES
+            ):
+                swarm_time = parsed.swarm_time_utc
+                events.append(
+                    (
+                        EVENT_SWARM,
+                        {
+                            **base,
+                            "swarm_state": state,
+                            "description": SWARM_STATES.get(state),
+                            "previous_swarm_state": previous,
+                            "swarm_time": swarm_time.isoformat() if swarm_time else None,
+                        },
+                    )
+                )
+
+        battery = parsed.battery_percent
+        if battery is not None:
+            if self._battery_low is None:
+                # Like the swarm state, the first reading only sets the baseline
+                self._battery_low = battery <= BATTERY_LOW_PERCENT
+            elif not self._battery_low and battery <= BATTERY_LOW_PERCENT:
+                self._battery_low = True
+                events.append((EVENT_BATTERY_LOW, {**base, "battery": battery}))
+            elif self._battery_low and battery >= BATTERY_LOW_PERCENT + BATTERY_LOW_HYSTERESIS:
+                self._battery_low = False
+
+        weight = total_weight_dag(parsed)
+        if weight is not None and (event := self._update_weight(weight, timestamp)):
+            events.append((EVENT_WEIGHT_DROP, {**base, **event}))
+        return events
+
+    def _update_weight(self, weight: int, timestamp: float) -> dict[str, Any] | None:
+        """Track the rolling maximum weight, O(1) amortized per sample."""
+        weights = self._weights
+        while weights and timestamp - weights[0][0] > WEIGHT_DROP_WINDOW:
+            weights.popleft()
+        while weights and weights[-1][1] <= weight:
+            weights.pop()
+        weights.append((timestamp, weight))
+
+        reference_time, reference = weights[0]
+        if reference - weight < WEIGHT_DROP_DAG:
+            return None
+
+        # Report a drop once, then start over from the new weight
+        weights.clear()
+        weights.append((timestamp, weight))
+        return {
+            "weight": weight / 100,
+            "previous_weight": reference / 100,
+            "drop": (reference - weight) / 100,
+            "seconds": round(timestamp - reference_time),
+        }
@@ -0,0 +1,224 @@
+"""Spike rejection for weight and temperature channels.
+
+A ``HampelFilter`` keeps the last ``window`` accepted samples of one channel in a ring
+buffer next to a sorted copy of it. Each sample costs a bisect removal and insertion in
+the sorted copy and a selection of the median absolute deviation (MAD) that walks out
+from the median over the sorted copy, so O(window) without any sorting, and the same
+for every device however many are tracked. Samples further than ``sigmas`` scaled MADs
+from the rolling median are reported as the median instead, and jumps larger than
+``max_jump`` are rejected outright.
+
+All values are the fixed-point integers of ``ManufacturerData`` (centi-°C, decagrams).
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, insort
+import struct
+
+from .ble_parser import ManufacturerData
+from .const import (
+    SENSOR_SPIKES_REJECTED,
+    SENSOR_TEMP,
+    SENSOR_WEIGHT_L,
+    SENSOR_WEIGHT_L2,
+    SENSOR_WEIGHT_R,
+    SENSOR_WEIGHT_R2,
+    SENSOR_WEIGHT_REALTIME,
+    SPIKE_FILTER_SIGMAS,
+    SPIKE_FILTER_WINDOW,
+)
+from .pipeline import DerivedValues, Stage
+from .snapshot import pack_sections, unpack_sections
+
+# Scales the median absolute deviation to a standard deviation for normal noise
+MAD_SCALE = 1.4826
+
+FILTERED_SUFFIX = "_filtered"
+
+# ManufacturerData attribute -> (entity key, min deviation, max jump between samples)
+# The min deviation keeps a flat signal (MAD 0) from flagging every small change.
+FILTER_CHANNELS: dict[str, tuple[str, int, int]] = {
+    "temperature_centi_c": (SENSOR_TEMP, 50, 1500),  # 0.5 °C, 15 °C
+    "weight_l_dag": (SENSOR_WEIGHT_L, 50, 5000),  # 0.5 kg, 50 kg
+    "weight_r_dag": (SENSOR_WEIGHT_R, 50, 5000),
+    "weight_l2_dag": (SENSOR_WEIGHT_L2, 50, 5000),
+    "weight_r2_dag": (SENSOR_WEIGHT_R2, 50, 5000),
+    "weight_realtime_total_dag": (SENSOR_WEIGHT_REALTIME, 50, 10000),
+}
+
+
+class HampelFilter:
+    """Rolling-median (Hampel) filter over a fixed-size ring buffer."""
+
+    __slots__ = (
+        "_consecutive_jumps",
+        "_max_jump",
+        "_min_deviation",
+        "_pos",
+        "_ring",
+        "_sigmas",
+        "_sorted",
+        "_window",
+        "rejected",
+    )
+
+    def __init__(
+        self, window: int, sigmas: float, min_deviation: int, max_jump: int | None = None
+    ) -> None:
+        """Initialize an empty filter."""
+        self._window = window
+        self._sigmas = sigmas * MAD_SCALE
+        self._min_deviation = min_deviation
+        self._max_jump = max_jump
+        self._ring: list[int] = []
+        self._sorted: list[int] = []
+        self._pos = 0
+        self._consecutive_jumps = 0
+        self.rejected = 0
+
+    @property
+    def median(self) -> int | None:
+        """Median of the buffered samples."""
+        if not self._sorted:
+            return None
+        return self._sorted[len(self._sorted) // 2]
+
+    def update(self, value: int) -> int:
+        """Add a sample and return the filtered value."""
+        median = self.median
+        if median is None:
+            self._push(value)
+            return value
+
+        if self._max_jump is not None and abs(value - median) > self._max_jump:
+            # A whole window of "impossible" samples is a real step (e.g. hive moved)
+            self._consecutive_jumps += 1
+            if self._consecutive_jumps < self._window:
+                self.rejected += 1
+                return median
+            self._reset(value)
+            return value
+        self._consecutive_jumps = 0
+
+        self._push(value)
+        median = self._sorted[len(self._sorted) // 2]
+        mad = self._mad(median)
+        if abs(value - median) > max(self._sigmas * mad, self._min_deviation):
+            self.rejected += 1
+            return median
+        return value
+
+    def to_bytes(self) -> bytes:
+        """Snapshot payload: counters, then the buffered samples oldest first."""
+        ring = self._ring[self._pos :] + self._ring[: self._pos]
+        header = struct.pack("<II", self._consecutive_jumps, self.rejected)
+        return header + array("i", ring).tobytes()
+
+    def restore(self, data: bytes) -> None:
+        """Replace the buffer by a ``to_bytes`` payload, keeping the newest samples."""
+        self._consecutive_jumps, self.rejected = struct.unpack_from("<II", data)
+        self._ring = array("i", data[8:]).tolist()[-self._window :]
+        self._sorted = sorted(self._ring)
+        self._pos = 0
+
+    def _mad(self, median: int) -> int:
+        """Median absolute deviation from ``median``, the middle of the sorted samples.
+
+        The deviations below and above the median each grow outwards from it, so
+        merging the two runs until the middle one is reached selects it in O(window).
+        """
+        values = self._sorted
+        count = len(values)
+        below, above = count // 2, count // 2 + 1
+        deviation = 0
+        for _ in range(count // 2 + 1):
+            if above >= count or (
+                below >= 0 and median - values[below] <= values[above] - median
+            ):
+                deviation = median - values[below]
+                below -= 1
+            else:
+                deviation = values[above] - median
+                above += 1
+        return deviation
+
+    def _push(self, value: int) -> None:
+        ring = self._ring
+        if len(ring) < self._window:
+            ring.append(value)
+        else:
+            oldest = ring[self._pos]
+            ring[self._pos] = value
+            self._pos = (self._pos + 1) % self._window
+            del self._sorted[bisect_left(self._sorted, oldest)]
+        insort(self._sorted, value)
+
+    def _reset(self, value: int) -> None:
+        self._ring = [value]
+        self._sorted = [value]
+        self._pos = 0
+        self._consecutive_jumps = 0
+
+
+class SpikeFilterStage(Stage):
+    """Adds ``<key>_filtered`` values for devices the filter is enabled for."""
+
+    name = "spike_filter"
+
+    def __init__(
+        self, window: int = SPIKE_FILTER_WINDOW, sigmas: float = SPIKE_FILTER_SIGMAS
+    ) -> None:
+        """Initialize the stage, no device is filtered until enabled."""
+        self._window = window
+        self._sigmas = sigmas
+        self._filters: dict[str, dict[str, HampelFilter]] = {}
+
+    def enable(self, address: str) -> None:
+        """Start filtering the channels of ``address``."""
+        self._filters.setdefault(address, {})
+
+    def forget(self, address: str) -> None:
+        """Drop the filter state of ``address``."""
+        self._filters.pop(address, None)
+
+    def snapshot(self, address: str) -> bytes | None:
+        """Snapshot payload of the channel filters of ``address``."""
+        if not (filters := self._filters.get(address)):
+            return None
+        return pack_sections({channel: f.to_bytes() for channel, f in filters.items()})
+
+    def restore(self, address: str, data: bytes) -> None:
+        """Restore the channel filters of ``address``, if filtering is enabled for it."""
+        if (filters := self._filters.get(address)) is None:
+            return
+        sections, _ = unpack_sections(data)
+        for attribute, payload in sections.items():
+            if (channel := FILTER_CHANNELS.get(attribute)) is None:
+                continue
+            hampel = filters[attribute] = HampelFilter(
+                self._window, self._sigmas, channel[1], channel[2]
+            )
+            hampel.restore(payload)
+
+    def process(self, parsed: ManufacturerData, timestamp: float) -> DerivedValues | None:
+        """Filter every channel present in the advertisement."""
+        filters = self._filters.get(parsed.address)
+        if filters is None:
+            return None
+
+        derived: DerivedValues = {}
+        for attribute, (key, min_deviation, max_jump) in FILTER_CHANNELS.items():
+            value = getattr(parsed, attribute)
+            if value is None:
+                continue
+            if (channel := filters.get(attribute)) is None:
+                channel = filters[attribute] = HampelFilter(
+                    self._window, self._sigmas, min_deviation, max_jump
+                )
+            derived[key + FILTERED_SUFFIX] = channel.update(value) / 100
+        if derived:
+            derived[SENSOR_SPIKES_REJECTED] = sum(f.rejected for f in filters.values())
+        return derived
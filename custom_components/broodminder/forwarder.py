@@ -0,0 +1,251 @@
+"""Forward decoded readings to a time-series stack in InfluxDB line protocol.
+
+Readings are taken straight from the coordinator's update path, formatted as line
+protocol and written in batches, either
+
+* ``tcp://host:port`` - raw line protocol over one persistent connection, e.g.
+  Telegraf's ``socket_listener``, or
+* ``mqtt://[host[:port]]/topic`` - one publish per batch through ``publish``, which
+  the coordinator binds to Home Assistant's MQTT integration (the broker is the one
+  of that integration, e.g. for Telegraf's ``mqtt_consumer`` with
+  ``data_format = "influx"``).
+
+A TCP batch only counts as sent once it was flushed to a connection that is still
+open; the socket is read to notice when the peer closed it.
+
+A batch is written when ``batch_size`` lines are waiting or ``flush_interval`` seconds
+have passed. Lines that could not be written stay in a bounded buffer and are retried
+after a reconnect with exponential backoff; when the buffer is full the oldest lines
+are dropped and counted.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+import contextlib
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+import logging
+from urllib.parse import unquote, urlsplit
+
+from .ble_parser import VALUE_FIELDS, ManufacturerData
+from .const import (
+    FORWARD_BATCH_SIZE,
+    FORWARD_BUFFER_SIZE,
+    FORWARD_FLUSH_INTERVAL,
+    FORWARD_MAX_BACKOFF,
+    ID_TO_MODEL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+MEASUREMENT = "broodminder"
+MQTT_DEFAULT_PORT = 1883
+
+SCHEME_TCP = "tcp"
+SCHEME_MQTT = "mqtt"
+
+# publish(topic, payload), e.g. through Home Assistant's MQTT integration
+Publish = Callable[[str, bytes], Awaitable[None]]
+
+
+@dataclass(frozen=True, slots=True)
+class ForwardTarget:
+    """Where to forward readings to."""
+
+    scheme: str
+    host: str  # MQTT: empty for any broker of Home Assistant's MQTT integration
+    port: int
+    topic: str | None = None
+
+    @property
+    def mqtt(self) -> bool:
+        """Whether batches are published through Home Assistant's MQTT integration."""
+        return self.scheme == SCHEME_MQTT
+
+
+def parse_target(url: str) -> ForwardTarget:
+    """Parse a ``tcp://`` or ``mqtt://`` URL, raises ValueError when invalid.
+
+    An ``mqtt://`` URL only names the broker to check that the MQTT integration is
+    connected to it, ``mqtt:///topic`` accepts its broker whichever it is.
+    """
+    parts = urlsplit(url.strip())
+    if parts.scheme not in (SCHEME_TCP, SCHEME_MQTT):
+        raise ValueError(f"Unsupported scheme: {parts.scheme!r}")
+
+    port = parts.port  # raises ValueError when out of range
+    if parts.scheme == SCHEME_TCP:
+        if not parts.hostname:
+            raise ValueError("Missing host")
+        if port is None:
+            raise ValueError("Missing port")
+        return ForwardTarget(SCHEME_TCP, parts.hostname, port)
+
+    topic = parts.path.lstrip("/")
+    if not topic:
+        raise ValueError("Missing topic")
+    if parts.username is not None:
+        raise ValueError("Unsupported credentials, the MQTT integration has them")
+    if not parts.hostname:
+        if parts.netloc:
+            raise ValueError("Missing host")
+        return ForwardTarget(SCHEME_MQTT, "", 0, topic=unquote(topic))
+    return ForwardTarget(
+        SCHEME_MQTT, parts.hostname, port or MQTT_DEFAULT_PORT, topic=unquote(topic)
+    )
+
+
+def _escape_tag(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+
+def to_line_protocol(parsed: ManufacturerData, timestamp: float) -> str | None:
+    """Format one reading, or None when it carries no values."""
+    fields: list[str] = []
+    for name in VALUE_FIELDS:
+        value = getattr(parsed, name)
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            fields.append(f"{name}={int(value.timestamp())}i")
+        elif isinstance(value, int):
+            fields.append(f"{name}={value}i")
+        else:
+            fields.append(f"{name}={value!r}")
+    if not fields:
+        return None
+
+    tags = f"address={_escape_tag(parsed.address)}"
+    if (model := ID_TO_MODEL.get(parsed.model)) is not None:
+        tags += f",model={_escape_tag(model)}"
+    return f"{MEASUREMENT},{tags} {','.join(fields)} {int(timestamp * 1e9)}"
+
+
+class Forwarder:
+    """Batches readings and writes them over one connection or through ``publish``."""
+
+    def __init__(
+        self,
+        target: ForwardTarget,
+        batch_size: int = FORWARD_BATCH_SIZE,
+        flush_interval: float = FORWARD_FLUSH_INTERVAL,
+        buffer_size: int = FORWARD_BUFFER_SIZE,
+        publish: Publish | None = None,
+    ) -> None:
+        """Initialize the forwarder, nothing is sent until ``run`` is started.
+
+        MQTT targets need ``publish``, raises ValueError without it.
+        """
+        if target.mqtt and publish is None:
+            raise ValueError("MQTT targets are published through the MQTT integration")
+        self.target = target
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._buffer: deque[str] = deque(maxlen=buffer_size)
+        self._wakeup = asyncio.Event()
+        self._publish = publish
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task[None] | None = None
+        self._backoff = 0.0
+
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @property
+    def buffered(self) -> int:
+        """Lines waiting to be written."""
+        return len(self._buffer)
+
+    def add(self, parsed: ManufacturerData, timestamp: float) -> None:
+        """Queue a reading (event loop)."""
+        if (line := to_line_protocol(parsed, timestamp)) is None:
+            return
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(line)
+        if len(buffer) >= self._batch_size:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        """Write batches until cancelled."""
+        try:
+            while True:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+                self._wakeup.clear()
+                if not await self.flush() and self._backoff:
+                    await asyncio.sleep(self._backoff)
+        finally:
+            await self.close()
+
+    async def flush(self) -> bool:
+        """Write everything buffered, returns False when the connection failed."""
+        while self._buffer:
+            count = min(len(self._buffer), self._batch_size)
+            batch = list(islice(self._buffer, count))
+            dropped = self.dropped
+            try:
+                await self._write("\n".join(batch) + "\n")
+            except (OSError, EOFError) as err:
+                self.errors += 1
+                self._backoff = min(FORWARD_MAX_BACKOFF, max(1.0, self._backoff * 2))
+                _LOGGER.debug("Forwarding to %s failed: %s", self.target.host, err)
+                await self._disconnect()
+                return False
+            # Lines dropped while writing were evicted from the front of the batch
+            for _ in range(max(0, count - (self.dropped - dropped))):
+                self._buffer.popleft()
+            self.sent += count
+            self._backoff = 0.0
+        return True
+
+    async def close(self) -> None:
+        """Close the connection, buffered lines are kept."""
+        await self._disconnect()
+
+    async def _write(self, data: str) -> None:
+        payload = data.encode()
+        if self._publish is not None:
+            await self._publish(self.target.topic or MEASUREMENT, payload)
+            return
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            # Closed by the peer while idle: reconnect right away
+            await self._disconnect()
+            writer = await self._connect()
+        writer.write(payload)
+        await writer.drain()
+        if writer is not self._writer or writer.is_closing():
+            raise ConnectionResetError("Connection lost")
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        reader, writer = await asyncio.open_connection(self.target.host, self.target.port)
+        self._writer = writer
+        self._reader_task = asyncio.create_task(self._read(reader, writer))
+        return writer
+
+    async def _read(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Read until the peer closes the connection, then close it on our side."""
+        with contextlib.suppress(OSError):
+            while await reader.read(256):
+                pass
+        writer.close()
+
+    async def _disconnect(self) -> None:
+        writer, self._writer = self._writer, None
+        if (task := self._reader_task) is not None:
+            self._reader_task = None
+            task.cancel()
+        if writer is None:
+            return
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
@@ -0,0 +1,112 @@
+"""Reception health and staleness tracking.
+
+Nothing in this module depends on Home Assistant; the coordinator feeds it with the
+receipt time and RSSI of every advertisement.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import heapq
+
+from .const import RECEPTION_EWMA_ALPHA
+
+
+@dataclass(slots=True)
+class ReceptionStats:
+    """Per-device reception statistics, updated in O(1) per advertisement."""
+
+    count: int = 0
+    last_seen: float | None = None  # monotonic, as BluetoothServiceInfoBleak.time
+    last_seen_timestamp: float | None = None  # seconds since the epoch
+    interval_ewma: float | None = None  # seconds between advertisements
+    rssi_ewma: float | None = None  # dBm
+
+    def add(self, monotonic: float, timestamp: float, rssi: int | None) -> None:
+        """Account for one received advertisement."""
+        if self.last_seen is not None:
+            interval = max(0.0, monotonic - self.last_seen)
+            if self.interval_ewma is None:
+                self.interval_ewma = interval
+            else:
+                self.interval_ewma += RECEPTION_EWMA_ALPHA * (interval - self.interval_ewma)
+
+        if rssi is not None:
+            if self.rssi_ewma is None:
+                self.rssi_ewma = float(rssi)
+            else:
+                self.rssi_ewma += RECEPTION_EWMA_ALPHA * (rssi - self.rssi_ewma)
+
+        self.count += 1
+        self.last_seen = monotonic
+        self.last_seen_timestamp = timestamp
+
+    @property
+    def rate_per_minute(self) -> float | None:
+        """Smoothed advertisement rate."""
+        if not self.interval_ewma:
+            return None
+        return 60.0 / self.interval_ewma
+
+
+class StalenessTracker:
+    """Flags devices that have not been heard within their staleness threshold.
+
+    A min-heap holds the deadlines to check. Advertisements that move a device's deadline
+    later only update it in a dict (O(1)); when the queued heap entry comes due it is
+    pushed back with the current deadline. A deadline moved earlier (a shorter threshold,
+    or a device tracked again after ``remove``) is pushed right away and the entry it
+    supersedes is discarded when popped. ``expire`` therefore costs O(log n) per device
+    that is due, and nothing per device that is not.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty tracker."""
+        self._heap: list[tuple[float, str]] = []
+        self._deadlines: dict[str, float] = {}
+        self._queued: dict[str, float] = {}  # address -> deadline of its live heap entry
+        self._stale: set[str] = set()
+
+    def __len__(self) -> int:
+        """Return the number of tracked devices."""
+        return len(self._deadlines)
+
+    @property
+    def stale(self) -> frozenset[str]:
+        """Addresses currently flagged stale."""
+        return frozenset(self._stale)
+
+    def touch(self, address: str, now: float, threshold: float) -> None:
+        """Record an advertisement from ``address`` received at ``now``."""
+        deadline = now + threshold
+        self._deadlines[address] = deadline
+        self._stale.discard(address)
+        queued = self._queued.get(address)
+        if queued is None or deadline < queued:
+            self._queued[address] = deadline
+            heapq.heappush(self._heap, (deadline, address))
+
+    def remove(self, address: str) -> None:
+        """Stop tracking ``address``; its heap entry is dropped when it comes due."""
+        self._deadlines.pop(address, None)
+        self._stale.discard(address)
+
+    def expire(self, now: float) -> list[str]:
+        """Return the addresses that became stale since the previous call."""
+        heap = self._heap
+        expired: list[str] = []
+        while heap and heap[0][0] <= now:
+            queued, address = heapq.heappop(heap)
+            if self._queued.get(address) != queued:
+                continue  # superseded by an earlier deadline
+            del self._queued[address]
+            deadline = self._deadlines.get(address)
+            if deadline is None:
+                continue
+            if deadline > now:
+                self._queued[address] = deadline
+                heapq.heappush(heap, (deadline, address))
+            else:
+                self._stale.add(address)
+                expired.append(address)
+        return expired
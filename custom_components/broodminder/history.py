@@ -0,0 +1,231 @@
+"""Compact in-memory history of decoded readings, independent of the recorder.
+
+Every device gets a ring buffer of ``capacity`` rows, stored column-wise in
+preallocated ``array`` objects: one ``'d'`` column of timestamps and one ``'i'`` column
+per field holding the fixed-point values of ``ManufacturerData`` (``MISSING`` when a
+field was absent). At most one row is kept per ``min_interval`` seconds, so memory is
+bounded by ``capacity`` and does not depend on the advertisement rate.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from array import array
+import struct
+from typing import Any
+
+from .ble_parser import ManufacturerData
+from .const import HISTORY_HOURS, HISTORY_MIN_INTERVAL
+
+MISSING = -(2**31)
+
+# ManufacturerData field -> (column name in query results, divisor)
+HISTORY_FIELDS: dict[str, tuple[str, int]] = {
+    "temperature_centi_c": ("temperature_c", 100),
+    "humidity_percent": ("humidity_percent", 1),
+    "battery_percent": ("battery_percent", 1),
+    "weight_l_dag": ("weight_l_kg", 100),
+    "weight_r_dag": ("weight_r_kg", 100),
+    "weight_l2_dag": ("weight_l2_kg", 100),
+    "weight_r2_dag": ("weight_r2_kg", 100),
+    "weight_realtime_total_dag": ("weight_realtime_total_kg", 100),
+    "swarm_state_numeric": ("swarm_state_numeric", 1),
+    "bee_count_in": ("bee_count_in", 1),
+    "bee_count_out": ("bee_count_out", 1),
+    "bee_traffic": ("bee_traffic", 1),
+}
+COLUMNS = tuple(column for column, _ in HISTORY_FIELDS.values())
+
+DEFAULT_CAPACITY = HISTORY_HOURS * 3600 // HISTORY_MIN_INTERVAL
+
+
+class HiveHistory:
+    """Ring buffer of the readings of one device."""
+
+    __slots__ = ("_columns", "_next", "_times", "capacity", "min_interval", "size")
+
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, min_interval: float = HISTORY_MIN_INTERVAL
+    ) -> None:
+        """Preallocate ``capacity`` rows."""
+        self.capacity = capacity
+        self.min_interval = min_interval
+        self.size = 0
+        self._next = 0
+        self._times = array("d", bytes(8 * capacity))
+        self._columns = {field: array("i", [MISSING]) * capacity for field in HISTORY_FIELDS}
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes allocated for the columns."""
+        return sum(
+            column.itemsize * len(column) for column in (self._times, *self._columns.values())
+        )
+
+    def add(self, parsed: ManufacturerData, timestamp: float) -> bool:
+        """Store a reading, returns False when it came too soon after the last row."""
+        if self.size:
+            last = self._times[(self._next - 1) % self.capacity]
+            if timestamp - last < self.min_interval:
+                return False
+
+        row = self._next
+        self._times[row] = timestamp
+        for field, column in self._columns.items():
+            value = getattr(parsed, field)
+            column[row] = MISSING if value is None else value
+        self._next = (row + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    def _ordered(self, column: array) -> array:
+        """The stored rows of ``column``, oldest first."""
+        first = (self._next - self.size) % self.capacity
+        if first + self.size <= self.capacity:
+            return column[first : first + self.size]
+        return column[first:] + column[: self._next]
+
+    def to_bytes(self) -> bytes:
+        """Snapshot payload: row count, field names, then each column oldest first."""
+        names = ",".join(self._columns).encode()
+        return b"".join(
+            (
+                struct.pack("<IH", self.size, len(names)),
+                names,
+                self._ordered(self._times).tobytes(),
+                *(self._ordered(column).tobytes() for column in self._columns.values()),
+            )
+        )
+
+    def restore(self, data: bytes) -> None:
+        """Replace the rows by those of a ``to_bytes`` payload.
+
+        Fields unknown to this version are skipped, new fields stay ``MISSING``, and
+        only the newest ``capacity`` rows are kept.
+        """
+        size, length = struct.unpack_from("<IH", data)
+        offset = 6 + length
+        names = data[6:offset].decode().split(",") if length else []
+        if len(data) != offset + size * (8 + 4 * len(names)):
+            raise ValueError("history payload size mismatch")
+
+        times = array("d", data[offset : offset + 8 * size])
+        offset += 8 * size
+        stored: dict[str, array] = {}
+        for name in names:
+            stored[name] = array("i", data[offset : offset + 4 * size])
+            offset += 4 * size
+
+        keep = min(size, self.capacity)
+        self._times[:keep] = times[size - keep :]
+        for field, column in self._columns.items():
+            values = stored.get(field)
+            column[:keep] = (
+                array("i", [MISSING]) * keep if values is None else values[size - keep :]
+            )
+        self.size = keep
+        self._next = keep % self.capacity
+
+    def query(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        columns: tuple[str, ...] = COLUMNS,
+    ) -> dict[str, list[Any]]:
+        """Return ``{"time": [...], column: [...]}`` for ``start <= time <= end``."""
+        first = (self._next - self.size) % self.capacity
+        rows = [(first + offset) % self.capacity for offset in range(self.size)]
+        times = self._times
+        lo = 0 if start is None else self._bisect(rows, start)
+        hi = len(rows) if end is None else self._bisect(rows, end, right=True)
+        rows = rows[lo:hi]
+
+        result: dict[str, list[Any]] = {"time": [times[row] for row in rows]}
+        for field, (name, divisor) in HISTORY_FIELDS.items():
+            if name not in columns:
+                continue
+            column = self._columns[field]
+            if divisor == 1:
+                values = [None if column[row] == MISSING else column[row] for row in rows]
+            else:
+                values = [
+                    None if column[row] == MISSING else column[row] / divisor for row in rows
+                ]
+            result[name] = values
+        return result
+
+    def _bisect(self, rows: list[int], timestamp: float, right: bool = False) -> int:
+        times = self._times
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = times[rows[mid]]
+            if value < timestamp or (right and value == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class HistoryStore:
+    """Histories of all devices."""
+
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, min_interval: float = HISTORY_MIN_INTERVAL
+    ) -> None:
+        """Initialize an empty store."""
+        self._capacity = capacity
+        self._min_interval = min_interval
+        self._histories: dict[str, HiveHistory] = {}
+
+    def __contains__(self, address: str) -> bool:
+        """Return whether ``address`` has a history."""
+        return address in self._histories
+
+    def add(self, parsed: ManufacturerData, timestamp: float) -> bool:
+        """Store a reading of ``parsed.address``."""
+        if (history := self._histories.get(parsed.address)) is None:
+            history = self._histories[parsed.address] = HiveHistory(
+                self._capacity, self._min_interval
+            )
+        return history.add(parsed, timestamp)
+
+    def query(
+        self,
+        address: str,
+        start: float | None = None,
+        end: float | None = None,
+        columns: tuple[str, ...] = COLUMNS,
+    ) -> dict[str, list[Any]] | None:
+        """Columnar readings of ``address``, None when it has no history."""
+        if (history := self._histories.get(address)) is None:
+            return None
+        return history.query(start, end, columns)
+
+    def forget(self, address: str) -> None:
+        """Drop the history of ``address``."""
+        self._histories.pop(address, None)
+
+    def snapshot(self, address: str) -> bytes | None:
+        """Snapshot payload of the history of ``address`` (see snapshot.py)."""
+        if (history := self._histories.get(address)) is None:
+            return None
+        return history.to_bytes()
+
+    def restore(self, address: str, data: bytes) -> None:
+        """Restore the history of ``address`` from a snapshot payload."""
+        history = HiveHistory(self._capacity, self._min_interval)
+        history.restore(data)
+        self._histories[address] = history
+
+    def info(self) -> dict[str, Any]:
+        """Size of the store."""
+        histories = self._histories.values()
+        return {
+            "devices": len(self._histories),
+            "rows": sum(history.size for history in histories),
+            "capacity_per_device": self._capacity,
+            "min_interval": self._min_interval,
+            "memory_bytes": sum(history.memory_bytes for history in histories),
+        }
@@ -0,0 +1,294 @@
+"""Declarative per-model payload layouts.
+
+Each model maps to a tuple of ``FieldSpec`` entries that name a ``ManufacturerData``
+attribute, the payload offsets it is read from and the codec that converts the raw
+bytes. ``compile_layout`` turns such a tuple into a decoder, so every field is decoded
+exactly once and only for the models that actually carry it. Supporting a new model
+means adding a table entry; the parser itself does not change.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import Any
+
+from .const import (
+    IDX_BATTERY,
+    IDX_BEEDAR_IN_H,
+    IDX_BEEDAR_IN_L,
+    IDX_BEEDAR_OUT_H,
+    IDX_BEEDAR_OUT_L,
+    IDX_BEEDAR_TRAFFIC_H,
+    IDX_BEEDAR_TRAFFIC_L,
+    IDX_ELAPSED_H,
+    IDX_ELAPSED_L,
+    IDX_HUMIDITY,
+    IDX_RT_TEMP1_L,
+    IDX_RT_TEMP2_L,
+    IDX_RT_TOTAL_H,
+    IDX_RT_TOTAL_L_OR_SWARM_STATE,
+    IDX_TEMP_H,
+    IDX_TEMP_L,
+    IDX_WEIGHT_L_H,
+    IDX_WEIGHT_L_L,
+    IDX_WEIGHT_R_H,
+    IDX_WEIGHT_R_L,
+    IDX_WL2_SM0,
+    IDX_WL2_SM1,
+    IDX_WR2_SM2,
+    IDX_WR2_SM3,
+    INVALID_U16,
+    INVALID_WEIGHTS,
+    METADATA_CACHE_SIZE,
+    MODEL_BEEDAR,
+    MODEL_DIY,
+    MODEL_HUB,
+    MODEL_SUBHUB,
+    MODEL_T,
+    MODEL_TH,
+    MODEL_W,
+    MODEL_W3_W4,
+    NO_HUMIDITY_MODELS,
+    SENSOR_PERCENTAGE_MAXIMUM,
+    SENSOR_PERCENTAGE_MINIMUM,
+    SPECIAL_TEMP_MODELS_F,
+    SWARM_TIME_SYNCED_AFTER,
+    TEMPERATURE_OFFSET_CENTI_C,
+    WEIGHT_OFFSET_DAG,
+)
+
+# Decoders index into bytes or a memoryview directly, nothing is sliced or copied.
+Payload = Sequence[int]
+Decoder = Callable[[Payload], dict[str, Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class FieldSpec:
+    """One field of an advertisement payload."""
+
+    name: str  # ManufacturerData attribute
+    offsets: tuple[int, ...]  # payload indices handed to the codec, LSB first
+    codec: Callable[..., Any]  # codec(payload, *offsets) -> value or None
+
+    @property
+    def min_length(self) -> int:
+        """Payload length required to decode this field."""
+        return max(self.offsets) + 1
+
+
+# Codecs
+
+
+def u8(payload: Payload, idx: int) -> int:
+    """Single unsigned byte."""
+    return payload[idx]
+
+
+def u16(payload: Payload, lo: int, hi: int) -> int:
+    """Little-endian unsigned 16-bit value."""
+    return payload[lo] | (payload[hi] << 8)
+
+
+def counter(payload: Payload, lo: int, hi: int) -> int | None:
+    """Little-endian unsigned 16-bit counter, 0xFFFF means not available."""
+    raw = payload[lo] | (payload[hi] << 8)
+    if raw == INVALID_U16:
+        return None
+
+    return raw
+
+
+def battery_percent(payload: Payload, idx: int) -> int | None:
+    """Battery percentage, clamped to HA's 0..100 expectation (some frames exceed 100)."""
+    raw = payload[idx]
+    if raw < 0:
+        return None
+
+    return min(SENSOR_PERCENTAGE_MAXIMUM, max(SENSOR_PERCENTAGE_MINIMUM, raw))
+
+
+def humidity_percent(payload: Payload, idx: int) -> int | None:
+    """Relative humidity, values outside 0..100 are invalid."""
+    raw = payload[idx]
+    if not (SENSOR_PERCENTAGE_MINIMUM <= raw <= SENSOR_PERCENTAGE_MAXIMUM):
+        return None
+
+    return raw
+
+
+def temperature_centi_c(payload: Payload, lo: int, hi: int) -> int | None:
+    """Temperature in centi-°C, sent with a +5000 offset."""
+    raw = payload[lo] | (payload[hi] << 8)
+    if raw == INVALID_U16:
+        return None
+
+    return raw - TEMPERATURE_OFFSET_CENTI_C
+
+
+# SHT-like formula from the docs, T = raw / 2**16 * 165 - 40 °C, precomputed in
+# centi-°C (rounded) for every raw value.
+SHT_CENTI_C = array("h", ((raw * 16500 + 32768) // 65536 - 4000 for raw in range(65536)))
+
+
+def temperature_sht(payload: Payload, lo: int, hi: int) -> int | None:
+    """Temperature in centi-°C via the SHT-like formula (models 41/42/43)."""
+    raw = payload[lo] | (payload[hi] << 8)
+    if raw == INVALID_U16:
+        return None
+
+    return SHT_CENTI_C[raw]
+
+
+def weight_dag(payload: Payload, lo: int, hi: int) -> int | None:
+    """Weight channel in decagrams (1/100 kg), sent with a +32767 offset."""
+    raw = payload[lo] | (payload[hi] << 8)
+
+    if raw in INVALID_WEIGHTS:
+        return None
+
+    return raw - WEIGHT_OFFSET_DAG
+
+
+@lru_cache(maxsize=METADATA_CACHE_SIZE)
+def _swarm_datetime(swarm_time_unix: int) -> datetime | None:
+    # The swarm time of a device rarely changes, so nearly every frame is a cache hit
+    try:
+        return datetime.fromtimestamp(swarm_time_unix, tz=UTC)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def swarm_time_utc(payload: Payload, b0: int, b1: int, b2: int, b3: int) -> datetime | None:
+    """Four little-endian bytes as UTC datetime, None while the clock is not synced."""
+    raw = payload[b0] | (payload[b1] << 8) | (payload[b2] << 16) | (payload[b3] << 24)
+    if raw < SWARM_TIME_SYNCED_AFTER:
+        return None
+
+    return _swarm_datetime(raw)
+
+
+def swarm_time_since_boot(payload: Payload, b0: int, b1: int, b2: int, b3: int) -> int | None:
+    """The same bytes as seconds since boot, when the clock is not synced (0: no swarm)."""
+    raw = payload[b0] | (payload[b1] << 8) | (payload[b2] << 16) | (payload[b3] << 24)
+    if not 0 < raw < SWARM_TIME_SYNCED_AFTER:
+        return None
+
+    return raw
+
+
+# Field groups
+
+
+def _temperature_fields(model: int | None) -> tuple[FieldSpec, ...]:
+    codec = temperature_sht if model in SPECIAL_TEMP_MODELS_F else temperature_centi_c
+    return (
+        FieldSpec("temperature_centi_c", (IDX_TEMP_L, IDX_TEMP_H), codec),
+        FieldSpec("temperature_rt_centi_c", (IDX_RT_TEMP1_L, IDX_RT_TEMP2_L), codec),
+    )
+
+
+def _header_fields() -> tuple[FieldSpec, ...]:
+    return (
+        FieldSpec("battery_percent", (IDX_BATTERY,), battery_percent),
+        FieldSpec("elapsed_s", (IDX_ELAPSED_L, IDX_ELAPSED_H), u16),
+    )
+
+
+def _common_fields(model: int | None) -> tuple[FieldSpec, ...]:
+    fields = (*_header_fields(), *_temperature_fields(model))
+    if model not in NO_HUMIDITY_MODELS:
+        fields = (*fields, FieldSpec("humidity_percent", (IDX_HUMIDITY,), humidity_percent))
+    return fields
+
+
+SWARM_TIME_OFFSETS = (IDX_WL2_SM0, IDX_WL2_SM1, IDX_WR2_SM2, IDX_WR2_SM3)
+
+SWARM_FIELDS = (
+    FieldSpec("swarm_time_utc", SWARM_TIME_OFFSETS, swarm_time_utc),
+    FieldSpec("swarm_time_since_boot_s", SWARM_TIME_OFFSETS, swarm_time_since_boot),
+    FieldSpec("swarm_state_numeric", (IDX_RT_TOTAL_L_OR_SWARM_STATE,), u8),
+)
+
+WEIGHT_FIELDS = (
+    FieldSpec("weight_l_dag", (IDX_WEIGHT_L_L, IDX_WEIGHT_L_H), weight_dag),
+    FieldSpec("weight_r_dag", (IDX_WEIGHT_R_L, IDX_WEIGHT_R_H), weight_dag),
+    FieldSpec("weight_l2_dag", (IDX_WL2_SM0, IDX_WL2_SM1), weight_dag),
+    FieldSpec("weight_r2_dag", (IDX_WR2_SM2, IDX_WR2_SM3), weight_dag),
+    FieldSpec(
+        "weight_realtime_total_dag", (IDX_RT_TOTAL_L_OR_SWARM_STATE, IDX_RT_TOTAL_H), weight_dag
+    ),
+)
+
+BEE_COUNTER_FIELDS = (
+    FieldSpec("bee_count_in", (IDX_BEEDAR_IN_L, IDX_BEEDAR_IN_H), counter),
+    FieldSpec("bee_count_out", (IDX_BEEDAR_OUT_L, IDX_BEEDAR_OUT_H), counter),
+    FieldSpec("bee_traffic", (IDX_BEEDAR_TRAFFIC_L, IDX_BEEDAR_TRAFFIC_H), counter),
+)
+
+# Layout table
+MODEL_LAYOUTS: dict[int, tuple[FieldSpec, ...]] = {
+    **{model: (*_common_fields(model), *SWARM_FIELDS) for model in MODEL_T | MODEL_TH},
+    # The DIY scale kit uses the four-channel W3/W4 frame
+    **{
+        model: (*_common_fields(model), *WEIGHT_FIELDS)
+        for model in MODEL_W | MODEL_W3_W4 | MODEL_DIY
+    },
+    **{model: (*_common_fields(model), *BEE_COUNTER_FIELDS) for model in MODEL_BEEDAR},
+    # Hubs relay other devices' data; their own frame only carries the header fields.
+    **{model: _header_fields() for model in MODEL_SUBHUB | MODEL_HUB},
+}
+
+# Models not in the table only get the common fields.
+DEFAULT_LAYOUT = _common_fields(None)
+
+
+def compile_layout(specs: tuple[FieldSpec, ...]) -> Decoder:
+    """Compile a layout into a decoder returning ``{attribute: value}``.
+
+    Fields are ordered by the payload length they need, so decoding a short frame stops
+    at the first field that is out of range instead of guarding every read.
+    """
+    plan = tuple(
+        (spec.min_length, spec.name, spec.codec, spec.offsets)
+        for spec in sorted(specs, key=lambda spec: spec.min_length)
+    )
+
+    def decode(payload: Payload) -> dict[str, Any]:
+        length = len(payload)
+        values: dict[str, Any] = {}
+        for min_length, name, codec, offsets in plan:
+            if length < min_length:
+                break
+            values[name] = codec(payload, *offsets)
+        return values
+
+    return decode
+
+
+DECODERS: dict[int, Decoder] = {
+    model: compile_layout(specs) for model, specs in MODEL_LAYOUTS.items()
+}
+DEFAULT_DECODER = compile_layout(DEFAULT_LAYOUT)
+
+
+def get_decoder(model: int, fields: frozenset[str] | None = None) -> Decoder:
+    """Return the decoder of ``model``, limited to ``fields`` when given."""
+    if fields is None:
+        return DECODERS.get(model, DEFAULT_DECODER)
+    return _compile_selected(model, fields)
+
+
+@lru_cache(maxsize=64)
+def _compile_selected(model: int, fields: frozenset[str]) -> Decoder:
+    specs = MODEL_LAYOUTS.get(model, DEFAULT_LAYOUT)
+    return compile_layout(tuple(spec for spec in specs if spec.name in fields))
+
+
+def model_fields(model: int | None) -> tuple[str, ...]:
+    """Names of the fields ``model`` carries (the default layout when unknown)."""
+    specs = DEFAULT_LAYOUT if model is None else MODEL_LAYOUTS.get(model, DEFAULT_LAYOUT)
+    return tuple(spec.name for spec in specs)
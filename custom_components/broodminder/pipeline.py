@@ -0,0 +1,305 @@
+"""Post-processing pipeline run after parse_manufacturer_data.
+
+Stages derive extra entity values (filters, analytics) from parsed advertisements. A
+stage declares where it runs: inline on the event loop (``offload = False``), fine for
+O(1) or O(window) bookkeeping whose values go out with the same entity update, or
+offloaded to a small bounded worker pool for anything heavier.
+
+Offloaded work is queued per device address. While a device already has a frame
+waiting, a newer frame replaces it (merge); when the queue is full, frames of devices
+that are not queued yet are dropped. A device never has more than one job in flight,
+so an offloaded stage only sees one thread at a time per address. Results are handed
+back to the event loop in batches, with a single thread-safe callback per batch.
+
+The event loop never touches the state of an offloaded stage that a worker may use:
+
+* after each frame the worker also takes the stage's snapshot of the address, and
+  ``snapshot`` returns the latest of these immutable copies
+* ``forget`` and ``restore`` of an address with a job in flight wait until the job is
+  back, the outdated results of that job are discarded
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import logging
+import threading
+from typing import Any
+
+from .ble_parser import ManufacturerData
+
+_LOGGER = logging.getLogger(__name__)
+
+DerivedValues = dict[str, Any]
+ResultBatch = list[tuple[str, DerivedValues]]
+# Address, values and the snapshots of the offloaded stages by stage name
+_JobResult = tuple[str, DerivedValues, dict[str, bytes]]
+
+
+class Stage(ABC):
+    """Base class of a post-processing stage."""
+
+    name = "stage"
+    offload = False  # True: run in the worker pool instead of on the event loop
+
+    @abstractmethod
+    def process(self, parsed: ManufacturerData, timestamp: float) -> DerivedValues | None:
+        """Return derived entity values for a reading taken at ``timestamp`` (or None)."""
+
+    def forget(self, address: str) -> None:  # noqa: B027
+        """Drop any state kept for ``address``."""
+
+    def snapshot(self, address: str) -> bytes | None:
+        """Return the state kept for ``address`` as bytes, None when there is none.
+
+        Called on the event loop for inline stages and in a worker for offloaded ones,
+        see snapshot.py.
+        """
+        return None
+
+    def restore(self, address: str, data: bytes) -> None:  # noqa: B027
+        """Restore the state of ``address`` from ``snapshot`` bytes."""
+
+
+def _run_stages(
+    stages: tuple[Stage, ...], parsed: ManufacturerData, timestamp: float
+) -> DerivedValues:
+    """Run ``stages`` and merge their values, a failing stage is logged and skipped."""
+    derived: DerivedValues = {}
+    for stage in stages:
+        try:
+            values = stage.process(parsed, timestamp)
+        except Exception:
+            _LOGGER.exception("Stage %s failed for %s", stage.name, parsed.address)
+            continue
+        if values:
+            derived.update(values)
+    return derived
+
+
+def _snapshot_stages(stages: tuple[Stage, ...], address: str) -> dict[str, bytes]:
+    """Stage name -> snapshot bytes of the stages keeping state for ``address``."""
+    sections: dict[str, bytes] = {}
+    for stage in stages:
+        try:
+            data = stage.snapshot(address)
+        except Exception:
+            _LOGGER.exception("Stage %s failed to snapshot %s", stage.name, address)
+            continue
+        if data is not None:
+            sections[stage.name] = data
+    return sections
+
+
+def _restore_stages(stages: tuple[Stage, ...], address: str, sections: dict[str, bytes]) -> None:
+    """Hand each of ``stages`` its snapshot bytes of ``address``."""
+    for stage in stages:
+        if (data := sections.get(stage.name)) is None:
+            continue
+        try:
+            stage.restore(address, data)
+        except Exception:
+            _LOGGER.warning("Stage %s could not restore %s", stage.name, address)
+            stage.forget(address)
+
+
+class Pipeline:
+    """Runs inline stages directly and offloaded stages in a bounded worker pool."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        call_soon_threadsafe: Callable[[Callable[[], None]], Any],
+        on_results: Callable[[ResultBatch], None],
+    ) -> None:
+        """Initialize the pipeline.
+
+        ``call_soon_threadsafe`` schedules a callable on the event loop and
+        ``on_results`` receives the batched results of offloaded stages there.
+        """
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._call_soon_threadsafe = call_soon_threadsafe
+        self._on_results = on_results
+        self._executor: ThreadPoolExecutor | None = None
+        self._stopped: ThreadPoolExecutor | None = None
+
+        # Replaced, never mutated, so workers can iterate without locking
+        self._inline: tuple[Stage, ...] = ()
+        self._offloaded: tuple[Stage, ...] = ()
+
+        # Only touched from the event loop
+        self._pending: OrderedDict[str, tuple[ManufacturerData, float]] = OrderedDict()
+        self._in_flight: set[str] = set()
+        self._snapshots: dict[str, dict[str, bytes]] = {}  # of the offloaded stages
+        self._held: dict[str, list[Callable[[], None]]] = {}  # run once the job is back
+
+        # Shared with the workers
+        self._lock = threading.Lock()
+        self._results: list[_JobResult] = []
+        self._flush_scheduled = False
+
+        self.merged = 0
+        self.dropped = 0
+
+    @property
+    def stages(self) -> tuple[Stage, ...]:
+        """All registered stages."""
+        return (*self._inline, *self._offloaded)
+
+    @property
+    def pending(self) -> int:
+        """Number of devices waiting for the worker pool."""
+        return len(self._pending)
+
+    def add_stage(self, stage: Stage) -> Callable[[], None]:
+        """Register a stage, returns a callable that removes it again."""
+        if stage.offload:
+            self._offloaded = (*self._offloaded, stage)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="broodminder"
+                )
+        else:
+            self._inline = (*self._inline, stage)
+
+        def _remove() -> None:
+            self._inline = tuple(s for s in self._inline if s is not stage)
+            self._offloaded = tuple(s for s in self._offloaded if s is not stage)
+
+        return _remove
+
+    def forget(self, address: str) -> None:
+        """Drop queued work and stage state of ``address``."""
+        self._pending.pop(address, None)
+        for stage in self._inline:
+            stage.forget(address)
+        self._when_idle(address, partial(self._forget_offloaded, address))
+
+    def snapshot(self, address: str) -> dict[str, bytes]:
+        """Stage name -> snapshot bytes of the stages keeping state for ``address``."""
+        return {
+            **_snapshot_stages(self._inline, address),
+            **self._snapshots.get(address, {}),
+        }
+
+    def restore(self, address: str, sections: dict[str, bytes]) -> None:
+        """Hand each stage its snapshot bytes of ``address``."""
+        _restore_stages(self._inline, address, sections)
+        self._when_idle(address, partial(self._restore_offloaded, address, sections))
+
+    def stats(self) -> dict[str, int]:
+        """Counters of the worker pool for diagnostics."""
+        return {
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "merged": self.merged,
+            "dropped": self.dropped,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, queued work is discarded (event loop)."""
+        self._pending.clear()
+        if (executor := self._executor) is not None:
+            self._executor = None
+            self._stopped = executor
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def join(self) -> None:
+        """Wait until the worker threads of the stopped pool have exited (blocking)."""
+        if (executor := self._stopped) is not None:
+            executor.shutdown(wait=True)
+
+    def process(self, parsed: ManufacturerData, timestamp: float) -> DerivedValues:
+        """Run the inline stages and queue the offloaded ones (event loop).
+
+        ``timestamp`` is when the reading was taken (Unix time): the receipt time of the
+        advertisement, or the start of its bin with resampling.
+        """
+        derived = _run_stages(self._inline, parsed, timestamp)
+        if self._offloaded and self._executor is not None:
+            self._enqueue(parsed, timestamp)
+        return derived
+
+    def _when_idle(self, address: str, action: Callable[[], None]) -> None:
+        """Run ``action`` now, or once the job of ``address`` is back (event loop)."""
+        if address in self._in_flight:
+            self._held.setdefault(address, []).append(action)
+        else:
+            action()
+
+    def _forget_offloaded(self, address: str) -> None:
+        self._snapshots.pop(address, None)
+        for stage in self._offloaded:
+            stage.forget(address)
+
+    def _restore_offloaded(self, address: str, sections: dict[str, bytes]) -> None:
+        _restore_stages(self._offloaded, address, sections)
+        # Not in flight, so reading the restored state here races with no worker
+        self._snapshots[address] = _snapshot_stages(self._offloaded, address)
+
+    def _enqueue(self, parsed: ManufacturerData, timestamp: float) -> None:
+        address = parsed.address
+        if address in self._pending:
+            # Newest frame wins, the device keeps its place in the queue
+            self._pending[address] = (parsed, timestamp)
+            self.merged += 1
+        elif len(self._pending) >= self._max_pending:
+            self.dropped += 1
+            return
+        else:
+            self._pending[address] = (parsed, timestamp)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        executor = self._executor
+        if executor is None:
+            return
+        while self._pending and len(self._in_flight) < self._max_workers:
+            address = next((a for a in self._pending if a not in self._in_flight), None)
+            if address is None:
+                return
+            parsed, timestamp = self._pending.pop(address)
+            self._in_flight.add(address)
+            executor.submit(self._run_offloaded, self._offloaded, parsed, timestamp)
+
+    def _run_offloaded(
+        self, stages: tuple[Stage, ...], parsed: ManufacturerData, timestamp: float
+    ) -> None:
+        """Run the offloaded stages for one frame and snapshot them (worker thread)."""
+        derived = _run_stages(stages, parsed, timestamp)
+        snapshots = _snapshot_stages(stages, parsed.address)
+        with self._lock:
+            self._results.append((parsed.address, derived, snapshots))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._call_soon_threadsafe(self._flush)
+
+    def _flush(self) -> None:
+        """Deliver the collected results in one batch (event loop)."""
+        with self._lock:
+            results, self._results = self._results, []
+            self._flush_scheduled = False
+
+        batch: ResultBatch = []
+        for address, values, snapshots in results:
+            self._in_flight.discard(address)
+            if (held := self._held.pop(address, None)) is not None:
+                # Forgotten or restored while the job ran, its results are outdated
+                for action in held:
+                    action()
+                continue
+            self._snapshots[address] = snapshots
+            if values:
+                batch.append((address, values))
+        if batch:
+            self._on_results(batch)
+        self._dispatch()
@@ -0,0 +1,371 @@
+"""Reprocess seasons of captures into per-hive summaries on all cores.
+
+The work is split in two parallel phases::
+
+    plan_chunks(paths) -> map: decode_chunk(chunk) -> {address: HiveSeries}
+                       -> merge per address
+                       -> reduce: summarise_hive(series) -> per-hive summary
+
+Line-oriented captures (hex, JSON lines) are cut into byte ranges of ``chunk_bytes``,
+so even a single large file is decoded by every worker. Each worker keeps only the
+values the summary needs, in compact ``array`` columns, which are cheap to send back
+to the parent. The merged series are then summarised per address, again in the pool.
+
+Per hive the summary holds, per UTC day, the weight delta and the temperature mean,
+standard deviation and share of samples in the brood zone, plus the swarm candidates
+found by ``HiveEventDetector`` (swarm states and sudden weight drops).
+
+With NumPy installed (always the case next to Home Assistant) chunks are decoded in
+batches of ``BATCH_SIZE`` frames by ``batch.decode_batch``, otherwise frame by frame.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from itertools import islice
+import json
+import math
+import os
+from pathlib import Path
+from typing import IO, Any
+
+from .ble_parser import ManufacturerData
+from .capture import (
+    FORMAT_AUTO,
+    FORMAT_BTMON,
+    READERS,
+    CaptureFrame,
+    decode_frames,
+    detect_format,
+)
+from .const import (
+    BROOD_ZONE_MAX_CENTI_C,
+    BROOD_ZONE_MIN_CENTI_C,
+    EVENT_SWARM,
+    EVENT_WEIGHT_DROP,
+    ID_TO_MODEL,
+)
+from .events import HiveEventDetector, total_weight_dag
+from .history import MISSING
+
+try:
+    import numpy as np
+
+    from . import batch
+except ImportError:  # NumPy is optional outside Home Assistant
+    np = batch = None
+
+BATCH_AVAILABLE = batch is not None
+
+CHUNK_BYTES = 64 * 1024 * 1024
+BATCH_SIZE = 65536  # frames per vectorized decode
+
+# Fields decoded for the series (the total weight is summed from the channels)
+SERIES_FIELDS = (
+    "temperature_centi_c",
+    "weight_l_dag",
+    "weight_r_dag",
+    "weight_l2_dag",
+    "weight_r2_dag",
+    "swarm_state_numeric",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Chunk:
+    """Byte range of a capture file; lines starting in ``[start, end)`` belong to it."""
+
+    path: Path
+    fmt: str
+    start: int = 0
+    end: int | None = None
+
+
+@dataclass(slots=True)
+class HiveSeries:
+    """The values of one hive needed for its summary, column-wise."""
+
+    address: str
+    model: int | None = None
+    times: array = field(default_factory=lambda: array("d"))
+    temperature: array = field(default_factory=lambda: array("i"))  # centi-°C
+    weight: array = field(default_factory=lambda: array("i"))  # total, decagrams
+    swarm_state: array = field(default_factory=lambda: array("i"))
+
+    def __len__(self) -> int:
+        """Return the number of samples."""
+        return len(self.times)
+
+    def add(self, parsed: ManufacturerData, timestamp: float) -> None:
+        """Append one decoded advertisement."""
+        self.model = parsed.model
+        self.times.append(timestamp)
+        self.temperature.append(_or_missing(parsed.temperature_centi_c))
+        self.weight.append(_or_missing(total_weight_dag(parsed)))
+        self.swarm_state.append(_or_missing(parsed.swarm_state_numeric))
+
+    def add_columns(
+        self, model: int, times: Any, temperature: Any, weight: Any, swarm_state: Any
+    ) -> None:
+        """Append decoded NumPy columns, integers already ``MISSING`` where absent."""
+        self.model = model
+        self.times.frombytes(times.astype(np.float64).tobytes())
+        self.temperature.frombytes(temperature.astype(np.intc).tobytes())
+        self.weight.frombytes(weight.astype(np.intc).tobytes())
+        self.swarm_state.frombytes(swarm_state.astype(np.intc).tobytes())
+
+    def extend(self, other: HiveSeries) -> None:
+        """Append the samples of ``other``, e.g. from another chunk."""
+        self.model = other.model if other.model is not None else self.model
+        self.times.extend(other.times)
+        self.temperature.extend(other.temperature)
+        self.weight.extend(other.weight)
+        self.swarm_state.extend(other.swarm_state)
+
+
+def _or_missing(value: int | None) -> int:
+    return MISSING if value is None else value
+
+
+def plan_chunks(
+    paths: Iterable[Path], fmt: str = FORMAT_AUTO, chunk_bytes: int = CHUNK_BYTES
+) -> list[Chunk]:
+    """Split the captures into chunks that can be decoded independently."""
+    chunks: list[Chunk] = []
+    for path in paths:
+        path_fmt = detect_format(path) if fmt == FORMAT_AUTO else fmt
+        size = path.stat().st_size
+        if path_fmt == FORMAT_BTMON or size <= chunk_bytes:
+            # btmon reports span several lines, keep the file in one piece
+            chunks.append(Chunk(path, path_fmt))
+            continue
+        chunks.extend(
+            Chunk(path, path_fmt, start, min(start + chunk_bytes, size))
+            for start in range(0, size, chunk_bytes)
+        )
+    return chunks
+
+
+def iter_chunk_lines(chunk: Chunk) -> Iterator[str]:
+    """Yield the lines that start within the chunk's byte range."""
+    with chunk.path.open("rb") as f:
+        if chunk.start:
+            # Skip the line in progress, the previous chunk owns it
+            f.seek(chunk.start - 1)
+            f.readline()
+        while chunk.end is None or f.tell() < chunk.end:
+            line = f.readline()
+            if not line:
+                return
+            yield line.decode("utf-8", errors="replace")
+
+
+def decode_chunk(chunk: Chunk) -> tuple[dict[str, HiveSeries], int]:
+    """Decode a chunk into series per address (process pool entry point).
+
+    Returns the series and the number of decoded frames without a timestamp, which
+    cannot be placed in time and are skipped.
+    """
+    frames = READERS[chunk.fmt](iter_chunk_lines(chunk))
+    if batch is None:
+        return _decode_frames(frames)
+    return _decode_batches(frames)
+
+
+def _decode_frames(frames: Iterator[CaptureFrame]) -> tuple[dict[str, HiveSeries], int]:
+    series: dict[str, HiveSeries] = {}
+    untimed = 0
+    for frame, parsed in decode_frames(frames):
+        if parsed is None:
+            continue
+        if frame.timestamp is None:
+            untimed += 1
+            continue
+        if (hive := series.get(frame.address)) is None:
+            hive = series[frame.address] = HiveSeries(frame.address)
+        hive.add(parsed, frame.timestamp)
+    return series, untimed
+
+
+def _missing(column: Any) -> Any:
+    return np.where(np.isnan(column), MISSING, column)
+
+
+def _decode_batches(frames: Iterator[CaptureFrame]) -> tuple[dict[str, HiveSeries], int]:
+    series: dict[str, HiveSeries] = {}
+    untimed = 0
+    while block := list(islice(frames, BATCH_SIZE)):
+        matrix, lengths = batch.pack_payloads([frame.payload for frame in block])
+        columns = batch.decode_batch(matrix, lengths, SERIES_FIELDS)
+        times = np.array(
+            [np.nan if frame.timestamp is None else frame.timestamp for frame in block]
+        )
+        timed = ~np.isnan(times)
+        untimed += int(np.count_nonzero(columns["valid"] & ~timed))
+        rows = np.flatnonzero(columns["valid"] & timed)
+        if not len(rows):
+            continue
+
+        channels = np.stack([columns[name][rows] for name in SERIES_FIELDS[1:5]])
+        weight = np.where(np.isnan(channels).all(axis=0), MISSING, np.nansum(channels, axis=0))
+        temperature = _missing(columns["temperature_centi_c"][rows])
+        swarm_state = _missing(columns["swarm_state_numeric"][rows])
+        models = columns["model"][rows]
+        times = times[rows]
+
+        # Group the rows by address, keeping their order within each address
+        addresses = np.array([block[row].address for row in rows])
+        order = np.argsort(addresses, kind="stable")
+        unique, starts = np.unique(addresses[order], return_index=True)
+        for address, start, end in zip(
+            unique.tolist(), starts, [*starts[1:], len(order)], strict=True
+        ):
+            group = order[start:end]
+            if (hive := series.get(address)) is None:
+                hive = series[address] = HiveSeries(address)
+            hive.add_columns(
+                int(models[group[-1]]),
+                times[group],
+                temperature[group],
+                weight[group],
+                swarm_state[group],
+            )
+    return series, untimed
+
+
+@dataclass(slots=True)
+class _Day:
+    first_weight: int | None = None
+    last_weight: int | None = None
+    samples: int = 0
+    temperatures: int = 0
+    temperature_sum: int = 0
+    temperature_squares: int = 0
+    in_brood_zone: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        result: dict[str, Any] = {"samples": self.samples}
+        if self.first_weight is not None and self.last_weight is not None:
+            result["weight_kg"] = self.last_weight / 100
+            result["weight_delta_kg"] = (self.last_weight - self.first_weight) / 100
+        if n := self.temperatures:
+            # Integer sums of centi-°C, so the variance is exact up to the final division
+            variance = (n * self.temperature_squares - self.temperature_sum**2) / n**2
+            result["temperature_mean_c"] = round(self.temperature_sum / n / 100, 2)
+            result["temperature_std_c"] = round(math.sqrt(max(0.0, variance)) / 100, 3)
+            result["brood_zone_fraction"] = round(self.in_brood_zone / n, 3)
+        return result
+
+
+def summarise_hive(series: HiveSeries) -> dict[str, Any]:
+    """Daily metrics and swarm candidates of one hive (process pool entry point)."""
+    times = series.times
+    order = sorted(range(len(times)), key=times.__getitem__)
+    days: dict[int, _Day] = {}  # keyed by days since the epoch (UTC)
+    candidates: list[dict[str, Any]] = []
+    detector = HiveEventDetector()
+    model = series.model if series.model is not None else 0
+
+    for index in order:
+        timestamp = times[index]
+        day_number = int(timestamp // 86400)
+        if (day := days.get(day_number)) is None:
+            day = days[day_number] = _Day()
+        day.samples += 1
+
+        weight = series.weight[index]
+        if weight != MISSING:
+            if day.first_weight is None:
+                day.first_weight = weight
+            day.last_weight = weight
+        temperature = series.temperature[index]
+        if temperature != MISSING:
+            day.temperatures += 1
+            day.temperature_sum += temperature
+            day.temperature_squares += temperature * temperature
+            day.in_brood_zone += BROOD_ZONE_MIN_CENTI_C <= temperature <= BROOD_ZONE_MAX_CENTI_C
+        swarm_state = series.swarm_state[index]
+
+        # The detector only needs the total weight, passed as a single channel
+        reading = ManufacturerData(
+            address=series.address,
+            model=model,
+            firmware=None,
+            device_name=series.address,
+            device_id=series.address,
+            weight_l_dag=None if weight == MISSING else weight,
+            swarm_state_numeric=None if swarm_state == MISSING else swarm_state,
+        )
+        for event_type, data in detector.update(reading, timestamp):
+            if event_type in (EVENT_SWARM, EVENT_WEIGHT_DROP):
+                del data["address"], data["name"]
+                candidates.append(
+                    {
+                        "time": datetime.fromtimestamp(timestamp, UTC).isoformat(),
+                        "event": event_type,
+                        **data,
+                    }
+                )
+
+    return {
+        "address": series.address,
+        "model": ID_TO_MODEL.get(model, model),
+        "samples": len(series),
+        "first": datetime.fromtimestamp(times[order[0]], UTC).isoformat() if order else None,
+        "last": datetime.fromtimestamp(times[order[-1]], UTC).isoformat() if order else None,
+        "days": {
+            datetime.fromtimestamp(number * 86400, UTC).date().isoformat(): day.as_dict()
+            for number, day in sorted(days.items())
+        },
+        "swarm_candidates": candidates,
+    }
+
+
+def reprocess(
+    paths: Iterable[Path],
+    fmt: str = FORMAT_AUTO,
+    jobs: int | None = None,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> dict[str, Any]:
+    """Decode and summarise captures, ``jobs`` processes (default: all cores)."""
+    jobs = jobs or os.cpu_count() or 1
+    chunks = plan_chunks(paths, fmt, chunk_bytes)
+    merged: dict[str, HiveSeries] = {}
+    untimed = 0
+
+    def merge(results: Iterable[tuple[dict[str, HiveSeries], int]]) -> None:
+        nonlocal untimed
+        for series, chunk_untimed in results:
+            untimed += chunk_untimed
+            for address, hive in series.items():
+                if address in merged:
+                    merged[address].extend(hive)
+                else:
+                    merged[address] = hive
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            merge(pool.map(decode_chunk, chunks))
+            hives = list(pool.map(summarise_hive, merged.values()))
+    else:
+        merge(map(decode_chunk, chunks))
+        hives = [summarise_hive(hive) for hive in merged.values()]
+
+    return {
+        "generated": datetime.now(UTC).isoformat(),
+        "chunks": len(chunks),
+        "untimed_frames": untimed,
+        "hives": {hive["address"]: hive for hive in sorted(hives, key=lambda h: h["address"])},
+    }
+
+
+def write_summary(summary: dict[str, Any], out: IO[str]) -> None:
+    """Write the summary as compact JSON."""
+    json.dump(summary, out, separators=(",", ":"))
+    out.write("\n")
@@ -0,0 +1,139 @@
+"""Resampling of a hive's readings to a fixed time grid.
+
+Advertisements arrive irregularly: every few seconds through several proxies, or not at
+all for a while. ``Resampler`` turns them into one grid point per ``interval`` second
+bin of Unix time, stamped with the start of the bin, so entities, the history and the
+forwarded readings get exactly one update per bin that had readings.
+
+The device counts its samples in ``elapsed_s``. A frame repeating the sample count of
+the previous one is the same sample heard again (another proxy or the next
+advertisement) and is skipped. Without a sample count every frame is a sample.
+
+Two methods:
+
+* ``last`` - the last sample of the bin
+* ``mean`` - the time-weighted mean of ``MEAN_FIELDS``: each sample holds until the next
+  one, at most ``interval`` seconds, also from the previous bin into this one. Other
+  fields (battery, swarm state, counters) take the last sample's value.
+
+A bin is closed by the first sample of a later bin or by ``flush`` once its end has
+passed. Bins without a sample produce no grid point.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from dataclasses import replace
+
+from .ble_parser import ManufacturerData
+from .const import RESAMPLE_LAST, RESAMPLE_MEAN
+
+# Fixed-point fields averaged by the mean method, rounded back to integers
+MEAN_FIELDS = (
+    "temperature_centi_c",
+    "temperature_rt_centi_c",
+    "humidity_percent",
+    "weight_l_dag",
+    "weight_r_dag",
+    "weight_l2_dag",
+    "weight_r2_dag",
+    "weight_realtime_total_dag",
+)
+
+GridPoint = tuple[ManufacturerData, float]  # values, start of the bin (Unix time)
+
+
+class Resampler:
+    """Grid points of one device."""
+
+    __slots__ = (
+        "_bin",
+        "_last",
+        "_last_time",
+        "_sums",
+        "_weights",
+        "duplicates",
+        "interval",
+        "mean",
+        "points",
+    )
+
+    def __init__(self, interval: float, method: str) -> None:
+        """Initialize for bins of ``interval`` seconds."""
+        self.interval = interval
+        self.mean = method == RESAMPLE_MEAN
+        self.points = 0  # grid points produced
+        self.duplicates = 0  # frames skipped, same sample count as the previous one
+        self._bin: float | None = None  # start of the open bin
+        self._last: ManufacturerData | None = None
+        self._last_time = 0.0
+        self._sums: dict[str, float] = {}
+        self._weights: dict[str, float] = {}
+
+    def add(self, parsed: ManufacturerData, now: float) -> GridPoint | None:
+        """Add a frame received at ``now``, returns the grid point of a closed bin."""
+        last = self._last
+        if (
+            last is not None
+            and parsed.elapsed_s is not None
+            and parsed.elapsed_s == last.elapsed_s
+        ):
+            self.duplicates += 1
+            return None
+
+        point = None
+        if self._bin is not None and now >= self._bin + self.interval:
+            point = self._close()
+        if self._bin is None:
+            self._bin = now - now % self.interval
+            self._sums.clear()
+            self._weights.clear()
+        if self.mean and last is not None:
+            self._accumulate(self._bin, now)
+        self._last = parsed
+        self._last_time = now
+        return point
+
+    def flush(self, now: float) -> GridPoint | None:
+        """Close the open bin once ``now`` is past its end."""
+        if self._bin is None or now < self._bin + self.interval:
+            return None
+        return self._close()
+
+    def _accumulate(self, bin_start: float, until: float) -> None:
+        """Add the previous sample, held from its time (or the bin start) until ``until``."""
+        start = max(self._last_time, bin_start)
+        seconds = min(until, self._last_time + self.interval) - start
+        if seconds <= 0:
+            return
+        for name in MEAN_FIELDS:
+            if (value := getattr(self._last, name)) is not None:
+                self._sums[name] = self._sums.get(name, 0.0) + value * seconds
+                self._weights[name] = self._weights.get(name, 0.0) + seconds
+
+    def _close(self) -> GridPoint:
+        start = self._bin
+        self._bin = None
+        values = self._last
+        if self.mean:
+            self._accumulate(start, start + self.interval)
+            values = replace(
+                values,
+                **{
+                    name: round(self._sums[name] / weight)
+                    for name, weight in self._weights.items()
+                    if getattr(values, name) is not None
+                },
+            )
+        self.points += 1
+        return values, start
+
+    def dump(self) -> dict[str, float | int | str]:
+        """State for diagnostics."""
+        return {
+            "interval": self.interval,
+            "method": RESAMPLE_MEAN if self.mean else RESAMPLE_LAST,
+            "points": self.points,
+            "duplicates": self.duplicates,
+        }
@@ -0,0 +1,126 @@
+"""Adaptive publish rate per device.
+
+Every advertisement is still parsed, recorded in the history and checked for events,
+but the entity states are only written when ``PublishScheduler`` says so. It tracks a
+smoothed rate of change of each channel in ``PUBLISH_CHANNELS`` and publishes about
+once per ``step`` of change, i.e. every ``step / velocity`` seconds, bounded by the
+configured minimum and maximum interval. A quiet hive at night or in winter is
+published at the maximum interval, a hive on a nectar flow much more often.
+
+A change of at least ``bypass`` since the last published value, or any swarm state
+transition, is published immediately.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from .ble_parser import ManufacturerData
+from .const import PUBLISH_VELOCITY_ALPHA
+from .events import total_weight_dag
+
+# Channel -> (step, bypass), in the fixed-point units of ManufacturerData
+PUBLISH_CHANNELS: dict[str, tuple[int, int]] = {
+    "temperature": (10, 100),  # 0.1 °C, 1 °C
+    "humidity": (1, 5),  # %
+    "weight": (5, 50),  # 50 g, 0.5 kg (total of all scale channels)
+}
+
+
+def _channels(parsed: ManufacturerData) -> dict[str, int]:
+    values = {
+        "temperature": parsed.temperature_centi_c,
+        "humidity": parsed.humidity_percent,
+        "weight": total_weight_dag(parsed),
+    }
+    return {channel: value for channel, value in values.items() if value is not None}
+
+
+class PublishScheduler:
+    """Decides which advertisements of one device are published."""
+
+    __slots__ = (
+        "_last",
+        "_last_published",
+        "_last_time",
+        "_published_at",
+        "_swarm_state",
+        "_velocity",
+        "held",
+        "max_interval",
+        "min_interval",
+    )
+
+    def __init__(self, min_interval: float, max_interval: float) -> None:
+        """Initialize, the first advertisement is always published."""
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.held = 0  # advertisements not published
+        self._published_at: float | None = None
+        self._last_published: dict[str, int] = {}
+        self._last: dict[str, int] = {}
+        self._last_time: float | None = None
+        self._velocity: dict[str, float] = {}  # smoothed |change| per second
+        self._swarm_state: int | None = None
+
+    @property
+    def interval(self) -> float:
+        """Current publish interval in seconds."""
+        interval = self.max_interval
+        for channel, velocity in self._velocity.items():
+            if velocity > 0:
+                interval = min(interval, PUBLISH_CHANNELS[channel][0] / velocity)
+        return max(self.min_interval, interval)
+
+    def should_publish(self, parsed: ManufacturerData, now: float) -> bool:
+        """Account for an advertisement, return whether to write the entity states."""
+        values = _channels(parsed)
+        self._update_velocity(values, now)
+
+        state = parsed.swarm_state_numeric
+        swarm_transition = state is not None and state != self._swarm_state
+        if state is not None:
+            self._swarm_state = state
+
+        if (
+            self._published_at is None
+            or swarm_transition
+            or now - self._published_at >= self.interval
+            or self._large_change(values)
+        ):
+            self._published_at = now
+            self._last_published.update(values)
+            return True
+        self.held += 1
+        return False
+
+    def _update_velocity(self, values: dict[str, int], now: float) -> None:
+        elapsed = None if self._last_time is None else now - self._last_time
+        if elapsed is not None and elapsed > 0:
+            for channel, value in values.items():
+                if (last := self._last.get(channel)) is None:
+                    continue
+                velocity = abs(value - last) / elapsed
+                if (smoothed := self._velocity.get(channel)) is None:
+                    self._velocity[channel] = velocity
+                else:
+                    self._velocity[channel] = smoothed + PUBLISH_VELOCITY_ALPHA * (
+                        velocity - smoothed
+                    )
+        self._last.update(values)
+        self._last_time = now
+
+    def _large_change(self, values: dict[str, int]) -> bool:
+        for channel, value in values.items():
+            published = self._last_published.get(channel)
+            if published is None or abs(value - published) >= PUBLISH_CHANNELS[channel][1]:
+                return True
+        return False
+
+    def dump(self) -> dict[str, float | int]:
+        """State for diagnostics."""
+        return {
+            "interval": round(self.interval, 1),
+            "held": self.held,
+            **{f"velocity_{c}": round(v, 6) for c, v in self._velocity.items()},
+        }
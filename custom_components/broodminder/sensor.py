@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
 import logging
+import time
 from typing import Any
 
 from homeassistant import config_entries
@@ -19,28 +23,69 @@ from homeassistant.components.sensor import (
     SensorEntityDescription,
     SensorStateClass,
 )
-from homeassistant.const import PERCENTAGE, UnitOfMass, UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    PERCENTAGE,
+    SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    EntityCategory,
+    UnitOfMass,
+    UnitOfTemperature,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+from homeassistant.helpers.typing import StateType
+from homeassistant.util import dt as dt_util
 
-from .ble_parser import ManufacturerData, extract_entities
+from .ble_parser import (
+    ENTITY_FIELDS,
+    IMPERIAL_ENTITIES,
+    IMPERIAL_TO_METRIC,
+    ManufacturerData,
+    extract_entities,
+)
 from .const import (
     DOMAIN,
+    GROUP_BROOD,
+    GROUP_LATENCY,
+    GROUP_LOAD,
+    GROUP_RECEPTION,
     MANUFACTURER,
+    METADATA_CACHE_SIZE,
+    SENSOR_ADV_RATE,
     SENSOR_BATT,
+    SENSOR_BEE_COUNT_IN,
+    SENSOR_BEE_COUNT_OUT,
+    SENSOR_BEE_TRAFFIC,
+    SENSOR_BROOD_CONFIDENCE,
+    SENSOR_BROOD_ZONE_TIME,
+    SENSOR_FRAMES_SHED,
+    SENSOR_GROUPS,
     SENSOR_HUM,
+    SENSOR_LAST_SEEN,
+    SENSOR_LATENCY_P50,
+    SENSOR_LATENCY_P95,
+    SENSOR_LATENCY_P99,
+    SENSOR_RSSI,
     SENSOR_SAMPLE_COUNT,
+    SENSOR_SPIKES_REJECTED,
     SENSOR_SWARM_STATE,
     SENSOR_SWARM_TIME,
+    SENSOR_SWARM_TIME_SINCE_BOOT,
     SENSOR_TEMP,
     SENSOR_TEMP_RT,
+    SENSOR_TEMP_STD,
     SENSOR_WEIGHT_L,
     SENSOR_WEIGHT_L2,
     SENSOR_WEIGHT_R,
     SENSOR_WEIGHT_R2,
     SENSOR_WEIGHT_REALTIME,
+    UNITS_IMPERIAL,
+    UNITS_METRIC,
 )
+from .coordinator import BroodMinderCoordinator
+from .filters import FILTERED_SUFFIX
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -85,17 +130,220 @@ class BMDescriptions:
     swarm_time: SensorEntityDescription = SensorEntityDescription(
         key=SENSOR_SWARM_TIME, icon="mdi:clock-outline"
     )
+    swarm_time_since_boot: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_SWARM_TIME_SINCE_BOOT,
+        icon="mdi:timer-sand",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+    )
+    bee_count_in: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_BEE_COUNT_IN, icon="mdi:bee-flower"
+    )
+    bee_count_out: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_BEE_COUNT_OUT, icon="mdi:bee-flower"
+    )
+    bee_traffic: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_BEE_TRAFFIC, icon="mdi:bee"
+    )
+    last_seen: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_LAST_SEEN,
+        icon="mdi:clock-check-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+    )
+    adv_rate: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_ADV_RATE, icon="mdi:access-point", entity_category=EntityCategory.DIAGNOSTIC
+    )
+    rssi: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_RSSI,
+        icon="mdi:signal",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    )
+    latency_p50: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_LATENCY_P50,
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    )
+    latency_p95: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_LATENCY_P95,
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    )
+    latency_p99: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_LATENCY_P99,
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    )
+    frames_shed: SensorEntityDescription = SensorEntityDescription(
+        key=SENSOR_FRAMES_SHED,
+        icon="mdi:layers-remove",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    )
 
 
 DESCRIPTIONS = BMDescriptions()
 
+# Entities produced by post-processing stages (pipeline.py): key -> (description, name).
+# Unit, device class and state class are taken from the description.
+DERIVED_SENSORS: dict[str, tuple[SensorEntityDescription, str]] = {}
 
-def sensor_update_to_bluetooth_data_update(
-    parsed: ManufacturerData,
-) -> PassiveBluetoothDataUpdate[Any]:
-    """Build a PassiveBluetoothDataUpdate for the processor."""
-    entities = extract_entities(parsed)
-    device = DeviceInfo(
+# Entity key -> its group of diagnostic or derived sensors (CONF_SENSOR_GROUPS)
+GROUP_OF_SENSOR = {key: group for group, keys in SENSOR_GROUPS.items() for key in keys}
+
+
+def _filtered(key: str, name: str, imperial: bool = False) -> tuple[SensorEntityDescription, str]:
+    """Describe the spike-filtered twin (filters.py) of a temperature or weight sensor."""
+    is_temperature = key == SENSOR_TEMP
+    if imperial:
+        key = IMPERIAL_ENTITIES[key][0]
+        unit = UnitOfTemperature.FAHRENHEIT if is_temperature else UnitOfMass.POUNDS
+        name = f"{name} Filtered (°F)" if is_temperature else f"{name} Filtered (lb)"
+    else:
+        unit = UnitOfTemperature.CELSIUS if is_temperature else UnitOfMass.KILOGRAMS
+        name = f"{name} Filtered"
+    return (
+        SensorEntityDescription(
+            key=key + FILTERED_SUFFIX,
+            icon="mdi:thermometer" if is_temperature else "mdi:scale",
+            device_class=(
+                SensorDeviceClass.TEMPERATURE if is_temperature else SensorDeviceClass.WEIGHT
+            ),
+            native_unit_of_measurement=unit,
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        name,
+    )
+
+
+_FILTERED_NAMES = (
+    (SENSOR_TEMP, "Temperature"),
+    (SENSOR_WEIGHT_L, "Weight Left"),
+    (SENSOR_WEIGHT_R, "Weight Right"),
+    (SENSOR_WEIGHT_L2, "Weight Left 2"),
+    (SENSOR_WEIGHT_R2, "Weight Right 2"),
+    (SENSOR_WEIGHT_REALTIME, "Weight Realtime"),
+)
+DERIVED_SENSORS.update(
+    {key + FILTERED_SUFFIX: _filtered(key, name) for key, name in _FILTERED_NAMES}
+)
+# Imperial twins of the filtered sensors, by filtered key: (description, name, conversion
+# of the raw integer). Like the advertised readings, they are converted per units option.
+FILTERED_IMPERIAL_SENSORS: dict[
+    str, tuple[SensorEntityDescription, str, Callable[[int], float]]
+] = {
+    key + FILTERED_SUFFIX: (*_filtered(key, name, imperial=True), IMPERIAL_ENTITIES[key][1])
+    for key, name in _FILTERED_NAMES
+}
+DERIVED_SENSORS[SENSOR_SPIKES_REJECTED] = (
+    SensorEntityDescription(
+        key=SENSOR_SPIKES_REJECTED,
+        icon="mdi:filter-remove",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    "Spikes Rejected",
+)
+# Brood stability (brood.py)
+DERIVED_SENSORS[SENSOR_TEMP_STD] = (
+    SensorEntityDescription(
+        key=SENSOR_TEMP_STD,
+        icon="mdi:thermometer-lines",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    "Temperature Deviation",
+)
+DERIVED_SENSORS[SENSOR_BROOD_ZONE_TIME] = (
+    SensorEntityDescription(
+        key=SENSOR_BROOD_ZONE_TIME,
+        icon="mdi:clock-check-outline",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    "Brood Zone Time",
+)
+DERIVED_SENSORS[SENSOR_BROOD_CONFIDENCE] = (
+    SensorEntityDescription(
+        key=SENSOR_BROOD_CONFIDENCE,
+        icon="mdi:egg-outline",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    "Brood Confidence",
+)
+
+
+# Imperial twins of the temperature and weight sensors: key -> (description, name).
+# Unit, device class and state class are taken from the description.
+IMPERIAL_SENSORS: dict[str, tuple[SensorEntityDescription, str]] = {}
+
+
+def _imperial(key: str, name: str) -> tuple[SensorEntityDescription, str]:
+    """Describe the °F or lb twin of a temperature or weight sensor."""
+    is_temperature = key in (SENSOR_TEMP, SENSOR_TEMP_RT)
+    return (
+        SensorEntityDescription(
+            key=IMPERIAL_ENTITIES[key][0],
+            icon="mdi:thermometer" if is_temperature else "mdi:scale",
+            device_class=(
+                SensorDeviceClass.TEMPERATURE if is_temperature else SensorDeviceClass.WEIGHT
+            ),
+            native_unit_of_measurement=(
+                UnitOfTemperature.FAHRENHEIT if is_temperature else UnitOfMass.POUNDS
+            ),
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        f"{name} (°F)" if is_temperature else f"{name} (lb)",
+    )
+
+
+IMPERIAL_SENSORS.update(
+    {
+        IMPERIAL_ENTITIES[key][0]: _imperial(key, name)
+        for key, name in (
+            (SENSOR_TEMP, "Temperature"),
+            (SENSOR_TEMP_RT, "Realtime Temp"),
+            (SENSOR_WEIGHT_L, "Weight Left"),
+            (SENSOR_WEIGHT_R, "Weight Right"),
+            (SENSOR_WEIGHT_L2, "Weight Left 2"),
+            (SENSOR_WEIGHT_R2, "Weight Right 2"),
+            (SENSOR_WEIGHT_REALTIME, "Weight Realtime"),
+        )
+    }
+)
+
+
+# device_id -> DeviceInfo, reused while the parser hands out the same cached strings
+_DEVICE_INFO_CACHE: dict[str, DeviceInfo] = {}
+
+
+def _get_device_info(parsed: ManufacturerData) -> DeviceInfo:
+    device = _DEVICE_INFO_CACHE.get(parsed.device_id)
+    if (
+        device is not None
+        and device.get("name") is parsed.device_name
+        and device.get("sw_version") is parsed.firmware
+    ):
+        return device
+
+    if len(_DEVICE_INFO_CACHE) >= METADATA_CACHE_SIZE:
+        _DEVICE_INFO_CACHE.clear()
+    device = _DEVICE_INFO_CACHE[parsed.device_id] = DeviceInfo(
         identifiers={(DOMAIN, parsed.device_id)},
         connections={("bluetooth", parsed.address)},
         manufacturer=MANUFACTURER,
@@ -103,67 +351,121 @@ def sensor_update_to_bluetooth_data_update(
         model=str(parsed.model),
         sw_version=parsed.firmware,
     )
+    return device
+
+
+# Sensors of the advertised readings: key -> (description, name)
+READING_SENSORS: dict[str, tuple[SensorEntityDescription, str]] = {
+    SENSOR_TEMP: (DESCRIPTIONS.temperature, "Temperature"),
+    SENSOR_TEMP_RT: (DESCRIPTIONS.temperature_rt, "Realtime Temp"),
+    SENSOR_HUM: (DESCRIPTIONS.humidity, "Humidity"),
+    SENSOR_BATT: (DESCRIPTIONS.battery, "Battery"),
+    SENSOR_SAMPLE_COUNT: (DESCRIPTIONS.sample_count, "Sample count"),
+    SENSOR_WEIGHT_L: (DESCRIPTIONS.weight_l, "Weight Left"),
+    SENSOR_WEIGHT_R: (DESCRIPTIONS.weight_r, "Weight Right"),
+    SENSOR_WEIGHT_L2: (DESCRIPTIONS.weight_l2, "Weight Left 2"),
+    SENSOR_WEIGHT_R2: (DESCRIPTIONS.weight_r2, "Weight Right 2"),
+    SENSOR_WEIGHT_REALTIME: (DESCRIPTIONS.weight_rt, "Weight Realtime"),
+    SENSOR_SWARM_STATE: (DESCRIPTIONS.swarm_state, "Swarm State"),
+    SENSOR_SWARM_TIME: (DESCRIPTIONS.swarm_time, "Swarm Time"),
+    SENSOR_SWARM_TIME_SINCE_BOOT: (DESCRIPTIONS.swarm_time_since_boot, "Swarm Time Since Boot"),
+    SENSOR_BEE_COUNT_IN: (DESCRIPTIONS.bee_count_in, "Bees In"),
+    SENSOR_BEE_COUNT_OUT: (DESCRIPTIONS.bee_count_out, "Bees Out"),
+    SENSOR_BEE_TRAFFIC: (DESCRIPTIONS.bee_traffic, "Traffic"),
+}
+
+# Adds one entity: key, value, description and name
+AddEntity = Callable[[str, Any, SensorEntityDescription, str], None]
+
+
+def _add_reading_entities(add: AddEntity, entities: dict[str, Any]) -> None:
+    """Add the sensors of the advertised readings and their imperial twins."""
+    for sensors in (READING_SENSORS, IMPERIAL_SENSORS):
+        for key, (description, name) in sensors.items():
+            if key in entities:
+                add(key, entities[key], description, name)
+
+
+def _add_reception_entities(add: AddEntity, coordinator: BroodMinderCoordinator) -> None:
+    """Add the reception health, latency and load shedding diagnostics that are selected."""
+    groups = coordinator.sensor_groups
+    reception = coordinator.reception
+    if GROUP_RECEPTION in groups:
+        if reception.last_seen_timestamp is not None:
+            add(
+                SENSOR_LAST_SEEN,
+                dt_util.utc_from_timestamp(reception.last_seen_timestamp),
+                DESCRIPTIONS.last_seen,
+                "Last Seen",
+            )
+        if (rate := reception.rate_per_minute) is not None:
+            add(SENSOR_ADV_RATE, round(rate, 2), DESCRIPTIONS.adv_rate, "Advertisement Rate")
+        if reception.rssi_ewma is not None:
+            add(SENSOR_RSSI, round(reception.rssi_ewma, 1), DESCRIPTIONS.rssi, "Signal Strength")
+
+    # End-to-end latency of the previous advertisements (tracing.py)
+    if GROUP_LATENCY in groups and (latency := coordinator.latency.percentiles()) is not None:
+        add(SENSOR_LATENCY_P50, round(latency[50], 1), DESCRIPTIONS.latency_p50, "Latency P50")
+        add(SENSOR_LATENCY_P95, round(latency[95], 1), DESCRIPTIONS.latency_p95, "Latency P95")
+        add(SENSOR_LATENCY_P99, round(latency[99], 1), DESCRIPTIONS.latency_p99, "Latency P99")
+
+    # Frames replaced by newer ones while shedding load (shedding.py)
+    if GROUP_LOAD in groups:
+        add(SENSOR_FRAMES_SHED, coordinator.shed, DESCRIPTIONS.frames_shed, "Frames Shed")
+
+
+def _add_derived_entities(add: AddEntity, coordinator: BroodMinderCoordinator) -> None:
+    """Add the values of the post-processing stages (pipeline.py) that are selected."""
+    brood = GROUP_BROOD in coordinator.sensor_groups
+    metric = coordinator.units != UNITS_IMPERIAL
+    imperial = coordinator.units != UNITS_METRIC
+    for key, value in coordinator.derived.items():
+        if value is None or (derived := DERIVED_SENSORS.get(key)) is None:
+            continue
+        if not brood and GROUP_OF_SENSOR.get(key) == GROUP_BROOD:
+            continue
+        if (twin := FILTERED_IMPERIAL_SENSORS.get(key)) is None:
+            add(key, value, *derived)
+            continue
+        if metric:
+            add(key, value, *derived)
+        if imperial:
+            description, name, convert = twin
+            # Filtered values are the raw integers / 100, as the metric readings
+            add(description.key, convert(round(value * 100)), description, name)
+
+
+def sensor_update_to_bluetooth_data_update(
+    parsed: ManufacturerData | None,
+    coordinator: BroodMinderCoordinator | None = None,
+) -> PassiveBluetoothDataUpdate[Any]:
+    """Build a PassiveBluetoothDataUpdate for the processor."""
+    if parsed is None:
+        # Advertisement without BroodMinder manufacturer data (e.g. a scan response)
+        return PassiveBluetoothDataUpdate(
+            devices={}, entity_descriptions={}, entity_data={}, entity_names={}
+        )
+
+    entities = extract_entities(
+        parsed, units=coordinator.units if coordinator is not None else UNITS_METRIC
+    )
+    device = _get_device_info(parsed)
 
     entity_descriptions: dict[PassiveBluetoothEntityKey, SensorEntityDescription] = {}
     entity_data: dict[PassiveBluetoothEntityKey, Any] = {}
     entity_names: dict[PassiveBluetoothEntityKey, str | None] = {}
 
-    def add(key: str, value: Any, description: SensorEntityDescription, name: str):
+    def add(key: str, value: Any, description: SensorEntityDescription, name: str) -> None:
         ek = PassiveBluetoothEntityKey(key=key, device_id=parsed.device_id)
         entity_descriptions[ek] = description
         entity_data[ek] = value
         entity_names[ek] = name
 
-    # Temperature
-    if SENSOR_TEMP in entities:
-        add(SENSOR_TEMP, entities[SENSOR_TEMP], DESCRIPTIONS.temperature, "Temperature")
-    if SENSOR_TEMP_RT in entities:
-        add(
-            SENSOR_TEMP_RT, entities[SENSOR_TEMP_RT], DESCRIPTIONS.temperature_rt, "Realtime Temp"
-        )
-
-    # Humidity / Battery / sample count
-    if SENSOR_HUM in entities:
-        add(SENSOR_HUM, entities[SENSOR_HUM], DESCRIPTIONS.humidity, "Humidity")
-    if SENSOR_BATT in entities:
-        add(SENSOR_BATT, entities[SENSOR_BATT], DESCRIPTIONS.battery, "Battery")
-    if SENSOR_SAMPLE_COUNT in entities:
-        add(
-            SENSOR_SAMPLE_COUNT,
-            entities[SENSOR_SAMPLE_COUNT],
-            DESCRIPTIONS.sample_count,
-            "Sample count",
-        )
-
-    # Weights
-    if SENSOR_WEIGHT_L in entities:
-        add(SENSOR_WEIGHT_L, entities[SENSOR_WEIGHT_L], DESCRIPTIONS.weight_l, "Weight Left")
-    if SENSOR_WEIGHT_R in entities:
-        add(SENSOR_WEIGHT_R, entities[SENSOR_WEIGHT_R], DESCRIPTIONS.weight_r, "Weight Right")
-    if SENSOR_WEIGHT_L2 in entities:
-        add(SENSOR_WEIGHT_L2, entities[SENSOR_WEIGHT_L2], DESCRIPTIONS.weight_l2, "Weight Left 2")
-    if SENSOR_WEIGHT_R2 in entities:
-        add(
-            SENSOR_WEIGHT_R2, entities[SENSOR_WEIGHT_R2], DESCRIPTIONS.weight_r2, "Weight Right 2"
-        )
-    if SENSOR_WEIGHT_REALTIME in entities:
-        add(
-            SENSOR_WEIGHT_REALTIME,
-            entities[SENSOR_WEIGHT_REALTIME],
-            DESCRIPTIONS.weight_rt,
-            "Weight Realtime",
-        )
-
-    # Swarm state & Swarm time
-    if SENSOR_SWARM_STATE in entities:
-        add(
-            SENSOR_SWARM_STATE,
-            entities[SENSOR_SWARM_STATE],
-            DESCRIPTIONS.swarm_state,
-            "Swarm State",
-        )
-    if SENSOR_SWARM_TIME in entities:
-        add(SENSOR_SWARM_TIME, entities[SENSOR_SWARM_TIME], DESCRIPTIONS.swarm_time, "Swarm Time")
+    _add_reading_entities(add, entities)
+    if coordinator is not None:
+        _add_reception_entities(add, coordinator)
+        _add_derived_entities(add, coordinator)
+        coordinator.latency.mark_built(time.monotonic())
 
     return PassiveBluetoothDataUpdate(
         devices={parsed.device_id: device},
@@ -179,40 +481,116 @@ async def async_setup_entry(
     async_add_entities: AddConfigEntryEntitiesCallback,
 ) -> None:
     """Set up the BroodMinder sensors."""
-    processor = PassiveBluetoothDataProcessor(sensor_update_to_bluetooth_data_update)
+    # Get coordinator stored by __init__.py
+    coordinator: BroodMinderCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    _async_remove_unused_entities(hass, entry, coordinator)
+
+    processor = BroodMinderDataProcessor(coordinator)
 
     # Create entities when new keys appear
     entry.async_on_unload(
         processor.async_add_entities_listener(BroodMinderSensorEntity, async_add_entities)
     )
 
-    # Get coordinator stored by __init__.py
-    coordinator = hass.data[DOMAIN][entry.entry_id]
-
     # Register the processor with the coordinator
     entry.async_on_unload(coordinator.async_register_processor(processor))
 
 
+class BroodMinderDataProcessor(
+    PassiveBluetoothDataProcessor[Any | None, ManufacturerData | None]
+):
+    """Processor that skips the advertisements held back by the publish scheduler."""
+
+    def __init__(self, coordinator: BroodMinderCoordinator) -> None:
+        """Initialize the processor for the sensors of ``coordinator``."""
+        super().__init__(partial(sensor_update_to_bluetooth_data_update, coordinator=coordinator))
+        self._coordinator = coordinator
+
+    @callback
+    def async_handle_update(
+        self, update: ManufacturerData | None, was_available: bool | None = None
+    ) -> None:
+        """Write the entity states, unless the device was available and is held back."""
+        if was_available and not self._coordinator.publish:
+            return
+        super().async_handle_update(update, was_available)
+
+
+def _async_remove_unused_entities(
+    hass: HomeAssistant,
+    entry: config_entries.ConfigEntry,
+    coordinator: BroodMinderCoordinator,
+) -> None:
+    """Drop registry entries of sensors no longer selected or not in the chosen units.
+
+    Diagnostic and derived sensors follow their group, the filtered twins and the
+    rejected spike count the spike filter option. Filtered twins also follow their
+    sensor's selection, metric and imperial ones (filtered or not) also the units.
+    """
+    sensors, units = coordinator.sensors, coordinator.units
+    registry = er.async_get(hass)
+    for entity in er.async_entries_for_config_entry(registry, entry.entry_id):
+        # Unique ids are "<address>-<key>-<device_id>"
+        parts = entity.unique_id.split("-")
+        if len(parts) < 2:  # noqa: PLR2004
+            continue
+        key = parts[1]
+        if (group := GROUP_OF_SENSOR.get(key)) is not None:
+            if group not in coordinator.sensor_groups:
+                registry.async_remove(entity.entity_id)
+            continue
+        if not coordinator.spike_filter and (
+            key == SENSOR_SPIKES_REJECTED or key.endswith(FILTERED_SUFFIX)
+        ):
+            registry.async_remove(entity.entity_id)
+            continue
+        key = key.removesuffix(FILTERED_SUFFIX)
+        if key in IMPERIAL_TO_METRIC:
+            key = IMPERIAL_TO_METRIC[key]
+            unused_units = units == UNITS_METRIC
+        else:
+            unused_units = units == UNITS_IMPERIAL and key in IMPERIAL_ENTITIES
+        if key not in ENTITY_FIELDS:
+            continue
+        if unused_units or (sensors is not None and key not in sensors):
+            registry.async_remove(entity.entity_id)
+
+
 class BroodMinderSensorEntity(
     PassiveBluetoothProcessorEntity[PassiveBluetoothDataProcessor[Any | None, ManufacturerData],],
     SensorEntity,
 ):
     """Entity for a BroodMinder reading."""
 
+    @property
+    def available(self) -> bool:
+        """Return whether the entity is available."""
+        # Keep reporting when the device was last heard, also while it is stale
+        if self.entity_key.key == SENSOR_LAST_SEEN:
+            return self.native_value is not None
+        return super().available
+
     # Provide the current value from the processor
     @property
-    def native_value(self):
+    def native_value(self) -> StateType | datetime:
+        """Return the value reported by the sensor."""
         # For timestamp sensors, ensure extract_entities() returns a datetime
         return self.processor.entity_data.get(self.entity_key)
 
     # Units
     @property
-    def native_unit_of_measurement(self):
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the unit of measurement of the value."""
         key = self.entity_key.key
         if key in (SENSOR_TEMP, SENSOR_TEMP_RT):
             return UnitOfTemperature.CELSIUS
         if key in (SENSOR_HUM, SENSOR_BATT):
             return PERCENTAGE
+        if key == SENSOR_RSSI:
+            return SIGNAL_STRENGTH_DECIBELS_MILLIWATT
+        if key == SENSOR_ADV_RATE:
+            return "1/min"
         if key in (
             SENSOR_WEIGHT_L,
             SENSOR_WEIGHT_R,
@@ -222,11 +600,13 @@ class BroodMinderSensorEntity(
         ):
             return UnitOfMass.KILOGRAMS
         # sample count, swarm_time (timestamp) and swarm_state (string) => no unit
-        return None
+        # derived sensors => from their description
+        return super().native_unit_of_measurement
 
     # Device classes
     @property
-    def device_class(self):
+    def device_class(self) -> SensorDeviceClass | None:
+        """Return the device class of the sensor."""
         key = self.entity_key.key
         if key in (SENSOR_TEMP, SENSOR_TEMP_RT):
             return SensorDeviceClass.TEMPERATURE
@@ -242,14 +622,18 @@ class BroodMinderSensorEntity(
             SENSOR_WEIGHT_REALTIME,
         ):
             return SensorDeviceClass.WEIGHT
-        if key == SENSOR_SWARM_TIME:
+        if key in (SENSOR_SWARM_TIME, SENSOR_LAST_SEEN):
             return SensorDeviceClass.TIMESTAMP
+        if key == SENSOR_RSSI:
+            return SensorDeviceClass.SIGNAL_STRENGTH
         # sample count,swarm_state: leave without a device class
-        return None
+        # derived sensors => from their description
+        return super().device_class
 
     # State class: only for numeric measurements (NOT for timestamp or string)
     @property
-    def state_class(self):
+    def state_class(self) -> SensorStateClass | str | None:
+        """Return the state class of the sensor."""
         key = self.entity_key.key
         if key in (
             SENSOR_TEMP,
@@ -261,7 +645,13 @@ class BroodMinderSensorEntity(
             SENSOR_WEIGHT_L2,
             SENSOR_WEIGHT_R2,
             SENSOR_WEIGHT_REALTIME,
+            SENSOR_BEE_COUNT_IN,
+            SENSOR_BEE_COUNT_OUT,
+            SENSOR_BEE_TRAFFIC,
+            SENSOR_ADV_RATE,
+            SENSOR_RSSI,
         ):
             return SensorStateClass.MEASUREMENT
         # timestamp and swarm_state should not have a state_class
-        return None
+        # derived sensors => from their description
+        return super().state_class
@@ -0,0 +1,73 @@
+"""Load shedding while Home Assistant's event loop is under pressure.
+
+``LoadMonitor`` watches two signals, both smoothed:
+
+* loop lag - how late a periodic probe callback runs on the event loop (recorder purges,
+  startup and other blocking work delay every callback)
+* backlog - how long advertisements waited between their receipt by the bluetooth
+  manager and ``_update_method``
+
+When either exceeds its limit the monitor starts shedding, and it stops once both have
+stayed below half their limit for ``SHED_HOLD_SECONDS``. While shedding, the coordinator
+only parses advertisements. It keeps the newest frame of its device and processes that
+one (events, history, forwarding, post-processing and the entity states) once per
+``SHED_FLUSH_INTERVAL``, older frames are shed. Swarm state transitions are processed
+immediately.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from .const import SHED_ALPHA, SHED_BACKLOG_LIMIT, SHED_HOLD_SECONDS, SHED_LOOP_LAG_LIMIT
+
+
+class LoadMonitor:
+    """Smoothed loop lag and update backlog, with hysteresis."""
+
+    __slots__ = ("_calm_since", "backlog", "lag", "shed", "shedding", "transitions")
+
+    def __init__(self) -> None:
+        """Initialize, not shedding."""
+        self.lag = 0.0  # seconds
+        self.backlog = 0.0  # seconds
+        self.shedding = False
+        self.shed = 0  # frames shed by all devices
+        self.transitions = 0  # times shedding started
+        self._calm_since: float | None = None
+
+    def add_lag(self, lag: float, now: float) -> None:
+        """A probe callback ran ``lag`` seconds late."""
+        self.lag += SHED_ALPHA * (max(0.0, lag) - self.lag)
+        self._evaluate(now)
+
+    def add_backlog(self, delay: float, now: float) -> None:
+        """An advertisement reached ``_update_method`` ``delay`` seconds after receipt."""
+        self.backlog += SHED_ALPHA * (max(0.0, delay) - self.backlog)
+        self._evaluate(now)
+
+    def _evaluate(self, now: float) -> None:
+        if self.lag > SHED_LOOP_LAG_LIMIT or self.backlog > SHED_BACKLOG_LIMIT:
+            if not self.shedding:
+                self.shedding = True
+                self.transitions += 1
+            self._calm_since = None
+        elif not self.shedding:
+            return
+        elif self.lag > SHED_LOOP_LAG_LIMIT / 2 or self.backlog > SHED_BACKLOG_LIMIT / 2:
+            self._calm_since = None
+        elif self._calm_since is None:
+            self._calm_since = now
+        elif now - self._calm_since >= SHED_HOLD_SECONDS:
+            self.shedding = False
+            self._calm_since = None
+
+    def dump(self) -> dict[str, float | int | bool]:
+        """State for diagnostics."""
+        return {
+            "shedding": self.shedding,
+            "loop_lag_ms": round(self.lag * 1000, 1),
+            "backlog_ms": round(self.backlog * 1000, 1),
+            "shed": self.shed,
+            "transitions": self.transitions,
+        }
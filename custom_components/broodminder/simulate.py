@@ -0,0 +1,334 @@
+"""Synthetic BroodMinder advertisements for tests and benchmarks.
+
+``Apiary`` simulates a number of virtual hives of mixed models (T, TH, W and W3/W4)
+advertising at a fixed interval. Each hive has a diurnal ambient temperature, a brood
+nest held near 35 °C (or not), nectar flow raising the weight during the day and
+evaporation lowering it at night, a draining battery and, for some hives, a swarm:
+the SwarmMinder states run through the swarm-detected states and the weight drops.
+Every advertisement can be heard by several proxies, which delivers duplicates with
+their own RSSI and a small delay, as Home Assistant's bluetooth stack sees them.
+
+Payloads are encoded by inverting the codecs of the model layouts in ``layout.py``,
+so they use exactly the byte layout the parser decodes. The generator is
+deterministic for a given seed.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+import heapq
+import math
+import random
+import time
+import tracemalloc
+from typing import Any
+
+from .const import (
+    IDX_MODEL,
+    IDX_VER_MAJOR,
+    IDX_VER_MINOR,
+    INVALID_U16,
+    INVALID_WEIGHTS,
+    MANUFACTURER_ID,
+    MODEL_T,
+    MODEL_TH,
+    MODEL_W3_W4,
+    TEMPERATURE_OFFSET_CENTI_C,
+    WEIGHT_OFFSET_DAG,
+)
+from .layout import (
+    DEFAULT_LAYOUT,
+    MODEL_LAYOUTS,
+    SHT_CENTI_C,
+    battery_percent,
+    counter,
+    humidity_percent,
+    swarm_time_since_boot,
+    swarm_time_utc,
+    temperature_centi_c,
+    temperature_sht,
+    u8,
+    u16,
+    weight_dag,
+)
+
+# Model ids used for each simulated model name (current firmware, centi-°C frames)
+SIMULATED_MODELS: dict[str, int] = {"T": 47, "TH": 56, "W": 57, "W3_W4": 49}
+
+PAYLOAD_LENGTH = 21
+FIRMWARE = (3, 26)  # major, minor
+
+# SwarmMinder states after a swarm, with their offset from the swarm in seconds
+SWARM_SEQUENCE = ((0, 29), (600, 40), (1800, 41), (7200, 60))
+SWARM_BASELINE_STATE = 20
+SWARM_MODELS = MODEL_T | MODEL_TH  # models reporting SwarmMinder states
+
+
+def _encode_sht(value: int | None) -> int:
+    if value is None:
+        return INVALID_U16
+    return min(bisect_left(SHT_CENTI_C, value), INVALID_U16 - 1)
+
+
+# Inverse of the layout codecs: value -> raw integer, written LSB first at the offsets
+ENCODERS: dict[Callable[..., Any], Callable[[Any], int]] = {
+    u8: lambda value: value or 0,
+    u16: lambda value: (value or 0) & 0xFFFF,
+    counter: lambda value: INVALID_U16 if value is None else value,
+    battery_percent: lambda value: value or 0,
+    humidity_percent: lambda value: 0xFF if value is None else value,
+    temperature_centi_c: lambda value: INVALID_U16
+    if value is None
+    else value + TEMPERATURE_OFFSET_CENTI_C,
+    temperature_sht: _encode_sht,
+    weight_dag: lambda value: INVALID_WEIGHTS[0] if value is None else value + WEIGHT_OFFSET_DAG,
+    swarm_time_utc: lambda value: 0 if value is None else int(value.timestamp()),
+    swarm_time_since_boot: lambda value: value or 0,
+}
+
+
+def encode_payload(
+    model: int, values: dict[str, Any], firmware: tuple[int, int] = FIRMWARE
+) -> bytes:
+    """Encode ``ManufacturerData`` field values as the payload of ``model``."""
+    payload = bytearray(PAYLOAD_LENGTH)
+    payload[IDX_MODEL] = model
+    payload[IDX_VER_MAJOR], payload[IDX_VER_MINOR] = firmware
+    written: set[int] = set()
+    for spec in MODEL_LAYOUTS.get(model, DEFAULT_LAYOUT):
+        value = values.get(spec.name)
+        if value is None and written.issuperset(spec.offsets):
+            continue  # bytes shared with a field that has a value (swarm time)
+        raw = ENCODERS[spec.codec](value)
+        for byte, offset in enumerate(spec.offsets):
+            payload[offset] = (raw >> (8 * byte)) & 0xFF
+        if value is not None:
+            written.update(spec.offsets)
+    return bytes(payload)
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticAdvertisement:
+    """One received advertisement, with the attributes of ``BluetoothServiceInfoBleak``."""
+
+    time: float  # seconds, monotonic like BluetoothServiceInfoBleak.time
+    address: str
+    name: str
+    rssi: int
+    source: str  # the adapter or proxy that received it
+    manufacturer_data: dict[int, bytes]
+
+
+class VirtualHive:
+    """The physical state of one simulated hive and its BroodMinder device."""
+
+    def __init__(
+        self, index: int, model: int, rng: random.Random, swarm_at: float | None, epoch: float
+    ) -> None:
+        """Initialize a hive with random colony properties."""
+        self.epoch = epoch
+        self.address = f"F0:0D:00:00:{index >> 8:02X}:{index & 0xFF:02X}"
+        self.model = model
+        self.rng = rng
+        self.brood = rng.random() < 0.8  # noqa: PLR2004
+        self.weight_dag = rng.uniform(2500, 6000)
+        self.flow_dag_per_day = rng.uniform(0, 300)  # nectar flow, up to 3 kg per day
+        self.battery = rng.uniform(30, 100)
+        self.swarm_at = swarm_at
+        self.swarm_drop_dag = rng.uniform(150, 350)
+        self.samples = 0
+        self._time: float | None = None
+
+    def _advance(self, now: float) -> None:
+        elapsed = 0.0 if self._time is None else now - self._time
+        if (
+            self._time is not None
+            and self.swarm_at is not None
+            and self._time < self.swarm_at <= now
+        ):
+            self.weight_dag -= self.swarm_drop_dag
+        self._time = now
+        hour = (now + self.epoch) % 86400 / 3600
+        if 9 <= hour < 17:  # noqa: PLR2004
+            self.weight_dag += self.flow_dag_per_day * elapsed / (8 * 3600)
+        else:  # evaporation and consumption at night
+            self.weight_dag -= 0.3 * self.flow_dag_per_day * elapsed / (16 * 3600)
+        self.battery = max(0.0, self.battery - 0.3 * elapsed / 86400)
+
+    def swarm_state(self, now: float) -> int:
+        """SwarmMinder state at ``now``."""
+        state = SWARM_BASELINE_STATE
+        if self.swarm_at is not None:
+            for offset, swarm_state in SWARM_SEQUENCE:
+                if now >= self.swarm_at + offset:
+                    state = swarm_state
+        return state
+
+    def reading(self, now: float) -> dict[str, Any]:
+        """Field values of the advertisement sent at ``now``, fixed-point units."""
+        self._advance(now)
+        self.samples += 1
+        rng = self.rng
+        # Coolest at 3:00, warmest at 15:00 UTC
+        ambient = 15 + 8 * math.sin(2 * math.pi * ((now + self.epoch) % 86400 / 86400 - 0.375))
+        # A brood nest is held near 35 °C, otherwise the hive follows the ambient
+        temperature = 34.8 + rng.gauss(0, 0.15) if self.brood else ambient + 2 + rng.gauss(0, 0.3)
+        temperature_centi_c = round(temperature * 100)
+        values: dict[str, Any] = {
+            "battery_percent": round(self.battery),
+            "elapsed_s": self.samples,
+            "temperature_centi_c": temperature_centi_c,
+            "temperature_rt_centi_c": temperature_centi_c,
+            "humidity_percent": round(
+                min(95, max(20, 75 - 2 * (ambient - 15) + rng.gauss(0, 2)))
+            ),
+        }
+        if self.model in SWARM_MODELS:
+            values["swarm_state_numeric"] = self.swarm_state(now)
+            if self.swarm_at is not None and now >= self.swarm_at:
+                values["swarm_time_utc"] = datetime.fromtimestamp(self.swarm_at + self.epoch, UTC)
+            return values
+
+        weight = round(self.weight_dag + rng.gauss(0, 2))
+        if self.model in MODEL_W3_W4:
+            quarter = weight // 4
+            values["weight_l_dag"] = values["weight_r_dag"] = quarter
+            values["weight_l2_dag"] = quarter
+            values["weight_r2_dag"] = weight - 3 * quarter
+        else:
+            values["weight_l_dag"] = weight // 2
+            values["weight_r_dag"] = weight - weight // 2
+        values["weight_realtime_total_dag"] = weight
+        return values
+
+
+class Apiary:
+    """Advertisement stream of ``hives`` virtual hives, in time order."""
+
+    def __init__(
+        self,
+        hives: int,
+        models: tuple[str, ...] = tuple(SIMULATED_MODELS),
+        interval: float = 60.0,
+        proxies: int = 1,
+        coverage: float = 0.5,
+        swarm_share: float = 0.1,
+        swarm_within: float = 86400.0,
+        seed: int = 0,
+        epoch: float = 1_750_000_000.0,
+    ) -> None:
+        """Create the hives.
+
+        Every advertisement reaches one random proxy and each other proxy with
+        probability ``coverage``. A share ``swarm_share`` of the hives swarms at a
+        random time within ``swarm_within`` seconds. ``epoch`` is the wall clock time
+        (seconds since the epoch) of stream time 0.
+        """
+        self.interval = interval
+        self.proxies = [f"proxy-{index + 1}" for index in range(proxies)]
+        self.coverage = coverage
+        self.epoch = epoch
+        self._rng = random.Random(seed)  # noqa: S311
+        self.hives: list[VirtualHive] = []
+        for index in range(hives):
+            rng = random.Random(f"{seed}-{index}")  # noqa: S311
+            swarm_at = rng.uniform(0, swarm_within) if rng.random() < swarm_share else None
+            model = SIMULATED_MODELS[models[index % len(models)]]
+            self.hives.append(VirtualHive(index, model, rng, swarm_at, epoch))
+        # Signal strength of every hive at every proxy
+        self._rssi = [[self._rng.randint(-95, -55) for _ in self.proxies] for _ in self.hives]
+
+    def advertisements(
+        self, duration: float, start: float = 0.0
+    ) -> Iterator[SyntheticAdvertisement]:
+        """Yield the advertisements received in ``[0, duration)``, duplicates included.
+
+        ``start`` is added to the receipt times, e.g. ``time.monotonic()`` to match the
+        clock of Home Assistant's bluetooth stack.
+        """
+        rng = self._rng
+        # Each hive advertises at its own phase within the interval
+        schedule = [(rng.uniform(0, self.interval), index) for index in range(len(self.hives))]
+        heapq.heapify(schedule)
+        deliveries: list[tuple[float, int, SyntheticAdvertisement]] = []
+        sequence = 0
+
+        while schedule and schedule[0][0] < duration:
+            now, index = heapq.heappop(schedule)
+            while deliveries and deliveries[0][0] <= now:
+                yield heapq.heappop(deliveries)[2]
+
+            hive = self.hives[index]
+            payload = encode_payload(hive.model, hive.reading(now))
+            manufacturer_data = {MANUFACTURER_ID: payload}
+            first = rng.randrange(len(self.proxies))
+            for proxy_index, proxy in enumerate(self.proxies):
+                if proxy_index != first and rng.random() >= self.coverage:
+                    continue
+                received = now + rng.uniform(0, 0.5)
+                advertisement = SyntheticAdvertisement(
+                    start + received,
+                    hive.address,
+                    hive.address,
+                    self._rssi[index][proxy_index] + rng.randint(-3, 3),
+                    proxy,
+                    manufacturer_data,
+                )
+                heapq.heappush(deliveries, (received, sequence, advertisement))
+                sequence += 1
+            heapq.heappush(schedule, (now + self.interval * rng.uniform(0.9, 1.1), index))
+
+        while deliveries:
+            yield heapq.heappop(deliveries)[2]
+
+    def hex_lines(self, duration: float) -> Iterator[str]:
+        """The advertisements as capture lines (``capture.iter_hex_frames``)."""
+        for advertisement in self.advertisements(duration):
+            payload = advertisement.manufacturer_data[MANUFACTURER_ID].hex()
+            yield f"{self.epoch + advertisement.time:.3f} {advertisement.address} {payload}\n"
+
+
+# Handles one advertisement
+Process = Callable[[SyntheticAdvertisement], object]
+# Creates fresh per-hive state for an apiary: the handler and a callable releasing it
+Setup = Callable[["Apiary"], tuple[Process, Callable[[], None]]]
+
+
+def benchmark(apiary: Apiary, duration: float, setup: Setup) -> dict[str, Any]:
+    """Measure the per-advertisement work of the handler of ``setup`` over a stream.
+
+    tests/test_benchmark.py sets up a ``BroodMinderCoordinator`` per hive and hands
+    every advertisement to its ``_update_method`` and then to
+    ``sensor_update_to_bluetooth_data_update``, as Home Assistant does. The stream is
+    processed twice with fresh state: once timed for the CPU time per advertisement,
+    once under ``tracemalloc`` for the memory kept per hive.
+    """
+    advertisements = list(apiary.advertisements(duration, start=time.monotonic()))
+
+    process, release = setup(apiary)
+    start = time.process_time()
+    for advertisement in advertisements:
+        process(advertisement)
+    cpu = time.process_time() - start
+    release()
+
+    tracemalloc.start()
+    process, release = setup(apiary)
+    for advertisement in advertisements:
+        process(advertisement)
+    memory = tracemalloc.get_traced_memory()[0]
+    release()
+    tracemalloc.stop()
+
+    count = len(advertisements)
+    return {
+        "hives": len(apiary.hives),
+        "advertisements": count,
+        "cpu_us_per_advertisement": round(cpu / count * 1e6, 2) if count else None,
+        "memory_bytes_per_hive": round(memory / len(apiary.hives)) if apiary.hives else None,
+    }
@@ -0,0 +1,135 @@
+"""Versioned binary snapshots of the per-hive state.
+
+Histories, brood stability windows, spike filter buffers and event detector state take
+hours to rebuild after a restart. ``SharedRuntime`` therefore collects them into a
+snapshot, periodically and when Home Assistant stops, and restores them before the
+coordinators start listening again.
+
+A snapshot is a header followed by one record per hive, all little-endian::
+
+    header   magic b"BMSN", u16 version, u8 byte order (1 little endian),
+             f64 time written, u32 hive count
+    hive     u16 address length, address (UTF-8), sections
+    sections u16 count, then per section u8 name length, name (ASCII),
+             u32 payload length, payload
+
+Payloads are produced by the components (``snapshot``/``restore`` methods) and may hold
+arrays in native byte order, so snapshots written on a machine of the other byte order
+are ignored, as are snapshots of another ``SNAPSHOT_VERSION``: bump it whenever a
+payload layout changes, a cold start is better than misread state.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+import os
+from pathlib import Path
+import struct
+import sys
+import tempfile
+
+SNAPSHOT_MAGIC = b"BMSN"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHBdI")
+_BYTE_ORDER = 1 if sys.byteorder == "little" else 0
+
+Sections = dict[str, bytes]
+
+
+class SnapshotError(ValueError):
+    """The snapshot cannot be read."""
+
+
+def pack_sections(sections: Mapping[str, bytes]) -> bytes:
+    """Named payloads as one blob."""
+    parts = [struct.pack("<H", len(sections))]
+    for name, payload in sections.items():
+        raw = name.encode("ascii")
+        parts += (struct.pack("<B", len(raw)), raw, struct.pack("<I", len(payload)), payload)
+    return b"".join(parts)
+
+
+def unpack_sections(data: bytes | memoryview, offset: int = 0) -> tuple[Sections, int]:
+    """Read named payloads at ``offset``, returns them and the offset after them."""
+    view = memoryview(data)
+    try:
+        (count,) = struct.unpack_from("<H", view, offset)
+        offset += 2
+        sections: Sections = {}
+        for _ in range(count):
+            (length,) = struct.unpack_from("<B", view, offset)
+            name = bytes(view[offset + 1 : offset + 1 + length]).decode("ascii")
+            offset += 1 + length
+            (size,) = struct.unpack_from("<I", view, offset)
+            offset += 4
+            if offset + size > len(view):
+                raise SnapshotError("truncated section")
+            sections[name] = bytes(view[offset : offset + size])
+            offset += size
+    except (struct.error, UnicodeDecodeError) as err:
+        raise SnapshotError(str(err)) from err
+    return sections, offset
+
+
+def encode_snapshot(hives: Mapping[str, Mapping[str, bytes]], written_at: float) -> bytes:
+    """Serialize ``{address: {section: payload}}``."""
+    parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, _BYTE_ORDER, written_at, len(hives))]
+    for address, sections in hives.items():
+        raw = address.encode()
+        parts += (struct.pack("<H", len(raw)), raw, pack_sections(sections))
+    return b"".join(parts)
+
+
+def decode_snapshot(data: bytes) -> tuple[float, dict[str, Sections]]:
+    """Return the time written and ``{address: {section: payload}}``."""
+    try:
+        magic, version, byte_order, written_at, count = _HEADER.unpack_from(data)
+    except struct.error as err:
+        raise SnapshotError("truncated header") from err
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("not a snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"version {version}, expected {SNAPSHOT_VERSION}")
+    if byte_order != _BYTE_ORDER:
+        raise SnapshotError("written on a machine of the other byte order")
+
+    hives: dict[str, Sections] = {}
+    offset = _HEADER.size
+    try:
+        for _ in range(count):
+            (length,) = struct.unpack_from("<H", data, offset)
+            address = data[offset + 2 : offset + 2 + length].decode()
+            hives[address], offset = unpack_sections(data, offset + 2 + length)
+    except (struct.error, UnicodeDecodeError) as err:
+        raise SnapshotError(str(err)) from err
+    return written_at, hives
+
+
+def load_snapshot(path: Path) -> tuple[float, dict[str, Sections]] | None:
+    """Read and decode a snapshot file, None when there is none (blocking)."""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    return decode_snapshot(data)
+
+
+def save_snapshot(
+    path: Path, hives: Mapping[str, Mapping[str, bytes]], written_at: float
+) -> None:
+    """Encode and write a snapshot atomically (blocking)."""
+    data = encode_snapshot(hives, written_at)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temporary file, two saves may overlap (periodic and on unload)
+    fd, name = tempfile.mkstemp(prefix=f"{path.name}.", dir=path.parent)
+    temporary = Path(name)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        temporary.replace(path)
+    except BaseException:
+        temporary.unlink()
+        raise
@@ -0,0 +1,140 @@
+"""Latency tracing from advertisement receipt to entity state write.
+
+The coordinator marks five points per advertisement, all on the monotonic clock:
+
+* receipt - ``BluetoothServiceInfoBleak.time``, set by Home Assistant's bluetooth
+  manager when the advertisement arrived (from a local adapter or a proxy)
+* start - ``_update_method`` entered
+* parsed - ``parse_manufacturer_data`` returned
+* built - the sensor ``PassiveBluetoothDataUpdate`` was built
+* written - all entity states of the update were written
+
+and ``LatencyTracker`` keeps the stage durations of the last ``TRACE_SIZE``
+advertisements that made it to the state machine. The percentiles read by the sensors
+on every update are cached and only sorted again after ``TRACE_PERCENTILE_REFRESH`` new
+traces. Note that the receipt time uses a
+coarse clock with a resolution of a few milliseconds.
+
+Nothing in this module depends on Home Assistant.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import math
+from typing import Any
+
+from .const import TRACE_PERCENTILE_REFRESH, TRACE_SIZE
+
+# Durations kept per trace, in milliseconds
+STAGES = ("bluetooth", "parse", "build", "write", "total")
+QUANTILES = (50, 95, 99)
+
+
+class LatencyTracker:
+    """Traces of one device, O(1) amortized per advertisement."""
+
+    __slots__ = (
+        "_built",
+        "_cache",
+        "_completed",
+        "_parsed",
+        "_receipt",
+        "_refresh",
+        "_start",
+        "_traces",
+        "dropped",
+    )
+
+    def __init__(self, size: int = TRACE_SIZE, refresh: int = TRACE_PERCENTILE_REFRESH) -> None:
+        """Initialize without traces, percentiles are sorted again every ``refresh`` traces."""
+        self._receipt: float | None = None
+        self._start: float | None = None
+        self._parsed: float | None = None
+        self._built: float | None = None
+        self._traces: deque[tuple[float, ...]] = deque(maxlen=size)
+        self._refresh = refresh
+        self._completed = 0  # traces appended so far
+        # (stage, quantiles) -> traces completed when computed, percentiles
+        self._cache: dict[tuple[str, tuple[int, ...]], tuple[int, dict[int, float]]] = {}
+        self.dropped = 0  # parsed advertisements that did not reach a state write
+
+    def __len__(self) -> int:
+        """Return the number of completed traces."""
+        return len(self._traces)
+
+    def start(self, receipt: float, now: float) -> None:
+        """An advertisement received at ``receipt`` is being processed."""
+        self._receipt = receipt
+        self._start = now
+        self._parsed = None
+        self._built = None
+
+    def mark_parsed(self, now: float) -> None:
+        """Parsing produced a reading."""
+        if self._start is not None:
+            self._parsed = now
+
+    def mark_built(self, now: float) -> None:
+        """The entity update was built, only the first build of a trace counts."""
+        if self._parsed is not None and self._built is None:
+            self._built = now
+
+    def finish(self, now: float) -> None:
+        """All entity states were written, the trace is complete."""
+        receipt, start, parsed, built = self._receipt, self._start, self._parsed, self._built
+        self._start = self._parsed = self._built = None
+        if receipt is None or start is None or parsed is None:
+            return  # not a BroodMinder advertisement
+        if built is None:
+            self.dropped += 1
+            return
+        self._traces.append(
+            (
+                (start - receipt) * 1000,
+                (parsed - start) * 1000,
+                (built - parsed) * 1000,
+                (now - built) * 1000,
+                (now - receipt) * 1000,
+            )
+        )
+        self._completed += 1
+
+    def percentiles(
+        self, stage: str = "total", quantiles: tuple[int, ...] = QUANTILES
+    ) -> dict[int, float] | None:
+        """Nearest-rank percentiles of ``stage`` in milliseconds, None without traces.
+
+        Cached until ``refresh`` more traces completed.
+        """
+        if not self._traces:
+            return None
+        key = (stage, quantiles)
+        cached = self._cache.get(key)
+        if cached is not None and self._completed - cached[0] < self._refresh:
+            return cached[1]
+        result = self._percentiles(stage, quantiles)
+        self._cache[key] = (self._completed, result)
+        return result
+
+    def _percentiles(self, stage: str, quantiles: tuple[int, ...]) -> dict[int, float]:
+        index = STAGES.index(stage)
+        values = sorted(trace[index] for trace in self._traces)
+        return {
+            quantile: values[max(0, math.ceil(quantile / 100 * len(values)) - 1)]
+            for quantile in quantiles
+        }
+
+    def dump(self) -> dict[str, Any]:
+        """Traces and per-stage percentiles, e.g. for diagnostics."""
+        return {
+            "dropped": self.dropped,
+            "percentiles": {
+                stage: self._percentiles(stage, QUANTILES) if self._traces else None
+                for stage in STAGES
+            },
+            "traces": [
+                {stage: round(value, 3) for stage, value in zip(STAGES, trace, strict=True)}
+                for trace in self._traces
+            ],
+        }
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Decode and summarise BroodMinder advertisement captures without Home Assistant.
+
+Examples:
+    scripts/broodminder_cli.py summary capture.btmon other.jsonl --jobs 4
+    scripts/broodminder_cli.py decode capture.txt --output csv > decoded.csv
+    scripts/broodminder_cli.py reprocess season/*.jsonl --output season.json
+    scripts/broodminder_cli.py simulate --hives 50 --hours 48 --proxies 3 > synthetic.txt
+"""
+
+import argparse
+from collections.abc import Iterator
+import json
+from pathlib import Path
+import sys
+import types
+
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = "custom_components.broodminder"
+COMPONENT = ROOT / "custom_components" / "broodminder"
+
+
+def load_component() -> None:
+    """Make the integration's parser modules importable without Home Assistant.
+
+    Only the package ``__init__`` imports Home Assistant, so register a bare package
+    module and let the submodules import normally.
+    """
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(COMPONENT)]
+        sys.modules[PACKAGE] = package
+
+
+# Module level so worker processes (spawn start method) resolve the package too
+load_component()
+
+from custom_components.broodminder import capture, reprocess, simulate  # noqa: E402
+from custom_components.broodminder.ble_parser import ManufacturerData  # noqa: E402
+
+
+def print_summaries(summaries: dict[str, capture.DeviceSummary], as_json: bool) -> None:
+    if as_json:
+        for summary in summaries.values():
+            print(json.dumps(summary.as_dict()))
+        return
+
+    header = f"{'address':<17}  {'model':<7} {'fw':<6} {'frames':>8} {'decoded':>8}  values"
+    print(header)
+    print("-" * len(header))
+    for address in sorted(summaries):
+        summary = summaries[address]
+        values = ", ".join(
+            f"{name}={stats.minimum:g}..{stats.maximum:g} (last {stats.last:g})"
+            for name, stats in summary.stats.items()
+        )
+        print(
+            f"{address:<17}  {summary.model_name:<7} {summary.firmware or '-':<6} "
+            f"{summary.frames:>8} {summary.decoded:>8}  {values}"
+        )
+
+
+def decode(paths: list[Path], fmt: str, output: str, fixed_point: bool) -> int:
+    def decoded() -> Iterator[tuple[capture.CaptureFrame, ManufacturerData | None]]:
+        for path in paths:
+            yield from capture.decode_frames(capture.iter_frames(path, fmt))
+
+    if output == "csv":
+        return capture.write_csv(decoded(), sys.stdout, fixed_point)
+    return capture.write_jsonl(decoded(), sys.stdout, fixed_point)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = subparsers.add_parser("summary", help="Per-device summary of captures")
+    summary_parser.add_argument("files", nargs="+", type=Path)
+    summary_parser.add_argument("--format", choices=capture.FORMATS, default=capture.FORMAT_AUTO)
+    summary_parser.add_argument(
+        "--jobs", type=int, default=1, help="Number of processes (one file per process)"
+    )
+    summary_parser.add_argument("--json", action="store_true", help="One JSON line per device")
+
+    decode_parser = subparsers.add_parser("decode", help="Decode every frame of the captures")
+    decode_parser.add_argument("files", nargs="+", type=Path)
+    decode_parser.add_argument("--format", choices=capture.FORMATS, default=capture.FORMAT_AUTO)
+    decode_parser.add_argument("--output", choices=("jsonl", "csv"), default="jsonl")
+    decode_parser.add_argument(
+        "--fixed-point",
+        action="store_true",
+        help="Raw integers: temperatures in centi-°C, weights in decagrams",
+    )
+
+    reprocess_parser = subparsers.add_parser(
+        "reprocess", help="Per-hive daily metrics and swarm candidates, on all cores"
+    )
+    reprocess_parser.add_argument("files", nargs="+", type=Path)
+    reprocess_parser.add_argument(
+        "--format", choices=capture.FORMATS, default=capture.FORMAT_AUTO
+    )
+    reprocess_parser.add_argument(
+        "--jobs", type=int, default=None, help="Number of processes (default: all cores)"
+    )
+    reprocess_parser.add_argument(
+        "--output", type=Path, default=None, help="Summary file (default: standard output)"
+    )
+
+    simulate_parser = subparsers.add_parser(
+        "simulate", help="Synthetic capture of an apiary (hex lines)"
+    )
+    simulate_parser.add_argument("--hives", type=int, default=10)
+    simulate_parser.add_argument("--hours", type=float, default=24)
+    simulate_parser.add_argument(
+        "--interval", type=float, default=60, help="Seconds between advertisements"
+    )
+    simulate_parser.add_argument("--proxies", type=int, default=1)
+    simulate_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print_summaries(capture.summarise_files(args.files, args.format, args.jobs), args.json)
+    elif args.command == "simulate":
+        apiary = simulate.Apiary(
+            args.hives, interval=args.interval, proxies=args.proxies, seed=args.seed
+        )
+        sys.stdout.writelines(apiary.hex_lines(args.hours * 3600))
+    elif args.command == "reprocess":
+        summary = reprocess.reprocess(args.files, args.format, args.jobs)
+        if args.output is None:
+            reprocess.write_summary(summary, sys.stdout)
+        else:
+            with args.output.open("w", encoding="utf-8") as out:
+                reprocess.write_summary(summary, out)
+    else:
+        decode(args.files, args.format, args.output, args.fixed_point)
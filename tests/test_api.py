@@ -0,0 +1,77 @@
+"""Tests for broodminder/api.py."""
+
+import time
+
+from homeassistant.components.bluetooth import BluetoothChange
+from homeassistant.components.websocket_api import ERR_NOT_FOUND
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import WebSocketGenerator
+
+from custom_components.broodminder.const import DOMAIN, MANUFACTURER_ID
+from custom_components.broodminder.simulate import SyntheticAdvertisement, encode_payload
+
+ADDRESS = "AA:BB:CC:DD:EE:01"
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations", "enable_bluetooth")
+
+
+async def _setup_with_reading(hass: HomeAssistant) -> None:
+    """Set up an entry for ``ADDRESS`` and deliver one advertisement."""
+    entry = MockConfigEntry(domain=DOMAIN, unique_id=ADDRESS, title=f"BroodMinder {ADDRESS}")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    payload = encode_payload(56, {"temperature_centi_c": 3481, "humidity_percent": 61})
+    advertisement = SyntheticAdvertisement(
+        time=time.monotonic(),
+        address=ADDRESS,
+        name=f"BroodMinder {ADDRESS}",
+        rssi=-70,
+        source="local",
+        manufacturer_data={MANUFACTURER_ID: payload},
+    )
+    hass.data[DOMAIN][entry.entry_id]._async_handle_bluetooth_event(  # noqa: SLF001
+        advertisement, BluetoothChange.ADVERTISEMENT
+    )
+    await hass.async_block_till_done()
+
+
+async def test_history_command_returns_the_requested_columns(
+    hass: HomeAssistant, hass_ws_client: WebSocketGenerator
+) -> None:
+    """The address is matched case-insensitively and only the requested columns return."""
+
+    await _setup_with_reading(hass)
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {
+            "type": "broodminder/history",
+            "address": ADDRESS.lower(),
+            "columns": ["temperature_c", "humidity_percent"],
+        }
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+    result = msg["result"]
+    assert result["address"] == ADDRESS
+    assert set(result) == {"address", "time", "temperature_c", "humidity_percent"}
+    assert result["temperature_c"] == [34.81]
+    assert result["humidity_percent"] == [61]
+    assert len(result["time"]) == 1
+
+
+async def test_history_command_reports_unknown_devices(
+    hass: HomeAssistant, hass_ws_client: WebSocketGenerator
+) -> None:
+    """A device without history is a not found error."""
+
+    await _setup_with_reading(hass)
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {"type": "broodminder/history", "address": "AA:BB:CC:DD:EE:99"}
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == ERR_NOT_FOUND
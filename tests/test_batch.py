@@ -0,0 +1,112 @@
+"""Tests for broodminder/batch.py."""
+
+# ruff: noqa: PLR2004
+
+import math
+from pathlib import Path
+import random
+
+import pytest
+
+from custom_components.broodminder import reprocess
+from custom_components.broodminder.batch import COLUMN_NAMES, PLAN, decode_batch, pack_payloads
+from custom_components.broodminder.ble_parser import parse_manufacturer_data
+from custom_components.broodminder.capture import FORMAT_HEX
+from custom_components.broodminder.const import MANUFACTURER_ID
+from custom_components.broodminder.layout import MODEL_LAYOUTS
+from custom_components.broodminder.simulate import Apiary
+
+
+def _random_payloads(count: int) -> list[bytes]:
+    rng = random.Random(7)  # noqa: S311
+    models = [*MODEL_LAYOUTS, 0, 200]  # and two unknown models
+    sentinels = [b"\xff\xff", b"\xff\x7f", b"\x05\x80"]
+    payloads = []
+    for _ in range(count):
+        payload = bytearray(rng.randbytes(21))
+        payload[0] = rng.choice(models)
+        for _ in range(rng.randrange(4)):
+            offset = rng.randrange(1, 20)
+            payload[offset : offset + 2] = rng.choice(sentinels)
+        payloads.append(bytes(payload[: rng.choice([3, 5, 8, 12, 17, 21, 21, 21])]))
+    return payloads
+
+
+def _scalar(parsed: object, name: str) -> float:
+    value = getattr(parsed, name)
+    if value is None:
+        return math.nan
+    if name == "swarm_time_utc":
+        return value.timestamp()
+    return float(value)
+
+
+def test_batch_decoding_matches_the_per_frame_parser() -> None:
+    """Every field of every frame decodes as parse_manufacturer_data does."""
+
+    payloads = _random_payloads(3000)
+    columns = decode_batch(*pack_payloads(payloads))
+
+    for row, payload in enumerate(payloads):
+        parsed = parse_manufacturer_data("AA", {MANUFACTURER_ID: payload})
+        assert columns["valid"][row] == (parsed is not None)
+        if parsed is None:
+            continue
+        assert columns["model"][row] == parsed.model
+        for name in PLAN:
+            expected = _scalar(parsed, name)
+            actual = columns[COLUMN_NAMES.get(name, name)][row]
+            assert actual == expected or (math.isnan(actual) and math.isnan(expected)), (
+                payload.hex(),
+                name,
+            )
+
+
+def test_decode_batch_only_computes_the_requested_fields() -> None:
+    """Fields outside ``fields`` are not returned."""
+
+    matrix, lengths = pack_payloads([bytes(21), b"\x2f\x00"])
+    columns = decode_batch(matrix, lengths, ["temperature_centi_c"])
+    assert set(columns) == {
+        "valid",
+        "model",
+        "firmware_major",
+        "firmware_minor",
+        "temperature_centi_c",
+    }
+    assert columns["valid"].tolist() == [True, False]
+    assert math.isnan(columns["temperature_centi_c"][1])
+
+
+def test_reprocess_gives_the_same_series_with_and_without_numpy(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The vectorized chunk decoder is a drop-in for the per-frame one."""
+
+    path = tmp_path / "apiary.txt"
+    apiary = Apiary(hives=6, interval=600, proxies=2, swarm_share=0.5, seed=3)
+    path.write_text("".join(apiary.hex_lines(2 * 86400)))
+    monkeypatch.setattr(reprocess, "BATCH_SIZE", 1000)
+
+    assert reprocess.BATCH_AVAILABLE
+    vectorized = reprocess.reprocess([path], fmt=FORMAT_HEX, jobs=1)
+    monkeypatch.setattr(reprocess, "batch", None)
+    per_frame = reprocess.reprocess([path], fmt=FORMAT_HEX, jobs=1)
+    vectorized.pop("generated")
+    per_frame.pop("generated")
+    assert vectorized == per_frame
+    assert len(vectorized["hives"]) == 6
+
+
+def test_pack_payloads_pads_short_and_cuts_long_payloads() -> None:
+    """Rows hold the first PAYLOAD_LENGTH bytes of each payload, zero padded."""
+
+    payloads = [bytes(range(21)), b"\x2f\x00", memoryview(bytes(range(100, 125))), b""]
+    matrix, lengths = pack_payloads(payloads)
+    assert lengths.tolist() == [21, 2, 25, 0]
+    assert [bytes(row) for row in matrix] == [
+        bytes(range(21)),
+        b"\x2f\x00" + bytes(19),
+        bytes(range(100, 121)),
+        bytes(21),
+    ]
@@ -0,0 +1,79 @@
+"""Benchmark of the advertisement path in Home Assistant (simulate.benchmark)."""
+
+# ruff: noqa: PLR2004
+
+from collections import Counter
+from collections.abc import Callable
+import os
+
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.broodminder.const import CONF_SPIKE_FILTER, DOMAIN
+from custom_components.broodminder.coordinator import BroodMinderCoordinator
+from custom_components.broodminder.sensor import sensor_update_to_bluetooth_data_update
+from custom_components.broodminder.simulate import (
+    Apiary,
+    Process,
+    SyntheticAdvertisement,
+    benchmark,
+)
+
+# e.g. BROODMINDER_BENCHMARK_HIVES="10 100 1000" pytest tests/test_benchmark.py -s
+HIVES = [int(hives) for hives in os.environ.get("BROODMINDER_BENCHMARK_HIVES", "10").split()]
+
+
+def _coordinators(
+    hass: HomeAssistant, updates: Counter[int]
+) -> Callable[[Apiary], tuple[Process, Callable[[], None]]]:
+    """Start a coordinator per hive, as async_setup_entry does."""
+
+    def setup(apiary: Apiary) -> tuple[Process, Callable[[], None]]:
+        coordinators: dict[str, BroodMinderCoordinator] = {}
+        stops = []
+        for hive in apiary.hives:
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                unique_id=hive.address,
+                title=f"BroodMinder {hive.address}",
+                options={CONF_SPIKE_FILTER: True},
+            )
+            coordinator = coordinators[hive.address] = BroodMinderCoordinator(hass, entry)
+            stops.append(coordinator.async_start())
+
+        def process(advertisement: SyntheticAdvertisement) -> None:
+            coordinator = coordinators[advertisement.address]
+            parsed = coordinator._update_method(advertisement)  # noqa: SLF001
+            update = sensor_update_to_bluetooth_data_update(parsed, coordinator)
+            updates[len(update.entity_data)] += 1
+
+        def release() -> None:
+            for stop in stops:
+                stop()
+
+        return process, release
+
+    return setup
+
+
+@pytest.mark.usefixtures("enable_bluetooth")
+@pytest.mark.parametrize("hives", HIVES)
+async def test_benchmark_runs_the_coordinator_and_sensor_update(
+    hass: HomeAssistant, hives: int
+) -> None:
+    """Every advertisement is parsed, processed and turned into entity updates."""
+
+    updates: Counter[int] = Counter()  # advertisements by number of entity values
+    apiary = Apiary(hives, proxies=2, seed=0)
+    result = benchmark(apiary, 3600, _coordinators(hass, updates))
+    await hass.async_block_till_done()
+    print(result)  # noqa: T201
+
+    assert result["hives"] == hives
+    assert result["advertisements"] > 60 * hives
+    assert result["cpu_us_per_advertisement"] > 0
+    assert result["memory_bytes_per_hive"] > 0
+    # Both passes built an update with the readings for every advertisement
+    assert updates.total() == 2 * result["advertisements"]
+    assert min(updates) >= 4
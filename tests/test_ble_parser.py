@@ -5,10 +5,18 @@
 import datetime
 import math
 
-from custom_components.broodminder.ble_parser import extract_entities, parse_manufacturer_data
+from custom_components.broodminder.ble_parser import (
+    entity_fields,
+    extract_entities,
+    model_entity_keys,
+    parse_manufacturer_data,
+)
 from custom_components.broodminder.const import (
+    ID_TO_MODEL,
     MANUFACTURER_ID,
     SENSOR_BATT,
+    SENSOR_BEE_COUNT_IN,
+    SENSOR_BEE_COUNT_OUT,
     SENSOR_HUM,
     SENSOR_SAMPLE_COUNT,
     # Optional extras we don't strictly assert in values, but we verify presence/absence
@@ -19,12 +27,18 @@ from custom_components.broodminder.const import (
     # SENSOR_WEIGHT_R2,
     SENSOR_SWARM_STATE,
     SENSOR_SWARM_TIME,
+    SENSOR_SWARM_TIME_SINCE_BOOT,
     SENSOR_TEMP,
+    SENSOR_TEMP_F,
     SENSOR_WEIGHT_L,
+    SENSOR_WEIGHT_L_LB,
     SENSOR_WEIGHT_R,
+    SENSOR_WEIGHT_R_LB,
     SENSOR_WEIGHT_REALTIME,
+    UNITS_BOTH,
+    UNITS_IMPERIAL,
 )
-
+from custom_components.broodminder.layout import MODEL_LAYOUTS, FieldSpec, compile_layout
 
 
 def test_GIVEN_invalid_payload__WHEN_parse_THEN_returns_none() -> None:  # noqa: N802
@@ -222,9 +236,9 @@ def test_parse_primary_extended_fields_model_th() -> None:
     assert parsed.weight_r_kg is None
     assert parsed.weight_realtime_total_kg is None
     assert parsed.swarm_state_numeric == 0xCF
-    assert parsed.swarm_time_utc == datetime.datetime(
-        1970, 7, 14, 4, 20, 15, 0, tzinfo=datetime.UTC
-    )
+    # An unsynced clock reports the swarm time as seconds since boot
+    assert parsed.swarm_time_utc is None
+    assert parsed.swarm_time_since_boot_s == 0xFFFFFF
 
     # Verify entity export
     entities = extract_entities(parsed)
@@ -238,9 +252,8 @@ def test_parse_primary_extended_fields_model_th() -> None:
     assert SENSOR_WEIGHT_REALTIME not in entities
 
     assert entities[SENSOR_SWARM_STATE] == 0xCF
-    assert entities[SENSOR_SWARM_TIME] == datetime.datetime(
-        1970, 7, 14, 4, 20, 15, 0, tzinfo=datetime.UTC
-    )
+    assert SENSOR_SWARM_TIME not in entities
+    assert entities[SENSOR_SWARM_TIME_SINCE_BOOT] == 0xFFFFFF
 
 
 def test_parse_primary_extended_fields_model_w() -> None:
@@ -327,3 +340,198 @@ def test_parse_primary_extended_fields_model_w() -> None:
     assert math.isclose(entities[SENSOR_WEIGHT_REALTIME], 20.00, abs_tol=1e-6)
     assert SENSOR_SWARM_STATE not in entities
     assert SENSOR_SWARM_TIME not in entities
+
+
+def test_layout_decodes_only_fields_the_model_carries() -> None:
+    """Fields are decoded from the model's layout and only when the payload is long enough."""
+
+    decode = compile_layout(
+        (
+            FieldSpec("battery_percent", (4,), lambda p, i: p[i]),
+            FieldSpec("elapsed_s", (5, 6), lambda p, lo, hi: p[lo] | (p[hi] << 8)),
+        )
+    )
+    assert decode(bytes([41, 0, 0, 0, 50])) == {"battery_percent": 50}
+    assert decode(bytes([41, 0, 0, 0, 50, 0x34, 0x12])) == {
+        "battery_percent": 50,
+        "elapsed_s": 0x1234,
+    }
+
+    # Every named model has a layout; T models never carry weights, W models never swarm data
+    assert set(ID_TO_MODEL) <= set(MODEL_LAYOUTS)
+    assert not {spec.name for spec in MODEL_LAYOUTS[41]} & {"weight_l_dag", "weight_l2_dag"}
+    assert not {spec.name for spec in MODEL_LAYOUTS[57]} & {"swarm_state_numeric"}
+
+
+def test_GIVEN_model_beedar_WHEN_parse_THEN_reports_bee_counters() -> None:  # noqa: N802
+    """Verifies BeeDar counters, including a short frame without the traffic field."""
+
+    payload = bytearray(15)
+    payload[0] = 63  # model BeeDar
+    payload[4] = 80  # battery %
+    payload[7] = 0x03  # temperature 1.23 C
+    payload[8] = 0x14
+    payload[10] = 0x2C  # bees in: 300
+    payload[11] = 0x01
+    payload[12] = 0xFF  # bees out: not available
+    payload[13] = 0xFF
+    payload[14] = 55
+
+    # Company ID prefix stripped through a memoryview, as the capture reader does
+    view = memoryview(b"\x8d\x02" + bytes(payload))[2:]
+    parsed = parse_manufacturer_data("AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: view})
+    assert parsed is not None
+    assert parsed.device_name == "BroodMinder-BeeDar DD:EE:FF"
+    assert parsed.bee_count_in == 300
+    assert parsed.bee_count_out is None
+    assert parsed.bee_traffic is None  # not present in a 15 byte frame
+    assert parsed.weight_l_kg is None
+
+    entities = extract_entities(parsed)
+    assert entities[SENSOR_BEE_COUNT_IN] == 300
+    assert SENSOR_BEE_COUNT_OUT not in entities
+    assert SENSOR_WEIGHT_L not in entities
+
+    payload.extend(b"\x00\x00\x00\x00\x07\x00")  # traffic 7
+    parsed = parse_manufacturer_data("AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: bytes(payload)})
+    assert parsed is not None
+    assert parsed.bee_traffic == 7
+    assert parsed.swarm_state_numeric is None
+
+
+def test_GIVEN_model_hub_WHEN_parse_THEN_reports_header_fields_only() -> None:  # noqa: N802
+    """Hub frames must not produce temperature, humidity or weight entities."""
+
+    payload = bytearray(21)
+    payload[0] = 54  # model Hub
+    payload[4] = 100
+    payload[5] = 0x10
+    payload[7] = 0x03
+    payload[8] = 0x14
+    payload[10] = 0xD1
+    payload[11] = 0x84
+    payload[14] = 55
+
+    parsed = parse_manufacturer_data("AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: bytes(payload)})
+    assert parsed is not None
+    assert set(extract_entities(parsed)) == {SENSOR_BATT, SENSOR_SAMPLE_COUNT}
+
+
+def test_device_metadata_is_reused_until_model_or_firmware_changes() -> None:
+    """Name and firmware strings are shared between frames of the same device."""
+
+    payload = bytearray(15)
+    payload[0] = 56  # model
+    payload[1] = 2  # v.minor
+    payload[2] = 1  # v.major
+
+    first = parse_manufacturer_data("11:22:33:44:55:66", {MANUFACTURER_ID: bytes(payload)})
+    second = parse_manufacturer_data("11:22:33:44:55:66", {MANUFACTURER_ID: bytes(payload)})
+    assert first is not None
+    assert second is not None
+    assert second.device_name is first.device_name
+    assert second.firmware is first.firmware
+
+    payload[1] = 3  # firmware update
+    updated = parse_manufacturer_data("11:22:33:44:55:66", {MANUFACTURER_ID: bytes(payload)})
+    assert updated is not None
+    assert updated.firmware == "1.3"
+    assert updated.device_name == "BroodMinder-TH 44:55:66"
+
+
+def test_fixed_point_entities_match_float_entities() -> None:
+    """Raw centi-°C / decagram values convert to the float entity values."""
+
+    payload = bytearray(21)
+    payload[0] = 57  # model W3/W4
+    payload[7] = 0xAB
+    payload[8] = 0x1A  # 6827 -> 18.27 °C
+    payload[10] = 0xD1
+    payload[11] = 0x84  # 34001 -> 12.34 kg
+    payload[12] = 0x17
+    payload[13] = 0x7F  # 32535 -> -2.32 kg
+
+    parsed = parse_manufacturer_data("AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: bytes(payload)})
+    assert parsed is not None
+    raw = extract_entities(parsed, fixed_point=True)
+    assert raw[SENSOR_TEMP] == 1827
+    assert raw[SENSOR_WEIGHT_L] == 1234
+    assert raw[SENSOR_WEIGHT_R] == -232
+    assert parsed.temperature_c == 18.27
+    assert extract_entities(parsed)[SENSOR_WEIGHT_R] == -2.32
+
+
+def test_selected_fields_are_the_only_ones_decoded() -> None:
+    """Deselected entities are neither decoded nor extracted."""
+
+    payload = bytearray(21)
+    payload[0] = 57  # model W3/W4
+    payload[4] = 90
+    payload[7] = 0xAB
+    payload[8] = 0x1A
+    payload[10] = 0xD1
+    payload[11] = 0x84
+
+    fields = entity_fields([SENSOR_WEIGHT_L, SENSOR_BATT])
+    parsed = parse_manufacturer_data(
+        "AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: bytes(payload)}, fields
+    )
+    assert parsed is not None
+    assert parsed.temperature_centi_c is None
+    assert extract_entities(parsed) == {SENSOR_WEIGHT_L: 12.34, SENSOR_BATT: 90}
+
+    # Unknown keys are ignored, the selectable keys follow the model layout
+    assert entity_fields(["not_a_sensor"]) == frozenset()
+    assert SENSOR_SWARM_STATE in model_entity_keys(56)
+    assert SENSOR_SWARM_STATE not in model_entity_keys(57)
+    assert SENSOR_HUM not in model_entity_keys(49)
+
+
+def test_imperial_entities_are_converted_from_the_raw_integers() -> None:
+    """°F and lb twins replace or accompany the metric entities."""
+
+    payload = bytearray(21)
+    payload[0] = 57  # model W
+    payload[7] = 0xAB
+    payload[8] = 0x1A  # 6827 -> 18.27 °C
+    payload[10] = 0xD1
+    payload[11] = 0x84  # 34001 -> 12.34 kg
+    payload[12] = 0x17
+    payload[13] = 0x7F  # 32535 -> -2.32 kg
+
+    parsed = parse_manufacturer_data("AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: bytes(payload)})
+    assert parsed is not None
+    imperial = extract_entities(parsed, units=UNITS_IMPERIAL)
+    assert imperial[SENSOR_TEMP_F] == 64.89
+    assert imperial[SENSOR_WEIGHT_L_LB] == 27.21
+    assert imperial[SENSOR_WEIGHT_R_LB] == -5.11
+    assert SENSOR_TEMP not in imperial
+    assert SENSOR_WEIGHT_L not in imperial
+
+    both = extract_entities(parsed, units=UNITS_BOTH)
+    assert both[SENSOR_TEMP] == 18.27
+    assert both[SENSOR_TEMP_F] == 64.89
+    assert extract_entities(parsed, fixed_point=True, units=UNITS_IMPERIAL)[SENSOR_TEMP] == 1827
+
+
+def test_synced_swarm_time_is_decoded_once_per_value() -> None:
+    """Frames repeating the same swarm time bytes share one datetime."""
+
+    payload = bytearray(21)
+    payload[0] = 56  # model TH
+    payload[15:17] = (1_750_000_000 & 0xFFFF).to_bytes(2, "little")
+    payload[17:19] = (1_750_000_000 >> 16).to_bytes(2, "little")
+
+    first = parse_manufacturer_data("AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: bytes(payload)})
+    second = parse_manufacturer_data("AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: bytes(payload)})
+    assert first is not None
+    assert second is not None
+    assert first.swarm_time_utc == datetime.datetime.fromtimestamp(1_750_000_000, datetime.UTC)
+    assert second.swarm_time_utc is first.swarm_time_utc
+    assert first.swarm_time_since_boot_s is None
+
+    payload[15:19] = bytes(4)  # never swarmed
+    unset = parse_manufacturer_data("AA:BB:CC:DD:EE:FF", {MANUFACTURER_ID: bytes(payload)})
+    assert unset is not None
+    assert unset.swarm_time_utc is None
+    assert unset.swarm_time_since_boot_s is None
@@ -0,0 +1,69 @@
+"""Tests for broodminder/brood.py."""
+
+# ruff: noqa: PLR2004
+
+import statistics
+
+import pytest
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.brood import BroodStability, BroodStabilityStage
+from custom_components.broodminder.const import (
+    SENSOR_BROOD_CONFIDENCE,
+    SENSOR_BROOD_ZONE_TIME,
+    SENSOR_TEMP_STD,
+)
+
+
+def test_rolling_std_matches_batch_statistics_over_the_window() -> None:
+    """Hourly Welford accumulators merge to the std of the last 24 hours."""
+
+    stability = BroodStability(hours=24)
+    readings = [(minute * 60.0, 3400 + (minute * 37) % 150) for minute in range(0, 48 * 60, 5)]
+    for timestamp, temperature in readings:
+        stability.update(temperature, timestamp)
+
+    # The window is the current hour and the 23 before it
+    window = [t / 100 for ts, t in readings if ts >= 24 * 3600]
+    std, zone_time, _ = stability.values()
+    assert std == pytest.approx(statistics.stdev(window))
+    assert zone_time == pytest.approx(100.0)
+
+
+def test_brood_zone_time_is_weighted_by_time() -> None:
+    """Time in the zone counts from each reading until the next one."""
+
+    stability = BroodStability()
+    stability.update(3500, 0.0)  # in the zone for 600 s
+    stability.update(2500, 600.0)  # out of the zone for 200 s
+    stability.update(3500, 800.0)
+    _, zone_time, _ = stability.values()
+    assert zone_time == pytest.approx(75.0)
+
+
+def test_stage_reports_confidence_for_stable_brood_nest() -> None:
+    """A stable 35 °C over a day gives full confidence, ambient temperatures none."""
+
+    stage = BroodStabilityStage()
+
+    def frame(address: str, temperature: int) -> ManufacturerData:
+        return ManufacturerData(
+            address=address,
+            model=56,
+            firmware=None,
+            device_name=address,
+            device_id=address,
+            temperature_centi_c=temperature,
+        )
+
+    brood = ambient = {}
+    for minute in range(0, 24 * 60, 10):
+        brood = stage.process(frame("brood", 3490 + minute % 20), minute * 60.0)
+        ambient = stage.process(frame("ambient", 1500 + minute % 600), minute * 60.0)
+
+    assert brood[SENSOR_TEMP_STD] < 0.1
+    assert brood[SENSOR_BROOD_ZONE_TIME] == 100.0
+    assert brood[SENSOR_BROOD_CONFIDENCE] > 90
+    assert ambient[SENSOR_BROOD_ZONE_TIME] == 0.0
+    assert ambient[SENSOR_BROOD_CONFIDENCE] == 0
+    assert stage.process(frame("brood", None), 86400.0) is None
@@ -0,0 +1,151 @@
+"""Tests for broodminder/capture.py."""
+
+# ruff: noqa: PLR2004
+
+import json
+import math
+from pathlib import Path
+
+from custom_components.broodminder.capture import (
+    FORMAT_BTMON,
+    FORMAT_HEX,
+    FORMAT_JSONL,
+    decode_frames,
+    detect_format,
+    iter_btmon_frames,
+    iter_hex_frames,
+    iter_jsonl_frames,
+    summarise,
+    summarise_files,
+    write_csv,
+    write_jsonl,
+)
+
+
+def _th_payload(temp_raw: int, humidity: int) -> bytes:
+    payload = bytearray(15)
+    payload[0] = 56  # model TH
+    payload[1] = 2
+    payload[2] = 1
+    payload[4] = 90  # battery %
+    payload[7] = temp_raw & 0xFF
+    payload[8] = temp_raw >> 8
+    payload[14] = humidity
+    return bytes(payload)
+
+
+def test_hex_lines_with_and_without_company_id() -> None:
+    """Hex lines may carry a timestamp, an address and the company ID prefix."""
+
+    payload = _th_payload(5123, 55).hex()
+    lines = [
+        "# comment",
+        f"1700000000.5 11:22:33:44:55:66 {payload}",
+        f"aa:bb:cc:dd:ee:ff 8d02{payload}",
+        "garbage line",
+    ]
+    frames = list(iter_hex_frames(lines))
+
+    assert len(frames) == 2
+    assert frames[0].timestamp == 1700000000.5
+    assert frames[0].address == "11:22:33:44:55:66"
+    assert frames[1].address == "AA:BB:CC:DD:EE:FF"
+    assert frames[1].payload == bytes.fromhex(payload)
+
+
+def test_jsonl_accepts_payload_and_diagnostics_style() -> None:
+    """JSON lines carry either a hex payload or a manufacturer_data mapping."""
+
+    payload = _th_payload(5123, 55).hex()
+    lines = [
+        json.dumps({"address": "11:22:33:44:55:66", "payload": payload, "rssi": -70}),
+        json.dumps({"address": "11:22:33:44:55:66", "manufacturer_data": {"653": payload}}),
+        json.dumps({"address": "11:22:33:44:55:66", "manufacturer_data": {"76": "0215"}}),
+    ]
+    frames = list(iter_jsonl_frames(lines))
+
+    assert len(frames) == 2
+    assert frames[0].rssi == -70
+    assert frames[1].payload == bytes.fromhex(payload)
+
+
+def test_btmon_dump_only_yields_broodminder_reports() -> None:
+    """Only reports with the BroodMinder company ID are taken from btmon output."""
+
+    payload = _th_payload(5123, 55).hex()
+    lines = [
+        "Bluetooth monitor ver 5.66",
+        "> HCI Event: LE Meta Event (0x3e) plen 43      #12 [hci0] 12.345678",
+        "      LE Advertising Report (0x02)",
+        "        Address: 11:22:33:44:55:66 (OUI 11-22-33)",
+        "        Company: IF, LLC (653)",
+        f"          Data: {payload}",
+        "        RSSI: -71 dBm (0xb9)",
+        "> HCI Event: LE Meta Event (0x3e) plen 30      #13 [hci0] 13.000000",
+        "        Address: 77:88:99:AA:BB:CC (OUI 77-88-99)",
+        "        Company: Apple, Inc. (76)",
+        "          Data: 0215",
+        "        RSSI: -50 dBm (0xce)",
+    ]
+    frames = list(iter_btmon_frames(lines))
+
+    assert len(frames) == 1
+    assert frames[0].address == "11:22:33:44:55:66"
+    assert frames[0].timestamp == 12.345678
+    assert frames[0].rssi == -71
+
+
+def test_summary_and_writers(tmp_path: Path) -> None:
+    """Summaries aggregate per device; writers emit one record per decoded frame."""
+
+    capture_file = tmp_path / "capture.txt"
+    capture_file.write_text(
+        "\n".join(
+            [
+                f"1 11:22:33:44:55:66 {_th_payload(5123, 55).hex()}",
+                f"2 11:22:33:44:55:66 {_th_payload(5223, 60).hex()}",
+                "3 11:22:33:44:55:66 0001",  # too short, not decodable
+            ]
+        )
+    )
+    assert detect_format(capture_file) == FORMAT_HEX
+
+    summaries = summarise(decode_frames(iter_hex_frames(capture_file.read_text().splitlines())))
+    summary = summaries["11:22:33:44:55:66"]
+    assert summary.frames == 3
+    assert summary.decoded == 2
+    assert summary.model_name == "TH"
+    assert (summary.first_seen, summary.last_seen) == (1.0, 3.0)
+    temperature = summary.stats["temperature_c"]
+    assert math.isclose(temperature.minimum, 1.23)
+    assert math.isclose(temperature.maximum, 2.23)
+    assert summary.stats["humidity_percent"].last == 60
+
+    merged = summarise_files([capture_file, capture_file])
+    assert merged["11:22:33:44:55:66"].frames == 6
+
+    jsonl = tmp_path / "out.jsonl"
+    with jsonl.open("w") as out:
+        assert write_jsonl(decode_frames(iter_hex_frames(capture_file.open())), out) == 2
+    first = json.loads(jsonl.read_text().splitlines()[0])
+    assert first["humidity_percent"] == 55
+
+    csv_file = tmp_path / "out.csv"
+    with csv_file.open("w") as out:
+        assert write_csv(decode_frames(iter_hex_frames(capture_file.open())), out) == 2
+    assert csv_file.read_text().startswith("timestamp,rssi,address")
+
+
+def test_detect_format(tmp_path: Path) -> None:
+    """JSONL is recognised by suffix or content, btmon by its banner."""
+
+    jsonl = tmp_path / "capture.jsonl"
+    jsonl.write_text("{}\n")
+    btmon = tmp_path / "capture.log"
+    btmon.write_text("Bluetooth monitor ver 5.66\n")
+    unnamed = tmp_path / "capture.txt"
+    unnamed.write_text('{"address": "AA"}\n')
+
+    assert detect_format(jsonl) == FORMAT_JSONL
+    assert detect_format(btmon) == FORMAT_BTMON
+    assert detect_format(unnamed) == FORMAT_JSONL
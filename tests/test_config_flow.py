@@ -0,0 +1,68 @@
+"""Tests for broodminder/config_flow.py."""
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.broodminder.const import (
+    CONF_FORWARD_URL,
+    CONF_PUBLISH_MAX_INTERVAL,
+    CONF_RESAMPLE_INTERVAL,
+    DOMAIN,
+)
+
+ADDRESS = "AA:BB:CC:DD:EE:01"
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations", "enable_bluetooth")
+
+
+async def _configure_options(hass: HomeAssistant, user_input: dict[str, Any]) -> dict[str, Any]:
+    """Open the options flow of a new entry and submit ``user_input``."""
+    entry = MockConfigEntry(domain=DOMAIN, unique_id=ADDRESS, title=f"BroodMinder {ADDRESS}")
+    entry.add_to_hass(hass)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "init"
+    return await hass.config_entries.options.async_configure(result["flow_id"], user_input)
+
+
+@pytest.mark.parametrize(
+    ("user_input", "errors"),
+    [
+        ({CONF_FORWARD_URL: "udp://192.0.2.10:8094"}, {CONF_FORWARD_URL: "invalid_forward_url"}),
+        ({CONF_FORWARD_URL: "tcp://192.0.2.10"}, {CONF_FORWARD_URL: "invalid_forward_url"}),
+        (
+            {CONF_FORWARD_URL: "mqtts://broker.local/bees"},
+            {CONF_FORWARD_URL: "invalid_forward_url"},
+        ),
+        ({CONF_FORWARD_URL: "mqtt:///bees"}, {CONF_FORWARD_URL: "mqtt_not_set_up"}),
+        ({CONF_FORWARD_URL: "mqtt://broker.local/bees"}, {CONF_FORWARD_URL: "mqtt_other_broker"}),
+        (
+            {CONF_RESAMPLE_INTERVAL: 5, CONF_PUBLISH_MAX_INTERVAL: 600},
+            {CONF_RESAMPLE_INTERVAL: "resample_with_publish_interval"},
+        ),
+    ],
+)
+async def test_options_flow_rejects_invalid_input(
+    hass: HomeAssistant, user_input: dict[str, Any], errors: dict[str, str]
+) -> None:
+    """Invalid options show the form again with the error on the field."""
+
+    result = await _configure_options(hass, user_input)
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == errors
+
+
+async def test_options_flow_stores_valid_options(hass: HomeAssistant) -> None:
+    """Valid options are stored, the forwarding URL and resampling alone."""
+
+    result = await _configure_options(
+        hass, {CONF_FORWARD_URL: "tcp://192.0.2.10:8094", CONF_RESAMPLE_INTERVAL: 5}
+    )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["data"][CONF_FORWARD_URL] == "tcp://192.0.2.10:8094"
+    assert result["data"][CONF_RESAMPLE_INTERVAL] == 5  # noqa: PLR2004
+    assert result["data"][CONF_PUBLISH_MAX_INTERVAL] == 0
@@ -0,0 +1,194 @@
+"""Tests for broodminder/coordinator.py."""
+
+# ruff: noqa: PLR2004
+
+import struct
+import time
+from typing import Any
+
+from homeassistant.components.bluetooth import BluetoothChange
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.broodminder.const import (
+    CONF_PUBLISH_MAX_INTERVAL,
+    CONF_PUBLISH_MIN_INTERVAL,
+    CONF_SENSOR_GROUPS,
+    CONF_SENSORS,
+    CONF_SPIKE_FILTER,
+    CONF_UNITS,
+    DATA_RUNTIME,
+    DOMAIN,
+    MANUFACTURER_ID,
+    SENSOR_LAST_SEEN,
+    SENSOR_TEMP,
+    SNAPSHOT_MAX_AGE,
+    UNITS_IMPERIAL,
+)
+from custom_components.broodminder.coordinator import BroodMinderCoordinator
+from custom_components.broodminder.simulate import SyntheticAdvertisement, encode_payload
+
+ADDRESS = "AA:BB:CC:DD:EE:01"
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations", "enable_bluetooth")
+
+
+async def _setup(hass: HomeAssistant, options: dict[str, Any]) -> BroodMinderCoordinator:
+    """Set up an entry for ``ADDRESS`` and return its coordinator."""
+    entry = MockConfigEntry(
+        domain=DOMAIN, unique_id=ADDRESS, title=f"BroodMinder {ADDRESS}", options=options
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return hass.data[DOMAIN][entry.entry_id]
+
+
+def _advertise(
+    coordinator: BroodMinderCoordinator, temperature_centi_c: int, **values: int
+) -> None:
+    """Deliver a TH advertisement through the bluetooth callback, as if just received."""
+    payload = encode_payload(56, {"temperature_centi_c": temperature_centi_c, **values})
+    advertisement = SyntheticAdvertisement(
+        time=time.monotonic(),
+        address=ADDRESS,
+        name=f"BroodMinder {ADDRESS}",
+        rssi=-70,
+        source="local",
+        manufacturer_data={MANUFACTURER_ID: payload},
+    )
+    coordinator._async_handle_bluetooth_event(  # noqa: SLF001
+        advertisement, BluetoothChange.ADVERTISEMENT
+    )
+
+
+def _temperature(hass: HomeAssistant) -> float:
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{ADDRESS}-{SENSOR_TEMP}-{ADDRESS}"
+    )
+    assert entity_id is not None
+    return float(hass.states.get(entity_id).state)
+
+
+async def test_advertisement_updates_entities_and_history(hass: HomeAssistant) -> None:
+    """An advertisement creates the entities, writes their states and is recorded."""
+
+    coordinator = await _setup(hass, {})
+    _advertise(coordinator, 3481)
+    await hass.async_block_till_done()
+
+    assert coordinator.available
+    assert coordinator.model == 56
+    assert _temperature(hass) == 34.81
+    history = hass.data[DATA_RUNTIME].history.query(ADDRESS, columns=("temperature_c",))
+    assert history["temperature_c"] == [34.81]
+
+
+async def test_shedding_keeps_the_newest_frame_until_flushed(hass: HomeAssistant) -> None:
+    """While shedding, frames are only parsed and the newest is processed on flush."""
+
+    coordinator = await _setup(hass, {})
+    runtime = hass.data[DATA_RUNTIME]
+    _advertise(coordinator, 3400)
+    await hass.async_block_till_done()
+
+    runtime.load.shedding = True
+    _advertise(coordinator, 3450)
+    _advertise(coordinator, 3500)
+    await hass.async_block_till_done()
+    assert not coordinator.publish
+    assert coordinator.shed == 1
+    assert runtime.load.shed == 1
+    assert _temperature(hass) == 34.0
+
+    coordinator.async_flush_deferred()
+    await hass.async_block_till_done()
+    assert coordinator.publish
+    assert _temperature(hass) == 35.0
+
+
+async def test_publish_scheduler_holds_small_changes(hass: HomeAssistant) -> None:
+    """With a maximum publish interval small changes wait, large ones are written."""
+
+    coordinator = await _setup(
+        hass, {CONF_PUBLISH_MIN_INTERVAL: 60, CONF_PUBLISH_MAX_INTERVAL: 600}
+    )
+    _advertise(coordinator, 3400)
+    await hass.async_block_till_done()
+    assert _temperature(hass) == 34.0
+
+    _advertise(coordinator, 3410)
+    await hass.async_block_till_done()
+    assert not coordinator.publish
+    assert coordinator.scheduler.held == 1
+    assert _temperature(hass) == 34.0
+
+    _advertise(coordinator, 3510)  # 1.1 °C since the last published value
+    await hass.async_block_till_done()
+    assert coordinator.publish
+    assert _temperature(hass) == 35.1
+
+
+async def test_deselected_sensor_groups_are_not_created(hass: HomeAssistant) -> None:
+    """Without any selected group only the decoded readings get entities."""
+
+    coordinator = await _setup(hass, {CONF_SENSOR_GROUPS: []})
+    _advertise(coordinator, 3481)
+    await hass.async_block_till_done()
+
+    registry = er.async_get(hass)
+    assert _temperature(hass) == 34.81
+    assert (
+        registry.async_get_entity_id("sensor", DOMAIN, f"{ADDRESS}-{SENSOR_LAST_SEEN}-{ADDRESS}")
+        is None
+    )
+
+
+async def test_history_fields_are_decoded_without_their_sensors(hass: HomeAssistant) -> None:
+    """Deselecting the battery sensor still records the battery in the history."""
+
+    coordinator = await _setup(hass, {CONF_SENSORS: [SENSOR_TEMP]})
+    _advertise(coordinator, 3481, battery_percent=87)
+    await hass.async_block_till_done()
+
+    history = hass.data[DATA_RUNTIME].history.query(ADDRESS, columns=("battery_percent",))
+    assert history["battery_percent"] == [87]
+
+
+async def test_restored_state_waits_for_its_hive_until_too_old(hass: HomeAssistant) -> None:
+    """State of hives not set up again survives the snapshot tick up to its maximum age."""
+
+    await _setup(hass, {})
+    runtime = hass.data[DATA_RUNTIME]
+    now = time.time()
+    runtime._restored = {  # noqa: SLF001
+        "AA:BB:CC:DD:EE:02": {"collected": struct.pack("<d", now - 3600)},
+        "AA:BB:CC:DD:EE:03": {"collected": struct.pack("<d", now - SNAPSHOT_MAX_AGE - 1)},
+    }
+
+    runtime._async_snapshot_tick(None)  # noqa: SLF001
+    await hass.async_block_till_done()
+    assert list(runtime._restored) == ["AA:BB:CC:DD:EE:02"]  # noqa: SLF001
+
+
+async def test_filtered_twins_follow_the_units(hass: HomeAssistant) -> None:
+    """With imperial units the spike-filtered temperature is in °F, no °C twin is made."""
+
+    coordinator = await _setup(hass, {CONF_UNITS: UNITS_IMPERIAL, CONF_SPIKE_FILTER: True})
+    _advertise(coordinator, 3481)
+    await hass.async_block_till_done()
+
+    registry = er.async_get(hass)
+    entity_id = registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{ADDRESS}-temperature_f_filtered-{ADDRESS}"
+    )
+    assert entity_id is not None
+    assert float(hass.states.get(entity_id).state) == 94.66
+    assert (
+        registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{ADDRESS}-temperature_filtered-{ADDRESS}"
+        )
+        is None
+    )
@@ -0,0 +1,68 @@
+"""Tests for broodminder/coverage.py."""
+
+# ruff: noqa: PLR2004
+
+from custom_components.broodminder.coverage import CoverageTracker
+
+START = 3_000_000.0  # monotonic seconds, a multiple of the slot length
+
+
+def test_completeness_raises_and_clears_the_poor_flag() -> None:
+    """Gaps in the reception flag a hive, a good signal without gaps clears it."""
+
+    tracker = CoverageTracker()
+    for minute in range(120):
+        if not 30 <= minute < 60:  # half an hour of silence
+            tracker.add("AA", "proxy", -85, START + 60 * minute)
+    now = START + 7200
+    assert tracker.hive_summary("AA", now) == {
+        "completeness": 75,
+        "hours": 2.0,
+        "best_source": "proxy",
+        "best_rssi": -85,
+    }
+    assert tracker.update_flags(now) == (["AA"], [])
+    assert tracker.update_flags(now) == ([], [])
+
+    for minute in range(120, 600):
+        tracker.add("AA", "proxy", -70, START + 60 * minute)
+    assert tracker.update_flags(START + 36000) == ([], ["AA"])
+
+
+def test_short_observations_are_not_judged() -> None:
+    """Within the first hour a hive is neither flagged nor cleared."""
+
+    tracker = CoverageTracker()
+    tracker.add("AA", "proxy", -60, START)
+    assert tracker.update_flags(START + 1800) == ([], [])
+    tracker.forget("AA")
+    assert tracker.hive_summary("AA", START) is None
+
+
+def test_report_recommends_a_minimal_set_of_sources() -> None:
+    """One proxy hearing every hive well replaces the others, weak hives keep theirs."""
+
+    tracker = CoverageTracker()
+    for minute in range(60):
+        now = START + 60 * minute
+        for hive in ("AA", "BB", "CC"):
+            tracker.add(hive, "garden", -72, now)
+        tracker.add("AA", "shed", -60, now)
+        tracker.add("DD", "field", -93, now)
+
+    report = tracker.report(START + 3600)
+    assert report["recommended_sources"] == ["garden", "field"]
+    assert report["redundant_sources"] == ["shed"]
+    assert report["uncovered_hives"] == []
+    assert {a: hive["assigned_source"] for a, hive in report["hives"].items()} == {
+        "AA": "garden",
+        "BB": "garden",
+        "CC": "garden",
+        "DD": "field",
+    }
+    assert report["hives"]["AA"]["best_source"] == "shed"
+    assert report["hives"]["AA"]["sources"]["shed"]["share"] == 50.0
+    assert report["sources"]["garden"] == {
+        "assigned_hives": ["AA", "BB", "CC"],
+        "hives_heard": 3,
+    }
@@ -0,0 +1,109 @@
+"""Tests for broodminder/events.py."""
+
+# ruff: noqa: PLR2004
+
+from dataclasses import replace
+from datetime import UTC, datetime
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.const import EVENT_BATTERY_LOW, EVENT_SWARM, EVENT_WEIGHT_DROP
+from custom_components.broodminder.events import HiveEventDetector
+
+BASE = ManufacturerData(
+    address="AA:BB:CC:DD:EE:FF",
+    model=56,
+    firmware="1.0",
+    device_name="BroodMinder-TH",
+    device_id="AA:BB:CC:DD:EE:FF",
+)
+
+
+def test_swarm_event_fires_once_on_entering_detected_states() -> None:
+    """29 -> 40 -> 41 is a single swarm, the first frame only sets the baseline."""
+
+    detector = HiveEventDetector()
+    swarm_time = datetime(2025, 6, 1, 12, 0, tzinfo=UTC)
+    fired = []
+    for state in (20, 20, 29, 40, 41, 60, 20, 40):
+        frame = replace(BASE, swarm_state_numeric=state, swarm_time_utc=swarm_time)
+        fired += detector.update(frame, 0.0)
+
+    assert [event_type for event_type, _ in fired] == [EVENT_SWARM, EVENT_SWARM]
+    assert fired[0][1] == {
+        "address": "AA:BB:CC:DD:EE:FF",
+        "name": "BroodMinder-TH",
+        "swarm_state": 29,
+        "description": "Swarm event detected",
+        "previous_swarm_state": 20,
+        "swarm_time": "2025-06-01T12:00:00+00:00",
+    }
+    assert fired[1][1]["swarm_state"] == 40
+
+    # Already swarming when first heard: no event
+    assert HiveEventDetector().update(replace(BASE, swarm_state_numeric=41), 0.0) == []
+
+
+def test_battery_low_fires_again_only_after_recovery() -> None:
+    """Hysteresis keeps a battery around the threshold from firing repeatedly."""
+
+    detector = HiveEventDetector()
+    fired = []
+    for battery in (50, 20, 19, 22, 20, 35, 15):
+        fired += detector.update(replace(BASE, battery_percent=battery), 0.0)
+
+    assert [(event_type, data["battery"]) for event_type, data in fired] == [
+        (EVENT_BATTERY_LOW, 20),
+        (EVENT_BATTERY_LOW, 15),
+    ]
+
+
+def test_battery_already_low_when_first_heard_does_not_fire() -> None:
+    """The first frame sets the baseline, also after a restart without a snapshot."""
+
+    detector = HiveEventDetector()
+    fired = []
+    for battery in (15, 12, 30, 18):
+        fired += detector.update(replace(BASE, battery_percent=battery), 0.0)
+    assert [data["battery"] for _, data in fired] == [18]
+
+    # The baseline survives a snapshot round trip, an unknown one stays unknown
+    restored = HiveEventDetector()
+    restored.restore(detector.to_bytes())
+    assert restored.update(replace(BASE, battery_percent=10), 0.0) == []
+    fresh = HiveEventDetector()
+    fresh.restore(HiveEventDetector().to_bytes())
+    assert fresh.update(replace(BASE, battery_percent=10), 0.0) == []
+
+
+def test_weight_drop_compares_against_window_maximum() -> None:
+    """A drop of 1 kg below the recent maximum fires once, slow drifts do not."""
+
+    detector = HiveEventDetector()
+
+    def weigh(timestamp: float, left: int, right: int) -> list:
+        frame = replace(BASE, model=57, weight_l_dag=left, weight_r_dag=right)
+        return detector.update(frame, timestamp)
+
+    assert weigh(0, 2000, 2000) == []
+    assert weigh(600, 2030, 2000) == []
+    # 0.8 kg below the maximum
+    assert weigh(1200, 1980, 1970) == []
+    # 1.5 kg below: swarm leaving
+    fired = weigh(1260, 1920, 1960)
+    assert fired == [
+        (
+            EVENT_WEIGHT_DROP,
+            {
+                "address": "AA:BB:CC:DD:EE:FF",
+                "name": "BroodMinder-TH",
+                "weight": 38.8,
+                "previous_weight": 40.3,
+                "drop": 1.5,
+                "seconds": 660,
+            },
+        )
+    ]
+    assert weigh(1320, 1910, 1960) == []
+    # The old maximum left the window, a slow drift never fires
+    detector = HiveEventDetector()
+    assert [weigh(t * 600, 2000 - t * 30, 2000) for t in range(10)] == [[]] * 10
@@ -0,0 +1,72 @@
+"""Tests for broodminder/filters.py."""
+
+# ruff: noqa: PLR2004
+
+import random
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.const import SENSOR_SPIKES_REJECTED
+from custom_components.broodminder.filters import HampelFilter, SpikeFilterStage
+
+
+def test_hampel_filter_replaces_single_spikes_with_median() -> None:
+    """An isolated outlier is reported as the rolling median, normal noise passes."""
+
+    hampel = HampelFilter(window=5, sigmas=3.0, min_deviation=50, max_jump=None)
+    outputs = [hampel.update(v) for v in (3000, 3010, 2995, 3005, 4200, 3002, 3012)]
+    assert outputs == [3000, 3010, 2995, 3005, 3005, 3002, 3012]
+    assert hampel.rejected == 1
+
+
+def test_hampel_filter_accepts_persistent_step_after_a_window() -> None:
+    """Impossible jumps are rejected until they last a whole window."""
+
+    hampel = HampelFilter(window=3, sigmas=3.0, min_deviation=50, max_jump=1000)
+    for _ in range(3):
+        hampel.update(3000)
+    assert hampel.update(9000) == 3000
+    assert hampel.update(9000) == 3000
+    assert hampel.update(9000) == 9000
+    assert hampel.update(9010) == 9010
+    assert hampel.rejected == 2
+
+
+def test_mad_selection_matches_sorting_all_deviations() -> None:
+    """The linear MAD selection gives the middle of the sorted absolute deviations."""
+
+    rng = random.Random(5)  # noqa: S311
+    for window in (1, 2, 5, 7, 8):
+        hampel = HampelFilter(window=window, sigmas=3.0, min_deviation=50)
+        for _ in range(200):
+            hampel.update(rng.choice((3000, 3000, 3010)) + rng.randrange(-80, 80))
+            samples = hampel._sorted  # noqa: SLF001
+            median = samples[len(samples) // 2]
+            expected = sorted(abs(sample - median) for sample in samples)[len(samples) // 2]
+            assert hampel._mad(median) == expected  # noqa: SLF001
+
+
+def test_spike_filter_stage_only_filters_enabled_devices() -> None:
+    """Filtered values are added for enabled devices only, in entity units."""
+
+    stage = SpikeFilterStage(window=5)
+
+    def frame(address: str, weight: int) -> ManufacturerData:
+        return ManufacturerData(
+            address=address,
+            model=57,
+            firmware="1.0",
+            device_name="BroodMinder-W",
+            device_id=address,
+            weight_l_dag=weight,
+        )
+
+    assert stage.process(frame("A", 1234), 0.0) is None
+
+    stage.enable("A")
+    for weight in (1234, 1236, 1232):
+        stage.process(frame("A", weight), 0.0)
+    derived = stage.process(frame("A", 2500), 0.0)
+    assert derived == {"weight_left_filtered": 12.36, SENSOR_SPIKES_REJECTED: 1}
+
+    stage.forget("A")
+    assert stage.process(frame("A", 1234), 0.0) is None
@@ -0,0 +1,194 @@
+"""Tests for broodminder/forwarder.py."""
+
+# ruff: noqa: PLR2004
+
+import asyncio
+
+import pytest
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.forwarder import (
+    Forwarder,
+    ForwardTarget,
+    parse_target,
+    to_line_protocol,
+)
+
+
+def _reading(weight: int = 1234) -> ManufacturerData:
+    return ManufacturerData(
+        address="AA:BB:CC:DD:EE:FF",
+        model=57,
+        firmware="1.0",
+        device_name="BroodMinder-W",
+        device_id="AA:BB:CC:DD:EE:FF",
+        battery_percent=90,
+        weight_l_dag=weight,
+    )
+
+
+class _StandInServer:
+    """Accepts raw line protocol and records the lines."""
+
+    def __init__(self) -> None:
+        self.payloads: list[bytes] = []
+        self.connections = 0
+        self.received = asyncio.Event()
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self.writer = writer
+        try:
+            while True:
+                self.payloads.append(await reader.readuntil(b"\n"))
+                self.received.set()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+
+def test_parse_target() -> None:
+    """Both schemes are parsed, anything else is rejected."""
+
+    assert parse_target("tcp://telegraf:8094") == ForwardTarget("tcp", "telegraf", 8094)
+    assert parse_target("mqtt://broker/hives/line") == ForwardTarget(
+        "mqtt", "broker", 1883, "hives/line"
+    )
+    # Without a broker: whichever broker Home Assistant's MQTT integration has
+    assert parse_target("mqtt:///hives/line") == ForwardTarget("mqtt", "", 0, "hives/line")
+    for url in (
+        "http://host:80",
+        "mqtts://broker/hives",
+        "tcp://host",
+        "mqtt://broker:1883",
+        "tcp://:8094",
+        "mqtt://u@/hives",
+        "mqtt://u:p@broker/hives",
+    ):
+        with pytest.raises(ValueError, match=r"Unsupported|Missing"):
+            parse_target(url)
+
+
+def test_to_line_protocol() -> None:
+    """Floats, integers and tags are formatted as InfluxDB line protocol."""
+
+    line = to_line_protocol(_reading(), 1_700_000_000.5)
+    assert line == (
+        "broodminder,address=AA:BB:CC:DD:EE:FF,model=W "
+        "battery_percent=90i,weight_l_kg=12.34 1700000000500000000"
+    )
+
+
+def test_forwarder_batches_over_one_connection() -> None:
+    """Lines are written in size-bounded batches over a single connection."""
+
+    async def scenario() -> _StandInServer:
+        server = _StandInServer()
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        forwarder = Forwarder(
+            ForwardTarget("tcp", "127.0.0.1", port), batch_size=2, flush_interval=0.05
+        )
+        task = asyncio.create_task(forwarder.run())
+
+        for weight in range(5):
+            forwarder.add(_reading(weight), 1.0)
+        while len(server.payloads) < 5:
+            await asyncio.wait_for(server.received.wait(), 5)
+            server.received.clear()
+
+        assert forwarder.sent == 5
+        assert forwarder.buffered == 0
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        listener.close()
+        return server
+
+    assert asyncio.run(scenario()).connections == 1
+
+
+def test_forwarder_keeps_bounded_buffer_while_unreachable() -> None:
+    """Failed writes keep the newest lines for a retry and count what was dropped."""
+
+    async def scenario() -> None:
+        # Grab a free port, then close it so connecting fails
+        server = await asyncio.start_server(lambda *_: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+
+        forwarder = Forwarder(ForwardTarget("tcp", "127.0.0.1", port), buffer_size=3)
+        for weight in range(5):
+            forwarder.add(_reading(weight), 1.0)
+        assert not await forwarder.flush()
+        assert forwarder.errors == 1
+        assert forwarder.buffered == 3
+        assert forwarder.dropped == 2
+
+        stand_in = _StandInServer()
+        server = await asyncio.start_server(stand_in.handle, "127.0.0.1", port)
+        assert await forwarder.flush()
+        await asyncio.wait_for(stand_in.received.wait(), 5)
+        assert forwarder.sent == 3
+        await forwarder.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_forwarder_publishes_through_the_given_client() -> None:
+    """With ``publish`` no connection is opened, failed publishes are retried."""
+
+    published: list[tuple[str, bytes]] = []
+    failures = [ConnectionError("not connected")]
+
+    async def publish(topic: str, payload: bytes) -> None:
+        if failures:
+            raise failures.pop()
+        published.append((topic, payload))
+
+    async def scenario() -> None:
+        forwarder = Forwarder(ForwardTarget("mqtt", "", 0, "hives/line"), publish=publish)
+        forwarder.add(_reading(), 1.0)
+        assert not await forwarder.flush()
+        assert (forwarder.sent, forwarder.buffered) == (0, 1)
+        assert await forwarder.flush()
+        assert forwarder.sent == 1
+
+    asyncio.run(scenario())
+    assert [topic for topic, _ in published] == ["hives/line"]
+
+    with pytest.raises(ValueError, match="MQTT integration"):
+        Forwarder(ForwardTarget("mqtt", "", 0, "hives/line"))
+
+
+def test_forwarder_reconnects_when_closed() -> None:
+    """A connection closed by the peer is noticed before writing the next batch."""
+
+    async def scenario() -> _StandInServer:
+        server = _StandInServer()
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        forwarder = Forwarder(ForwardTarget("tcp", "127.0.0.1", port), flush_interval=0.02)
+        task = asyncio.create_task(forwarder.run())
+
+        forwarder.add(_reading(1), 1.0)
+        await asyncio.wait_for(server.received.wait(), 5)
+        server.received.clear()
+
+        # The server goes away: nothing may be counted as sent on the dead connection
+        server.writer.close()
+        await asyncio.wait_for(forwarder._reader_task, 5)  # noqa: SLF001
+        forwarder.add(_reading(2), 2.0)
+        await asyncio.wait_for(server.received.wait(), 5)
+        assert forwarder.sent == 2
+        assert forwarder.errors == 0
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        listener.close()
+        return server
+
+    server = asyncio.run(scenario())
+    assert server.connections == 2
+    assert len(server.payloads) == 2
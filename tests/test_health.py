@@ -0,0 +1,82 @@
+"""Tests for broodminder/health.py."""
+
+# ruff: noqa: PLR2004
+
+import math
+
+from custom_components.broodminder.health import ReceptionStats, StalenessTracker
+
+
+def test_reception_stats_smooth_interval_and_rssi() -> None:
+    """Rate and RSSI are exponentially smoothed per advertisement."""
+
+    stats = ReceptionStats()
+    assert stats.rate_per_minute is None
+
+    stats.add(100.0, 1_700_000_000.0, -70)
+    assert stats.rssi_ewma == -70.0
+    assert stats.rate_per_minute is None
+
+    stats.add(110.0, 1_700_000_010.0, -80)
+    assert math.isclose(stats.rate_per_minute, 6.0)
+    assert math.isclose(stats.rssi_ewma, -72.0)
+    assert stats.last_seen_timestamp == 1_700_000_010.0
+
+    stats.add(130.0, 1_700_000_030.0, None)
+    assert math.isclose(stats.interval_ewma, 12.0)
+    assert stats.count == 3
+
+
+def test_staleness_tracker_flags_each_silent_device_once() -> None:
+    """Devices are flagged once their deadline passes, and cleared when heard again."""
+
+    tracker = StalenessTracker()
+    tracker.touch("A", 0.0, 60.0)
+    tracker.touch("B", 0.0, 60.0)
+    tracker.touch("C", 0.0, 300.0)
+
+    # A keeps advertising, its heap entry is pushed back instead of duplicated
+    for now in range(10, 200, 10):
+        tracker.touch("A", float(now), 60.0)
+
+    assert tracker.expire(59.0) == []
+    assert tracker.expire(61.0) == ["B"]
+    assert tracker.expire(120.0) == []
+    assert tracker.stale == {"B"}
+    assert len(tracker._heap) == 2  # noqa: SLF001 (A and C; B is out until heard again)
+
+    tracker.touch("B", 130.0, 60.0)
+    assert tracker.stale == set()
+
+    assert sorted(tracker.expire(400.0)) == ["A", "B", "C"]
+    assert tracker.expire(500.0) == []
+
+
+def test_staleness_tracker_forgets_removed_devices() -> None:
+    """Removed devices are never reported, and can be tracked again later."""
+
+    tracker = StalenessTracker()
+    tracker.touch("A", 0.0, 60.0)
+    tracker.remove("A")
+    assert len(tracker) == 0
+    assert tracker.expire(100.0) == []
+
+    tracker.touch("A", 100.0, 60.0)
+    assert tracker.expire(200.0) == ["A"]
+
+
+def test_staleness_tracker_flags_an_earlier_deadline_in_time() -> None:
+    """A shorter threshold is not delayed by the later deadline already queued."""
+
+    tracker = StalenessTracker()
+    tracker.touch("A", 0.0, 3600.0)
+    tracker.touch("A", 10.0, 60.0)
+    assert tracker.expire(71.0) == ["A"]
+    assert tracker.expire(4000.0) == []
+
+    # Tracked again after removal, with a deadline before the one still queued
+    tracker.touch("B", 0.0, 3600.0)
+    tracker.remove("B")
+    tracker.touch("B", 100.0, 60.0)
+    assert tracker.expire(161.0) == ["B"]
+    assert tracker.expire(4000.0) == []
@@ -0,0 +1,66 @@
+"""Tests for broodminder/history.py."""
+
+# ruff: noqa: PLR2004
+
+from dataclasses import replace
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.history import HistoryStore, HiveHistory
+
+BASE = ManufacturerData(
+    address="AA:BB:CC:DD:EE:FF",
+    model=57,
+    firmware="1.0",
+    device_name="BroodMinder-W",
+    device_id="AA:BB:CC:DD:EE:FF",
+)
+
+
+def test_history_is_a_bounded_ring_of_columns() -> None:
+    """Old rows are overwritten, values come back converted and None when missing."""
+
+    history = HiveHistory(capacity=3, min_interval=60)
+    memory = history.memory_bytes
+    for minute in range(5):
+        history.add(replace(BASE, weight_l_dag=1000 + minute, battery_percent=90), minute * 60.0)
+
+    assert history.size == 3
+    assert history.memory_bytes == memory
+    result = history.query(columns=("weight_l_kg", "temperature_c"))
+    assert result == {
+        "time": [120.0, 180.0, 240.0],
+        "temperature_c": [None, None, None],
+        "weight_l_kg": [10.02, 10.03, 10.04],
+    }
+
+
+def test_history_skips_rows_within_min_interval_and_filters_time_range() -> None:
+    """At most one row per interval is kept, queries are inclusive on both ends."""
+
+    history = HiveHistory(capacity=10, min_interval=60)
+    assert history.add(replace(BASE, battery_percent=90), 0.0)
+    assert not history.add(replace(BASE, battery_percent=89), 30.0)
+    assert history.add(replace(BASE, battery_percent=88), 60.0)
+    assert history.add(replace(BASE, battery_percent=87), 120.0)
+
+    result = history.query(60.0, 120.0, ("battery_percent",))
+    assert result == {"time": [60.0, 120.0], "battery_percent": [88, 87]}
+    assert history.query(121.0)["time"] == []
+
+
+def test_history_store_reports_memory_per_device() -> None:
+    """Memory grows per device, not per reading."""
+
+    store = HistoryStore(capacity=100, min_interval=1)
+    for second in range(500):
+        store.add(replace(BASE, weight_l_dag=second), float(second))
+    store.add(replace(BASE, address="11:22:33:44:55:66"), 0.0)
+
+    info = store.info()
+    assert info["devices"] == 2
+    assert info["rows"] == 101
+    assert info["memory_bytes"] == 2 * HiveHistory(100).memory_bytes
+    assert store.query("00:00:00:00:00:00") is None
+
+    store.forget("11:22:33:44:55:66")
+    assert "11:22:33:44:55:66" not in store
@@ -0,0 +1,191 @@
+"""Tests for broodminder/pipeline.py."""
+
+# ruff: noqa: PLR2004
+
+from collections.abc import Callable
+import queue
+import threading
+
+import pytest
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.pipeline import Pipeline, ResultBatch, Stage
+
+
+def _parsed(address: str, battery: int) -> ManufacturerData:
+    return ManufacturerData(
+        address=address,
+        model=56,
+        firmware="1.2",
+        device_name=f"BroodMinder-TH {address}",
+        device_id=address,
+        battery_percent=battery,
+    )
+
+
+class _Loop:
+    """Stand-in for the event loop: callbacks run when the test drains them."""
+
+    def __init__(self) -> None:
+        self.callbacks: queue.Queue[Callable[[], None]] = queue.Queue()
+        self.batches: list[ResultBatch] = []
+
+    def call_soon_threadsafe(self, callback: Callable[[], None]) -> None:
+        self.callbacks.put(callback)
+
+    def run_one(self) -> None:
+        self.callbacks.get(timeout=5)()
+
+    def pipeline(self, max_workers: int = 1, max_pending: int = 4) -> Pipeline:
+        return Pipeline(max_workers, max_pending, self.call_soon_threadsafe, self.batches.append)
+
+
+class _DoubleBattery(Stage):
+    name = "double"
+
+    def process(self, parsed: ManufacturerData, timestamp: float) -> dict[str, int]:
+        return {"double_battery": parsed.battery_percent * 2}
+
+
+class _Failing(Stage):
+    name = "failing"
+
+    def process(self, parsed: ManufacturerData, timestamp: float) -> dict[str, int]:
+        raise ValueError(parsed.address)
+
+
+class _BlockingStage(Stage):
+    name = "blocking"
+    offload = True
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.seen: list[tuple[str, int, float]] = []
+
+    def process(self, parsed: ManufacturerData, timestamp: float) -> dict[str, int]:
+        self.release.wait(timeout=5)
+        self.seen.append((parsed.address, parsed.battery_percent, timestamp))
+        return {"slow_battery": parsed.battery_percent}
+
+
+class _Counter(Stage):
+    """Offloaded stage counting the readings per address, its state is the count."""
+
+    name = "counter"
+    offload = True
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.counts: dict[str, int] = {}
+        self.forgotten: list[str] = []
+
+    def process(self, parsed: ManufacturerData, timestamp: float) -> dict[str, int]:
+        self.release.wait(timeout=5)
+        count = self.counts[parsed.address] = self.counts.get(parsed.address, 0) + 1
+        return {"count": count}
+
+    def forget(self, address: str) -> None:
+        self.forgotten.append(address)
+        self.counts.pop(address, None)
+
+    def snapshot(self, address: str) -> bytes | None:
+        count = self.counts.get(address)
+        return None if count is None else bytes([count])
+
+    def restore(self, address: str, data: bytes) -> None:
+        self.counts[address] = data[0]
+
+
+def test_stages_run_in_order_and_can_be_removed() -> None:
+    """The values of all inline stages are merged, a removed stage no longer runs."""
+
+    loop = _Loop()
+    pipeline = loop.pipeline()
+    remove = pipeline.add_stage(_DoubleBattery())
+
+    assert pipeline.process(_parsed("A", 40), 400.0) == {"double_battery": 80}
+    remove()
+    assert pipeline.process(_parsed("A", 40), 400.0) == {}
+    assert pipeline.stages == ()
+    assert loop.callbacks.empty()
+
+
+def test_failing_stage_does_not_stop_the_others() -> None:
+    """A stage raising is logged and skipped."""
+
+    pipeline = _Loop().pipeline()
+    pipeline.add_stage(_Failing())
+    pipeline.add_stage(_DoubleBattery())
+    assert pipeline.process(_parsed("A", 40), 400.0) == {"double_battery": 80}
+
+
+def test_stage_must_implement_process() -> None:
+    """Stage is abstract, a subclass without process() cannot be created."""
+
+    class _Incomplete(Stage):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        _Incomplete()
+
+
+def test_offloaded_stages_merge_drop_and_batch() -> None:
+    """Queued frames merge per address, overflow is dropped, results come back batched."""
+
+    loop = _Loop()
+    pipeline = loop.pipeline(max_pending=2)
+    stage = _BlockingStage()
+    pipeline.add_stage(stage)
+
+    try:
+        assert pipeline.process(_parsed("A", 1), 10.0) == {}  # in flight
+        pipeline.process(_parsed("A", 2), 20.0)  # queued
+        pipeline.process(_parsed("A", 3), 30.0)  # merged into the queued frame of A
+        pipeline.process(_parsed("B", 1), 10.0)  # queued
+        pipeline.process(_parsed("C", 1), 10.0)  # queue full -> dropped
+        assert (pipeline.pending, pipeline.merged, pipeline.dropped) == (2, 1, 1)
+
+        stage.release.set()
+        # Each flush hands back a batch and dispatches the next queued frame
+        while sum(len(batch) for batch in loop.batches) < 3:
+            loop.run_one()
+    finally:
+        pipeline.shutdown()
+
+    assert stage.seen == [("A", 1, 10.0), ("A", 3, 30.0), ("B", 1, 10.0)]
+    delivered = [item for batch in loop.batches for item in batch]
+    assert delivered == [
+        ("A", {"slow_battery": 1}),
+        ("A", {"slow_battery": 3}),
+        ("B", {"slow_battery": 1}),
+    ]
+
+
+def test_offloaded_state_is_only_touched_while_no_job_runs() -> None:
+    """Snapshots come from the worker, forget and restore wait for the running job."""
+
+    loop = _Loop()
+    pipeline = loop.pipeline()
+    stage = _Counter()
+    pipeline.add_stage(stage)
+
+    try:
+        pipeline.process(_parsed("A", 1), 10.0)  # in flight until released
+        assert pipeline.snapshot("A") == {}
+        pipeline.forget("A")
+        pipeline.restore("A", {"counter": bytes([5])})
+        assert stage.forgotten == []
+
+        stage.release.set()
+        loop.run_one()
+        assert loop.batches == []  # forgotten while it ran, the result is outdated
+        assert stage.forgotten == ["A"]
+        assert pipeline.snapshot("A") == {"counter": bytes([5])}
+
+        pipeline.process(_parsed("A", 2), 20.0)
+        loop.run_one()
+    finally:
+        pipeline.shutdown()
+
+    assert loop.batches == [[("A", {"count": 6})]]
+    assert pipeline.snapshot("A") == {"counter": bytes([6])}
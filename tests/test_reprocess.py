@@ -0,0 +1,91 @@
+"""Tests for broodminder/reprocess.py."""
+
+# ruff: noqa: PLR2004
+
+from pathlib import Path
+
+from custom_components.broodminder.capture import FORMAT_HEX
+from custom_components.broodminder.reprocess import iter_chunk_lines, plan_chunks, reprocess
+
+DAY = 86400.0
+
+
+def _w_payload(weight_dag: int, temp_centi_c: int) -> str:
+    payload = bytearray(21)
+    payload[0] = 57  # model W
+    payload[4] = 90  # battery %
+    payload[7:9] = (temp_centi_c + 5000).to_bytes(2, "little")
+    payload[10:12] = (weight_dag + 32767).to_bytes(2, "little")
+    payload[12:14] = (32767).to_bytes(2, "little")  # right channel 0 kg
+    return payload.hex()
+
+
+def _th_payload(swarm_state: int) -> str:
+    payload = bytearray(21)
+    payload[0] = 56  # model TH
+    payload[7:9] = (3450 + 5000).to_bytes(2, "little")
+    payload[19] = swarm_state
+    return payload.hex()
+
+
+def _write_capture(path: Path) -> None:
+    # Two days of a scale: +1.43 kg on day one, a 2 kg drop on day two
+    lines = [
+        f"{minute * 60.0} AA:00:00:00:00:01 {_w_payload(4000 + minute // 10, 3400)}"
+        for minute in range(0, 24 * 60, 10)
+    ]
+    lines.append(f"{DAY} AA:00:00:00:00:01 {_w_payload(4200, 3500)}")
+    lines.append(f"{DAY + 60} AA:00:00:00:00:01 {_w_payload(4000, 3700)}")
+    # A TH that swarms, the frames are out of order
+    lines.append(f"{DAY + 120} AA:00:00:00:00:02 {_th_payload(29)}")
+    lines.append(f"{DAY + 60} AA:00:00:00:00:02 {_th_payload(20)}")
+    lines.append(f"AA:00:00:00:00:02 {_th_payload(20)}")  # no timestamp
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_chunks_cover_every_line_exactly_once(tmp_path: Path) -> None:
+    """Byte-range chunks split at line boundaries without loss or duplicates."""
+
+    path = tmp_path / "capture.txt"
+    _write_capture(path)
+    chunks = plan_chunks([path], FORMAT_HEX, chunk_bytes=1000)
+    assert len(chunks) > 10
+    lines = [line for chunk in chunks for line in iter_chunk_lines(chunk)]
+    assert "".join(lines) == path.read_text()
+
+
+def test_reprocess_summarises_each_hive(tmp_path: Path) -> None:
+    """Daily weight deltas, temperature statistics and swarm candidates per hive."""
+
+    path = tmp_path / "capture.txt"
+    _write_capture(path)
+    summary = reprocess([path], FORMAT_HEX, jobs=1, chunk_bytes=4096)
+
+    assert summary["untimed_frames"] == 1
+    scale = summary["hives"]["AA:00:00:00:00:01"]
+    assert scale["model"] == "W"
+    assert scale["samples"] == 146
+    day_one, day_two = scale["days"].values()
+    assert list(scale["days"]) == ["1970-01-01", "1970-01-02"]
+    assert day_one["weight_delta_kg"] == 1.43
+    assert day_one["temperature_mean_c"] == 34.0
+    assert day_one["temperature_std_c"] == 0.0
+    assert day_one["brood_zone_fraction"] == 1.0
+    assert day_two["weight_delta_kg"] == -2.0
+    assert day_two["brood_zone_fraction"] == 0.5
+    assert [c["event"] for c in scale["swarm_candidates"]] == ["broodminder_weight_drop"]
+    assert scale["swarm_candidates"][0]["drop"] == 2.0
+
+    th = summary["hives"]["AA:00:00:00:00:02"]
+    assert th["first"] == "1970-01-02T00:01:00+00:00"
+    assert [c["swarm_state"] for c in th["swarm_candidates"]] == [29]
+
+
+def test_reprocess_in_a_process_pool_gives_the_same_summary(tmp_path: Path) -> None:
+    """Partitioning over processes does not change the result."""
+
+    path = tmp_path / "capture.txt"
+    _write_capture(path)
+    single = reprocess([path], FORMAT_HEX, jobs=1, chunk_bytes=2048)
+    pooled = reprocess([path], FORMAT_HEX, jobs=2, chunk_bytes=2048)
+    assert pooled["hives"] == single["hives"]
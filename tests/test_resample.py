@@ -0,0 +1,76 @@
+"""Tests for broodminder/resample.py."""
+
+# ruff: noqa: PLR2004
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.const import RESAMPLE_LAST, RESAMPLE_MEAN
+from custom_components.broodminder.resample import Resampler
+
+START = 1_750_000_200.0  # a multiple of 300
+
+
+def _frame(sample: int | None, temperature: int, battery: int = 80) -> ManufacturerData:
+    return ManufacturerData(
+        address="AA",
+        model=42,
+        firmware=None,
+        device_name="AA",
+        device_id="AA",
+        temperature_centi_c=temperature,
+        battery_percent=battery,
+        elapsed_s=sample,
+    )
+
+
+def test_last_value_gives_one_point_per_bin_and_skips_repeated_samples() -> None:
+    """Every 20 s through two proxies, a new sample each minute: one point per 5 minutes."""
+
+    resampler = Resampler(300, RESAMPLE_LAST)
+    frames = [
+        (_frame(second // 60, 3000 + second // 60), START + second)
+        for second in range(0, 900, 20)
+        for _ in range(2)  # heard by two proxies
+    ]
+    points = [point for frame in frames if (point := resampler.add(*frame))]
+    assert [(values.temperature_centi_c, at) for values, at in points] == [
+        (3004, START),
+        (3009, START + 300),
+    ]
+    assert resampler.duplicates == 90 - 15
+    assert resampler.flush(START + 899) is None
+    values, at = resampler.flush(START + 900)
+    assert (values.temperature_centi_c, at) == (3014, START + 600)
+    assert resampler.points == 3
+
+
+def test_mean_is_weighted_by_time_and_holds_at_most_one_interval() -> None:
+    """Each sample counts for as long as it was current, gaps are not filled."""
+
+    resampler = Resampler(300, RESAMPLE_MEAN)
+    assert resampler.add(_frame(1, 3000, battery=81), START) is None
+    assert resampler.add(_frame(2, 3600, battery=80), START + 150) is None
+    values, at = resampler.add(_frame(3, 3000), START + 360)
+    assert (values.temperature_centi_c, values.battery_percent, at) == (3300, 80, START)
+
+    # 3600 is held from the bin start until the next sample at 360 s
+    values, at = resampler.flush(START + 600)
+    assert (values.temperature_centi_c, at) == (
+        round((3600 * 60 + 3000 * 240) / 300),
+        START + 300,
+    )
+
+    # After a gap longer than the interval only the new sample counts
+    resampler.add(_frame(9, 3400), START + 1500)
+    values, at = resampler.flush(START + 1800)
+    assert (values.temperature_centi_c, at) == (3400, START + 1500)
+
+
+def test_frames_without_sample_count_are_all_samples() -> None:
+    """Without ``elapsed_s`` repeated readings are not recognized as duplicates."""
+
+    resampler = Resampler(60, RESAMPLE_MEAN)
+    for second in range(0, 60, 10):
+        resampler.add(_frame(None, 3000 + 10 * second), START + second)
+    values, _ = resampler.flush(START + 60)
+    assert values.temperature_centi_c == 3250
+    assert resampler.duplicates == 0
@@ -0,0 +1,56 @@
+"""Tests for broodminder/scheduler.py."""
+
+# ruff: noqa: PLR2004
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.scheduler import PublishScheduler
+
+
+def _frame(
+    weight: int, temperature: int = 3500, swarm_state: int | None = None
+) -> ManufacturerData:
+    return ManufacturerData(
+        address="AA",
+        model=57,
+        firmware=None,
+        device_name="AA",
+        device_id="AA",
+        temperature_centi_c=temperature,
+        weight_l_dag=weight,
+        swarm_state_numeric=swarm_state,
+    )
+
+
+def test_steady_hive_is_published_at_the_maximum_interval() -> None:
+    """Unchanged readings are held back until the maximum interval has passed."""
+
+    scheduler = PublishScheduler(min_interval=10, max_interval=600)
+    published = [t for t in range(0, 1800, 30) if scheduler.should_publish(_frame(4000), t)]
+    assert published == [0, 600, 1200]
+    assert scheduler.interval == 600
+    assert scheduler.held == 57
+
+
+def test_interval_shrinks_with_the_rate_of_change() -> None:
+    """About one update per step of change, bounded by the minimum interval."""
+
+    scheduler = PublishScheduler(min_interval=10, max_interval=600)
+    for t in range(0, 600, 30):
+        scheduler.should_publish(_frame(4000 + t // 30), t)  # 10 g every 30 s
+    assert 140 < scheduler.interval < 160
+
+    for t in range(600, 900, 30):
+        scheduler.should_publish(_frame(4000 + t), t)  # 10 kg/s
+    assert scheduler.interval == 10
+
+
+def test_large_changes_and_swarm_transitions_bypass_the_interval() -> None:
+    """A jump or a swarm state change is published at once."""
+
+    scheduler = PublishScheduler(min_interval=10, max_interval=600)
+    assert scheduler.should_publish(_frame(4000, swarm_state=20), 0)
+    assert not scheduler.should_publish(_frame(4000, swarm_state=20), 30)
+    assert scheduler.should_publish(_frame(4000, swarm_state=29), 60)
+    assert not scheduler.should_publish(_frame(4000, swarm_state=29), 90)
+    assert scheduler.should_publish(_frame(3900, swarm_state=29), 120)  # 1 kg drop
+    assert scheduler.should_publish(_frame(3900, 3650, swarm_state=29), 150)  # +1.5 °C
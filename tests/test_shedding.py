@@ -0,0 +1,50 @@
+"""Tests for broodminder/shedding.py."""
+
+# ruff: noqa: PLR2004
+
+from custom_components.broodminder.const import SHED_HOLD_SECONDS
+from custom_components.broodminder.shedding import LoadMonitor
+
+
+def test_a_calm_loop_never_sheds() -> None:
+    """Small lags and backlogs stay below the limits."""
+
+    monitor = LoadMonitor()
+    for second in range(120):
+        monitor.add_lag(0.005, second)
+        monitor.add_backlog(0.02, second)
+    assert not monitor.shedding
+    assert monitor.transitions == 0
+
+
+def test_loop_lag_starts_shedding_until_calm_long_enough() -> None:
+    """Shedding starts on sustained lag and stops only after the hold time."""
+
+    monitor = LoadMonitor()
+    monitor.add_lag(0.2, 0)
+    assert not monitor.shedding  # a single late callback is smoothed away
+    for second in range(1, 5):
+        monitor.add_lag(0.5, second)
+    assert monitor.shedding
+
+    stopped = None
+    for second in range(5, 120):
+        monitor.add_lag(0.0, second)
+        if stopped is None and not monitor.shedding:
+            stopped = second
+    # The smoothed lag needs a few seconds to fall below half the limit, then the hold
+    assert stopped is not None
+    assert stopped - 5 >= SHED_HOLD_SECONDS
+    assert not monitor.shedding
+    assert monitor.transitions == 1
+
+
+def test_update_backlog_alone_starts_shedding() -> None:
+    """Advertisements waiting long for the update method are pressure too."""
+
+    monitor = LoadMonitor()
+    for second in range(10):
+        monitor.add_lag(0.0, second)
+        monitor.add_backlog(2.0, second)
+    assert monitor.shedding
+    assert monitor.dump()["backlog_ms"] > 1000
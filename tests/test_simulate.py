@@ -0,0 +1,86 @@
+"""Tests for broodminder/simulate.py."""
+
+# ruff: noqa: PLR2004
+
+from collections import Counter
+
+import pytest
+
+from custom_components.broodminder.ble_parser import parse_manufacturer_data
+from custom_components.broodminder.const import EVENT_SWARM, MANUFACTURER_ID
+from custom_components.broodminder.events import HiveEventDetector
+from custom_components.broodminder.simulate import Apiary, encode_payload
+
+
+@pytest.mark.parametrize(
+    ("model", "values"),
+    [
+        (47, {"temperature_centi_c": 3481, "battery_percent": 88, "swarm_state_numeric": 29}),
+        (56, {"temperature_centi_c": -512, "humidity_percent": 61, "elapsed_s": 4321}),
+        (57, {"weight_l_dag": 2012, "weight_r_dag": 1990, "weight_realtime_total_dag": 4002}),
+        (49, {"weight_l_dag": 1000, "weight_l2_dag": 1001, "weight_r2_dag": None}),
+    ],
+)
+def test_encoded_payloads_decode_to_the_same_values(model: int, values: dict) -> None:
+    """The encoder is the inverse of the model layout."""
+
+    parsed = parse_manufacturer_data("AA", {MANUFACTURER_ID: encode_payload(model, values)})
+    assert parsed.model == model
+    assert parsed.firmware == "3.26"
+    for name, value in values.items():
+        assert getattr(parsed, name) == value
+
+
+def test_sht_temperatures_round_trip_within_the_sensor_resolution() -> None:
+    """Legacy models use the SHT formula, encoded to the nearest raw value."""
+
+    payload = encode_payload(42, {"temperature_centi_c": 3500})
+    parsed = parse_manufacturer_data("AA", {MANUFACTURER_ID: payload})
+    assert parsed.temperature_centi_c == pytest.approx(3500, abs=1)
+
+
+def test_apiary_stream_is_ordered_deterministic_and_duplicated_by_proxies() -> None:
+    """Mixed models, one advertisement per interval, copies from several proxies."""
+
+    apiary = Apiary(8, interval=60, proxies=3, coverage=0.5, seed=7)
+    advertisements = list(apiary.advertisements(3600))
+    times = [advertisement.time for advertisement in advertisements]
+    assert times == sorted(times)
+
+    models = {
+        parse_manufacturer_data(a.address, a.manufacturer_data).model for a in advertisements
+    }
+    assert models == {47, 56, 57, 49}
+
+    # About 60 advertisements per hive, each received by 2 proxies on average
+    per_hive = Counter(advertisement.address for advertisement in advertisements)
+    assert all(100 < count < 140 for count in per_hive.values())
+    assert {advertisement.source for advertisement in advertisements} == {
+        "proxy-1",
+        "proxy-2",
+        "proxy-3",
+    }
+
+    again = list(Apiary(8, interval=60, proxies=3, coverage=0.5, seed=7).advertisements(3600))
+    assert again == advertisements
+
+
+def test_swarming_hives_report_swarm_events() -> None:
+    """Every swarming T/TH hive passes into a swarm-detected state once."""
+
+    apiary = Apiary(20, models=("T", "TH"), swarm_share=0.5, swarm_within=3600, seed=3)
+    detectors: dict[str, HiveEventDetector] = {}
+    swarms = Counter()
+    for advertisement in apiary.advertisements(4 * 3600):
+        parsed = parse_manufacturer_data(advertisement.address, advertisement.manufacturer_data)
+        detector = detectors.setdefault(parsed.address, HiveEventDetector())
+        for event_type, data in detector.update(parsed, advertisement.time):
+            if event_type == EVENT_SWARM:
+                swarms[data["address"]] += 1
+
+    swarming = {hive.address for hive in apiary.hives if hive.swarm_at is not None}
+    assert swarming
+    # A swarm in the first interval has no baseline frame before it
+    assert set(swarms) <= swarming
+    assert len(swarms) >= len(swarming) - 1
+    assert set(swarms.values()) == {1}
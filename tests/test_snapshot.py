@@ -0,0 +1,140 @@
+"""Tests for broodminder/snapshot.py."""
+
+from dataclasses import replace
+from pathlib import Path
+import struct
+
+import pytest
+
+from custom_components.broodminder.ble_parser import ManufacturerData
+from custom_components.broodminder.brood import BroodStabilityStage
+from custom_components.broodminder.const import EVENT_WEIGHT_DROP
+from custom_components.broodminder.events import HiveEventDetector
+from custom_components.broodminder.filters import SpikeFilterStage
+from custom_components.broodminder.history import HistoryStore
+from custom_components.broodminder.snapshot import (
+    SnapshotError,
+    decode_snapshot,
+    encode_snapshot,
+    load_snapshot,
+    save_snapshot,
+)
+
+BASE = ManufacturerData(
+    address="AA",
+    model=57,
+    firmware=None,
+    device_name="AA",
+    device_id="AA",
+    temperature_centi_c=3450,
+    weight_l_dag=4000,
+    weight_r_dag=4000,
+    battery_percent=15,
+)
+
+
+def _frames(start: int, count: int) -> list[tuple[ManufacturerData, float]]:
+    return [
+        (
+            replace(
+                BASE,
+                temperature_centi_c=3450 + (i * 7) % 40,
+                weight_l_dag=4000 + i % 5 + (300 if i == count - 3 else 0),
+            ),
+            start + 300.0 * i,
+        )
+        for i in range(count)
+    ]
+
+
+def test_snapshot_container_round_trips(tmp_path: Path) -> None:
+    """Hives and their sections survive encoding and a file round trip."""
+
+    hives = {"AA": {"history": b"\x00\x01", "events": b""}, "BB": {}}
+    _, decoded = decode_snapshot(encode_snapshot(hives, 1.5))
+    assert decoded == hives
+
+    path = tmp_path / "storage" / "broodminder.snapshot"
+    assert load_snapshot(path) is None
+    save_snapshot(path, hives, 1_750_000_000.0)
+    assert load_snapshot(path) == (1_750_000_000.0, hives)
+    assert [p.name for p in path.parent.iterdir()] == ["broodminder.snapshot"]
+
+
+def test_other_versions_and_damaged_snapshots_are_rejected() -> None:
+    """A snapshot of another version or a truncated one is never misread."""
+
+    data = encode_snapshot({"AA": {"history": b"\x00" * 16}}, 0.0)
+    with pytest.raises(SnapshotError):
+        decode_snapshot(data[:4] + struct.pack("<H", 99) + data[6:])
+    with pytest.raises(SnapshotError):
+        decode_snapshot(data[:-3])
+    with pytest.raises(SnapshotError):
+        decode_snapshot(b"JUNK" + data[4:])
+
+
+def test_restored_components_continue_where_they_stopped() -> None:
+    """State restored from a snapshot gives the same results as never stopping."""
+
+    history, brood, spikes, events = (
+        HistoryStore(capacity=50, min_interval=60),
+        BroodStabilityStage(),
+        SpikeFilterStage(),
+        HiveEventDetector(),
+    )
+    spikes.enable("AA")
+    frames = _frames(1_750_000_000, 120)
+
+    def run(components: tuple, batch: list) -> list:
+        history, brood, spikes, events = components
+        results = []
+        for parsed, now in batch:
+            history.add(parsed, now)
+            results.append(
+                (
+                    brood.process(parsed, now),
+                    spikes.process(parsed, now),
+                    events.update(parsed, now),
+                )
+            )
+        return results
+
+    run((history, brood, spikes, events), frames[:80])
+    payloads = (
+        history.snapshot("AA"),
+        brood.snapshot("AA"),
+        spikes.snapshot("AA"),
+        events.to_bytes(),
+    )
+
+    restored = (
+        HistoryStore(capacity=40, min_interval=60),  # smaller: keeps the newest rows
+        BroodStabilityStage(),
+        SpikeFilterStage(),
+        HiveEventDetector(),
+    )
+    restored[0].restore("AA", payloads[0])
+    restored[1].restore("AA", payloads[1])
+    restored[2].enable("AA")
+    restored[2].restore("AA", payloads[2])
+    restored[3].restore(payloads[3])
+
+    assert restored[0].query("AA") == history.query("AA", start=frames[40][1])
+    continued = run(restored, frames[80:])
+    assert continued == run((history, brood, spikes, events), frames[80:])
+    assert [event for _, _, found in continued for event, _ in found] == [EVENT_WEIGHT_DROP]
+
+
+def test_spike_filter_state_is_only_restored_when_enabled() -> None:
+    """Disabling the filter between two runs drops its saved buffers."""
+
+    stage = SpikeFilterStage()
+    stage.enable("AA")
+    stage.process(BASE, 0.0)
+    data = stage.snapshot("AA")
+    assert data is not None
+
+    disabled = SpikeFilterStage()
+    disabled.restore("AA", data)
+    assert disabled.snapshot("AA") is None
+    assert disabled.process(BASE, 0.0) is None
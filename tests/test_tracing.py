@@ -0,0 +1,80 @@
+"""Tests for broodminder/tracing.py."""
+
+# ruff: noqa: PLR2004
+
+import pytest
+
+from custom_components.broodminder.tracing import LatencyTracker
+
+
+def test_latency_tracker_records_stage_durations() -> None:
+    """Each complete trace is split into stages, in milliseconds."""
+
+    tracker = LatencyTracker(size=10)
+    tracker.start(receipt=10.000, now=10.050)
+    tracker.mark_parsed(10.051)
+    tracker.mark_built(10.053)
+    tracker.mark_built(10.090)  # a later rebuild (derived values) does not count
+    tracker.finish(10.060)
+
+    dump = tracker.dump()
+    assert dump["dropped"] == 0
+    assert dump["traces"] == [
+        {"bluetooth": 50.0, "parse": 1.0, "build": 2.0, "write": 7.0, "total": 60.0}
+    ]
+    assert dump["percentiles"]["total"] == {
+        50: pytest.approx(60.0),
+        95: pytest.approx(60.0),
+        99: pytest.approx(60.0),
+    }
+
+
+def test_latency_tracker_percentiles_and_bounds() -> None:
+    """Only the newest traces are kept, non-BroodMinder frames are not traces."""
+
+    tracker = LatencyTracker(size=100)
+    assert tracker.percentiles() is None
+    for total_ms in range(1, 201):
+        now = float(total_ms)
+        tracker.start(receipt=now, now=now)
+        tracker.mark_parsed(now)
+        tracker.mark_built(now)
+        tracker.finish(now + total_ms / 1000)
+
+    assert len(tracker) == 100
+    percentiles = tracker.percentiles()
+    assert percentiles == {
+        50: pytest.approx(150.0),
+        95: pytest.approx(195.0),
+        99: pytest.approx(199.0),
+    }
+
+    # Scan response without manufacturer data, then a reading that was never built
+    tracker.start(receipt=1.0, now=1.0)
+    tracker.finish(1.0)
+    tracker.start(receipt=1.0, now=1.0)
+    tracker.mark_parsed(1.0)
+    tracker.finish(1.0)
+    assert tracker.dropped == 1
+    assert len(tracker) == 100
+
+
+def test_latency_percentiles_are_cached_between_refreshes() -> None:
+    """The sensors' percentiles are only sorted again after ``refresh`` new traces."""
+
+    tracker = LatencyTracker(size=10, refresh=3)
+
+    def trace(total_ms: float) -> None:
+        tracker.start(receipt=0.0, now=0.0)
+        tracker.mark_parsed(0.0)
+        tracker.mark_built(0.0)
+        tracker.finish(total_ms / 1000)
+
+    trace(10)
+    assert tracker.percentiles()[50] == pytest.approx(10.0)
+    trace(90)
+    trace(90)
+    assert tracker.percentiles()[50] == pytest.approx(10.0)  # cached
+    assert tracker.dump()["percentiles"]["total"][50] == pytest.approx(90.0)  # always fresh
+    trace(90)
+    assert tracker.percentiles()[50] == pytest.approx(90.0)
@@ -0,0 +1,36 @@
+"""Tests for broodminder/translations/en.json."""
+
+import json
+from pathlib import Path
+
+import yaml
+
+from custom_components.broodminder.const import ISSUE_POOR_COVERAGE, SERVICE_GET_HISTORY
+
+PACKAGE = Path("custom_components/broodminder")
+
+
+def _strings() -> dict:
+    return json.loads((PACKAGE / "translations" / "en.json").read_text(encoding="utf-8"))
+
+
+def test_services_and_their_fields_are_translated() -> None:
+    """Every service of services.yaml has a name and a name for each field."""
+
+    services = yaml.safe_load((PACKAGE / "services.yaml").read_text(encoding="utf-8"))
+    strings = _strings()["services"]
+    assert SERVICE_GET_HISTORY in services
+    for service, schema in services.items():
+        assert strings[service]["name"]
+        for field in schema["fields"]:
+            assert strings[service]["fields"][field]["name"]
+
+
+def test_exception_and_issue_keys_are_translated() -> None:
+    """The keys raised by api.py and the coverage tick resolve to a message."""
+
+    strings = _strings()
+    assert "{address}" in strings["exceptions"]["no_history"]["message"]
+    issue = strings["issues"][ISSUE_POOR_COVERAGE]
+    assert issue["title"]
+    assert issue["description"]